@@ -1 +1,9 @@
-from .scoreboarding import main, ScoreboardingSIM
+from .scoreboarding import (
+    main,
+    FunctionalUnit,
+    Instruction,
+    InstructionStatus,
+    ScoreboardingSIM,
+)
+from .session import MachineConfig, Program, ResultCache, simulate
+from .incremental import IncrementalSimulator
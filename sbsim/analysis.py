@@ -0,0 +1,185 @@
+import math
+from collections import deque
+
+from .render import build_table
+from .session import MachineConfig, Program
+
+# Least number of cycles a F.U. is held by an instruction besides its
+# execution: issue, read and write each take a cycle of their own
+HELD_CYCLES = 3
+
+# Share of the lower bound a F.U. class must have delayed issues by to be
+# reported as a bottleneck
+BOTTLENECK_SHARE = 0.1
+
+
+def get_n_rows(config: dict) -> int:
+    """Number of instructions a F.U. class can hold at once, like the rows built by build_functional_unit_status"""
+    initiation_interval = config.get("initiation_interval")
+    if initiation_interval is None:
+        return config["n_units"]
+    return config["n_units"] * math.ceil(config["n_cycles"] / initiation_interval)
+
+
+def resource_bounds(functional_units_config: dict, instructions: list) -> dict:
+    """Get the least number of cycles the instructions of each F.U. class need, with no dependency between them.
+
+    Each instruction holds one row of its F.U. for at least its latency plus
+    HELD_CYCLES, and a pipelined F.U. starts executing at most one instruction
+    every initiation interval on each of its units.
+    """
+    held = {}
+    counts = {}
+    latencies = {}
+    for instruction in instructions:
+        config = functional_units_config[instruction.fu]
+        latency = instruction.latency or config["n_cycles"]
+        held[instruction.fu] = held.get(instruction.fu, 0) + latency + HELD_CYCLES
+        counts[instruction.fu] = counts.get(instruction.fu, 0) + 1
+        latencies[instruction.fu] = min(latency, latencies.get(instruction.fu, latency))
+    bounds = {}
+    for fu, total in held.items():
+        config = functional_units_config[fu]
+        bounds[fu] = math.ceil(total / get_n_rows(config))
+        initiation_interval = config.get("initiation_interval")
+        if initiation_interval is not None:
+            per_unit = math.ceil(counts[fu] / config["n_units"])
+            bounds[fu] = max(
+                bounds[fu],
+                (per_unit - 1) * initiation_interval + latencies[fu] + HELD_CYCLES,
+            )
+    return bounds
+
+
+def schedule_bound(
+    functional_units_config: dict,
+    instructions: list,
+    issue_width: int = 1,
+    structural: bool = True,
+) -> tuple[int, list, dict]:
+    """Get the least cycle the last write can happen in, in a single sweep over the instructions in program order.
+
+    Every stage gets the earliest cycle the scoreboard rules allow given the
+    cycles of the instructions before it: in order issue of at most
+    issue_width instructions per cycle, a free destination register (WAW) and,
+    with structural, a free F.U. row, operands read after their producers
+    wrote them (RAW) and a write after the earlier reads of the destination
+    register (WAR). The real cycles can only be later, so the last write is a
+    lower bound of the total cycles. The instructions on the longest chain of
+    these constraints, ending in the last write, are returned with it, and so
+    are the cycles each F.U. class delayed issues by with its rows full.
+    """
+    recent_issues = deque(maxlen=issue_width)  # (cycle, idx) of the last issues
+    last_issue = (1, None)
+    last_write = {}  # Register -> (cycle, idx) of the write of its last writer
+    last_read = {}  # Register -> (cycle, idx) of its latest read
+    held_rows = {
+        fu: deque(maxlen=get_n_rows(config))
+        for fu, config in functional_units_config.items()
+    }
+    delays = {fu: 0 for fu in functional_units_config}
+    predecessors = []
+    end = (0, None)
+    for idx, instruction in enumerate(instructions):
+        # Each stage is a (cycle, idx of the instruction that set it) pair
+        issue = last_issue
+        constraints = []
+        if len(recent_issues) == issue_width:
+            constraints.append(recent_issues[0])
+        if instruction.dest in last_write:
+            constraints.append(last_write[instruction.dest])
+        for cycle, producer in constraints:
+            if cycle + 1 > issue[0]:
+                issue = (cycle + 1, producer)
+        rows = held_rows[instruction.fu]
+        if structural and len(rows) == rows.maxlen:
+            cycle, producer = min(rows)
+            if cycle + 1 > issue[0]:
+                delays[instruction.fu] += cycle + 1 - issue[0]
+                issue = (cycle + 1, producer)
+        read = (issue[0] + 1, issue[1])
+        for src in [instruction.src1, instruction.src2]:
+            if src in last_write and last_write[src][0] + 1 > read[0]:
+                read = (last_write[src][0] + 1, last_write[src][1])
+        latency = (
+            instruction.latency or functional_units_config[instruction.fu]["n_cycles"]
+        )
+        write = (read[0] + latency + 1, read[1])
+        if instruction.dest in last_read and last_read[instruction.dest][0] > write[0]:
+            write = last_read[instruction.dest]
+        predecessors.append(write[1])
+        write = (write[0], idx)
+        if instruction.dest is not None:
+            last_write[instruction.dest] = write
+        for src in [instruction.src1, instruction.src2]:
+            if src is not None and read[0] >= last_read.get(src, (0, None))[0]:
+                last_read[src] = (read[0], idx)
+        last_issue = (issue[0], idx)
+        recent_issues.append(last_issue)
+        rows.append(write)
+        if write[0] > end[0]:
+            end = write
+    path = []
+    idx = end[1]
+    while idx is not None:
+        path.append(idx)
+        idx = predecessors[idx]
+    return end[0], path[::-1], delays
+
+
+def analyze(program: Program, config: MachineConfig = None) -> dict:
+    """Estimate the cycles of a program on a machine without simulating it.
+
+    The critical path is the schedule bound with unlimited F.U.s, so only the
+    dependencies and the issue order count, the resource bound of each F.U.
+    class ignores the dependencies. The lower bound is the largest of the
+    resource bounds and of the schedule bound with the F.U. rows, that is never
+    below the critical path, a simulation never takes fewer cycles. The
+    bottlenecks are the F.U. classes that delayed issues in the schedule bound
+    by at least BOTTLENECK_SHARE of the lower bound, or whose resource bound is
+    at least the critical path, the ones that delayed the most first.
+    """
+    config = config or program.default_config()
+    instructions = list(program.instructions_to_execute.values())
+    functional_units = config.functional_units
+    critical_path, path, _ = schedule_bound(
+        functional_units, instructions, config.issue_width, structural=False
+    )
+    bound, _, delays = schedule_bound(
+        functional_units, instructions, config.issue_width
+    )
+    bounds = resource_bounds(functional_units, instructions)
+    lower_bound = max([bound] + list(bounds.values()))
+    bottlenecks = sorted(
+        [
+            fu
+            for fu, cycles in bounds.items()
+            if delays[fu] >= BOTTLENECK_SHARE * lower_bound or cycles >= critical_path
+        ],
+        key=lambda fu: (-delays[fu], -bounds[fu]),
+    )
+    return {
+        "config": functional_units,
+        "lower_bound": lower_bound,
+        "critical_path": critical_path,
+        "critical_instructions": [instructions[idx].label for idx in path],
+        "resource_bounds": bounds,
+        "structural_delays": delays,
+        "bottlenecks": bottlenecks,
+    }
+
+
+def build_analysis_table(analysis: dict) -> str:
+    """Build a table with the bound and issue delays of each F.U. class, the critical path and the lower bound"""
+    rows = [
+        [
+            fu,
+            cycles,
+            analysis["structural_delays"][fu],
+            "bottleneck" if fu in analysis["bottlenecks"] else "",
+        ]
+        for fu, cycles in analysis["resource_bounds"].items()
+    ]
+    rows.append(["critical path", analysis["critical_path"], None, ""])
+    rows.append(["lower bound", analysis["lower_bound"], None, ""])
+    return build_table(rows, ["bound", "cycles", "issue delays", ""])
@@ -0,0 +1,296 @@
+import numpy as np
+
+from .export import MISSING_CYCLE
+from .session import MachineConfig, Program
+
+# Register ids are small, comparing them is cheaper with a narrow type
+REGISTER_DTYPE = np.int16
+
+# Rows kept in the state arrays are compacted once this fraction of them is done
+COMPACT_FRACTION = 0.5
+
+
+class BatchState:
+    """Scoreboard state of many independent programs, one row per program.
+
+    Instructions are (programs, instructions) arrays padded to the longest
+    program, and the F.U.s (programs, units) arrays, in the order of the F.U.
+    config. A busy unit holds the state of the instruction using it, so the
+    operand slots of the scoreboard (fj, fk, qj, qk, rj, rk) live with the unit.
+    A missing operand or destination is the register id after the last one of
+    the ISAs, the pending reads of stores and loads are counted on it like
+    ScoreboardingSIM does with None.
+    """
+
+    def __init__(self, programs: list[Program], functional_units: dict) -> None:
+        n_programs = len(programs)
+        length = max((len(program) for program in programs), default=0)
+        fus = list(functional_units)
+        unit_classes = []
+        unit_cycles = []
+        for i, fu in enumerate(fus):
+            if "initiation_interval" in functional_units[fu]:
+                raise ValueError(f"The batch engine has no pipelined F.U.s, got '{fu}'")
+            n_units = functional_units[fu]["n_units"]
+            unit_classes += [i] * n_units
+            unit_cycles += [functional_units[fu]["n_cycles"]] * n_units
+        self.unit_classes = np.array(unit_classes, dtype=np.int64)
+        self.unit_cycles = np.array(unit_cycles, dtype=np.int64)
+        n_units = len(unit_classes)
+
+        self.no_register = no_register = max(
+            (len(program.isa.register_names) for program in programs), default=0
+        )
+        self.length = np.zeros(n_programs, dtype=np.int64)
+        self.fu = np.full((n_programs, length), -1, dtype=np.int64)
+        # Execution cycles of the instructions with a latency of their own
+        self.latency = np.full((n_programs, length), -1, dtype=np.int64)
+        self.dest = np.full((n_programs, length), no_register, dtype=REGISTER_DTYPE)
+        self.src1 = np.full((n_programs, length), no_register, dtype=REGISTER_DTYPE)
+        self.src2 = np.full((n_programs, length), no_register, dtype=REGISTER_DTYPE)
+        for row, program in enumerate(programs):
+            self.length[row] = len(program)
+            for instruction in program.instructions_to_execute.values():
+                if instruction.fu not in functional_units:
+                    raise ValueError(
+                        f"No '{instruction.fu}' F.U. in the config for: {' '.join(instruction.fields)}"
+                    )
+                if functional_units[instruction.fu]["n_units"] < 1:
+                    raise ValueError(f"The '{instruction.fu}' F.U. has no units")
+                idx = instruction.idx
+                self.fu[row, idx] = fus.index(instruction.fu)
+                if instruction.latency is not None:
+                    self.latency[row, idx] = instruction.latency
+                for array, reg in [
+                    (self.dest, instruction.dest),
+                    (self.src1, instruction.src1),
+                    (self.src2, instruction.src2),
+                ]:
+                    if reg is not None:
+                        array[row, idx] = reg
+
+        # Cycle of every stage of every instruction
+        self.timings = np.full((n_programs, length, 4), MISSING_CYCLE, dtype=np.int64)
+        self.total_cycles = np.zeros(n_programs, dtype=np.int64)
+        # Rows of the programs still running, the arrays below only hold those
+        self.rows = np.arange(n_programs)
+        self.next_issue = np.zeros(n_programs, dtype=np.int64)
+        self.n_finished = np.zeros(n_programs, dtype=np.int64)
+        self.register_table = np.full((n_programs, no_register + 1), -1, dtype=np.int64)
+        units = (n_programs, n_units)
+        self.busy = np.zeros(units, dtype=bool)
+        self.inst = np.full(units, -1, dtype=np.int64)
+        self.fi = np.full(units, no_register, dtype=REGISTER_DTYPE)
+        self.fj = np.full(units, no_register, dtype=REGISTER_DTYPE)
+        self.fk = np.full(units, no_register, dtype=REGISTER_DTYPE)
+        self.qj = np.full(units, -1, dtype=np.int64)
+        self.qk = np.full(units, -1, dtype=np.int64)
+        self.rj = np.zeros(units, dtype=bool)
+        self.rk = np.zeros(units, dtype=bool)
+        self.read_done = np.zeros(units, dtype=bool)
+        self.ex_done = np.zeros(units, dtype=bool)
+        self.done_cycles = np.zeros(units, dtype=np.int64)
+        self.cycles = np.zeros(units, dtype=np.int64)
+
+    # Arrays with one row per running program
+    ROW_ARRAYS = [
+        "length",
+        "fu",
+        "latency",
+        "dest",
+        "src1",
+        "src2",
+        "next_issue",
+        "n_finished",
+        "register_table",
+        "busy",
+        "inst",
+        "fi",
+        "fj",
+        "fk",
+        "qj",
+        "qk",
+        "rj",
+        "rk",
+        "read_done",
+        "ex_done",
+        "done_cycles",
+        "cycles",
+    ]
+
+    def compact(self) -> None:
+        """Drop the rows of the programs that are done"""
+        running = self.n_finished < self.length
+        for name in self.ROW_ARRAYS:
+            setattr(self, name, getattr(self, name)[running])
+        self.rows = self.rows[running]
+
+    def process_cycle(self, cycle: int) -> None:
+        """Run a cycle of every running program, with the same rules as ScoreboardingSIM.process_cycle.
+
+        Every decision is taken from the state at the start of the cycle, which
+        is what the per instruction stages see too: registers and F.U.s are only
+        released at the end of the cycle, an instruction does a single stage per
+        cycle and only the issue candidate, the last one of the window, can
+        issue. The one exception is the WAR check of a write, that sees the
+        operands read earlier in the same cycle by older instructions.
+        """
+        n_programs = len(self.rows)
+        row = np.arange(n_programs)
+        busy = self.busy
+
+        reading = busy & ~self.read_done & self.rj & self.rk
+        executing = busy & self.read_done & ~self.ex_done
+        # Ready operands not read yet of the destination of every unit, for every
+        # (writer unit, reader unit) pair, minus the ones older readers read now
+        pending = (
+            (self.fj[:, None, :] == self.fi[:, :, None]) & (busy & self.rj)[:, None, :]
+        ) | (
+            (self.fk[:, None, :] == self.fi[:, :, None]) & (busy & self.rk)[:, None, :]
+        )
+        read_before = reading[:, None, :] & (
+            self.inst[:, None, :] < self.inst[:, :, None]
+        )
+        writing = busy & self.ex_done & ~(pending & ~read_before).any(axis=2)
+
+        # Issue of the candidate of every program
+        candidate = np.minimum(self.next_issue, self.fu.shape[1] - 1)
+        has_candidate = self.next_issue < self.length
+        fu = self.fu[row, candidate]
+        dest = self.dest[row, candidate]
+        src1 = self.src1[row, candidate]
+        src2 = self.src2[row, candidate]
+        waw = (dest != self.no_register) & (self.register_table[row, dest] >= 0)
+        free = ~busy & (self.unit_classes[None, :] == fu[:, None])
+        issuing = has_candidate & ~waw & free.any(axis=1)
+        unit = free.argmax(axis=1)
+        qj = self.register_table[row, src1]
+        qk = np.where(src2 == self.no_register, -1, self.register_table[row, src2])
+
+        # Operands waiting for an instruction written this cycle
+        written = np.where(writing, self.inst, -2)
+        ready_j = (self.qj[:, :, None] == written[:, None, :]).any(axis=2)
+        ready_k = (self.qk[:, :, None] == written[:, None, :]).any(axis=2)
+
+        # Read
+        rows, units = np.nonzero(reading)
+        self.timings[self.rows[rows], self.inst[rows, units], 1] = cycle
+        self.read_done |= reading
+        self.rj &= ~reading
+        self.rk &= ~reading
+
+        # Execute
+        rows, units = np.nonzero(executing)
+        self.timings[self.rows[rows], self.inst[rows, units], 2] = cycle
+        self.done_cycles += executing
+        self.ex_done |= executing & (self.done_cycles == self.cycles)
+
+        # Write, the register is released at the end of the cycle
+        rows, units = np.nonzero(writing)
+        self.timings[self.rows[rows], self.inst[rows, units], 3] = cycle
+        self.register_table[rows, self.fi[rows, units]] = -1
+        self.register_table[:, self.no_register] = -1
+        self.n_finished += writing.sum(axis=1)
+
+        # Issue
+        rows = np.nonzero(issuing)[0]
+        units = unit[rows]
+        idx = candidate[rows]
+        self.timings[self.rows[rows], idx, 0] = cycle
+        self.busy[rows, units] = True
+        self.inst[rows, units] = idx
+        self.fi[rows, units] = dest[rows]
+        self.fj[rows, units] = src1[rows]
+        self.fk[rows, units] = src2[rows]
+        self.qj[rows, units] = qj[rows]
+        self.qk[rows, units] = qk[rows]
+        self.rj[rows, units] = qj[rows] < 0
+        self.rk[rows, units] = qk[rows] < 0
+        latency = self.latency[rows, idx]
+        self.cycles[rows, units] = np.where(
+            latency < 0, self.unit_cycles[units], latency
+        )
+        self.register_table[rows, dest[rows]] = idx
+        self.register_table[:, self.no_register] = -1
+        self.next_issue += issuing
+
+        # Wake up the operands waiting for the written instructions, the ones
+        # issued this cycle included, and free the units of those instructions
+        self.rj |= ready_j
+        self.rk |= ready_k
+        self.wake_new_operands(rows, units, written)
+        self.busy &= ~writing
+        self.inst[writing] = -1
+        self.qj[writing] = -1
+        self.qk[writing] = -1
+        self.rj &= ~writing
+        self.rk &= ~writing
+        self.read_done &= ~writing
+        self.ex_done &= ~writing
+        self.done_cycles[writing] = 0
+
+    def wake_new_operands(self, rows, units, written) -> None:
+        """Operands of the units issued this cycle waiting on an instruction written in the same cycle are ready"""
+        qj = self.qj[rows, units]
+        qk = self.qk[rows, units]
+        self.rj[rows, units] |= (qj[:, None] == written[rows]).any(axis=1)
+        self.rk[rows, units] |= (qk[:, None] == written[rows]).any(axis=1)
+
+    def run(self) -> None:
+        """Process cycles until every program is done"""
+        if not self.timings.shape[1]:
+            return  # Only empty programs
+        self.compact()
+        cycle = 1
+        while len(self.rows):
+            self.process_cycle(cycle)
+            n_running = np.count_nonzero(self.n_finished < self.length)
+            if n_running <= COMPACT_FRACTION * len(self.rows):
+                self.compact()
+            cycle += 1
+        # The last cycle of a program is the one of its last write
+        if self.timings.shape[1]:
+            self.total_cycles = np.maximum(self.timings[:, :, 3].max(axis=1), 0)
+
+
+def simulate_batch_arrays(
+    programs: list[Program], config: MachineConfig = None
+) -> tuple:
+    """Simulate many independent programs on the same machine, in lockstep.
+
+    Get the (programs, instructions, 4) int64 array with the cycle of every
+    stage, MISSING_CYCLE for padding, and the total cycles of every program.
+    The machine is the one from the first program files by default, the
+    engine of the config isn't used.
+    """
+    if config is None:
+        config = programs[0].default_config() if programs else MachineConfig({})
+    if config.issue_width != 1:
+        raise ValueError(
+            f"The batch engine only issues one instruction per cycle, got an issue width of {config.issue_width}"
+        )
+    state = BatchState(programs, config.functional_units)
+    state.run()
+    return state.timings, state.total_cycles
+
+
+def simulate_batch(programs: list[Program], config: MachineConfig = None) -> list:
+    """Same as calling session.simulate on every program, with the results in the same format"""
+    if config is None and programs:
+        config = programs[0].default_config()
+    timings, total_cycles = simulate_batch_arrays(programs, config)
+    results = []
+    for program, program_timings, program_cycles in zip(
+        programs, timings, total_cycles
+    ):
+        results.append(
+            {
+                "config": config.functional_units,
+                "total_cycles": int(program_cycles),
+                "timings": [
+                    tuple(int(cycle) for cycle in timing)
+                    for timing in program_timings[: len(program)].tolist()
+                ],
+            }
+        )
+    return results
@@ -0,0 +1,224 @@
+import json
+import os
+import random
+import time
+import tracemalloc
+
+from .scoreboarding import ScoreboardingSIM
+
+DEFAULT_FUNCTIONAL_UNITS_CONFIG = {
+    "int": {"n_units": 2, "n_cycles": 1},
+    "mult": {"n_units": 2, "n_cycles": 4},
+    "add": {"n_units": 1, "n_cycles": 2},
+    "div": {"n_units": 1, "n_cycles": 10},
+}
+
+# Opcodes whose registers are integer ones, the others use float registers
+INT_OPCODES = ["ild", "isw", "isub", "iadd"]
+
+LOAD_OPCODES = ["ild", "fld"]
+
+STORE_OPCODES = ["isw", "fsd"]
+
+# Named workloads of the suite, keyword arguments of generate_trace
+SUITE = {
+    "dependent": {"dependency_distance": 1},
+    "mixed": {"dependency_distance": 4},
+    "independent": {"dependency_distance": 32},
+    "long_latency": {
+        "dependency_distance": 2,
+        "opcode_mix": {"fdiv": 3, "fmul": 2, "fld": 1, "fsd": 1},
+    },
+}
+
+
+def generate_trace(
+    n_instructions: int,
+    dependency_distance: int = 4,
+    opcode_mix: dict = None,
+    functional_units_config: dict = None,
+    n_registers: int = 32,
+    seed: int = 0,
+) -> list[str]:
+    """Generate the lines of a synthetic program, the F.U. config first and then the instructions.
+
+    The first source of every instruction is the destination of the instruction
+    dependency_distance positions before it with the same register kind, when
+    there is one, so smaller distances give longer dependency chains. opcode_mix
+    maps an opcode of OPCODE_MAP to its weight, every opcode has the same weight
+    by default.
+    """
+    rng = random.Random(seed)
+    functional_units_config = functional_units_config or DEFAULT_FUNCTIONAL_UNITS_CONFIG
+    opcode_mix = opcode_mix or {op: 1 for op in ScoreboardingSIM.OPCODE_MAP}
+    for op in opcode_mix:
+        if op not in ScoreboardingSIM.OPCODE_MAP:
+            raise ValueError(f"Unknown opcode '{op}'")
+    opcodes = list(opcode_mix)
+    weights = [opcode_mix[op] for op in opcodes]
+    lines = []
+    for fu, config in functional_units_config.items():
+        line = f"{fu} {config['n_units']} {config['n_cycles']}"
+        if "initiation_interval" in config:
+            line += f" {config['initiation_interval']}"
+        lines.append(line)
+    dests = {"x": [], "f": []}
+
+    def register(kind: str) -> str:
+        return kind + str(rng.randrange(n_registers))
+
+    def dependent_register(kind: str) -> str:
+        if len(dests[kind]) >= dependency_distance:
+            return dests[kind][-dependency_distance]
+        return register(kind)
+
+    for op in rng.choices(opcodes, weights, k=n_instructions):
+        kind = "x" if op in INT_OPCODES else "f"
+        if op in LOAD_OPCODES:
+            dest = register(kind)
+            lines.append(
+                f"{op} {dest}, {rng.randrange(64) * 8}({dependent_register('x')})"
+            )
+        elif op in STORE_OPCODES:
+            lines.append(
+                f"{op} {dependent_register(kind)}, {rng.randrange(64) * 8}({register('x')})"
+            )
+            continue
+        else:
+            dest = register(kind)
+            lines.append(f"{op} {dest}, {dependent_register(kind)}, {register(kind)}")
+        dests[kind].append(dest)
+    return lines
+
+
+def write_trace(path: os.path, lines: list[str]) -> None:
+    """Write the lines of a generated program to a file"""
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def run_benchmark(lines: list[str], engine: str = "cycle", repeat: int = 3) -> dict:
+    """Time the parse, simulate and render phases of a program, keeping the best of repeat runs.
+
+    Peak memory is measured on a separate run, since tracing allocations slows
+    the simulation down.
+    """
+    times = {"parse": [], "simulate": [], "render": []}
+    for _ in range(repeat):
+        obj = ScoreboardingSIM([], False, engine)
+        start = time.perf_counter()
+        program = obj.parse_file(lines)
+        parsed = time.perf_counter()
+        obj.load_program(*program)
+        obj.run()
+        simulated = time.perf_counter()
+        obj.build_table_from_array()
+        rendered = time.perf_counter()
+        times["parse"].append(parsed - start)
+        times["simulate"].append(simulated - parsed)
+        times["render"].append(rendered - simulated)
+
+    tracemalloc.start()
+    obj = ScoreboardingSIM([], False, engine)
+    obj.load_program(*obj.parse_file(lines))
+    obj.run()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = {phase: min(phase_times) for phase, phase_times in times.items()}
+    n_instructions = len(obj.instruction_table)
+    result["n_instructions"] = n_instructions
+    result["total_cycles"] = obj.total_cycles
+    result["instructions_per_second"] = n_instructions / max(result["simulate"], 1e-9)
+    result["peak_memory"] = peak_memory
+    return result
+
+
+def run_suite(
+    n_instructions: int = 10000,
+    engine: str = "cycle",
+    repeat: int = 3,
+    workloads: list[str] = None,
+) -> dict:
+    """Run every workload of the suite, or only the given ones, and return the results by name"""
+    results = {}
+    for name in workloads or SUITE:
+        lines = generate_trace(n_instructions, **SUITE[name])
+        results[name] = run_benchmark(lines, engine, repeat)
+    return results
+
+
+def save_baseline(path: os.path, results: dict) -> None:
+    """Store the results of a suite run as the baseline to compare against"""
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: os.path) -> dict:
+    """Load the results stored by save_baseline"""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def compare_to_baseline(
+    results: dict, baseline: dict, tolerance: float = 0.2
+) -> list[str]:
+    """Get a message for every phase time or peak memory more than tolerance above the baseline.
+
+    The simulated total cycles must match the baseline exactly, a different
+    value means the simulation result changed.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        reference = baseline[name]
+        if result["total_cycles"] != reference["total_cycles"]:
+            regressions.append(
+                f"{name}: total cycles changed from {reference['total_cycles']} to {result['total_cycles']}"
+            )
+        for key in ["parse", "simulate", "render", "peak_memory"]:
+            if result[key] > reference[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {key} went from {reference[key]:.6g} to {result[key]:.6g}"
+                )
+    return regressions
+
+
+def build_suite_table(results: dict, baseline: dict = None) -> str:
+    """Build a table with the results of every workload, and the speedup over the baseline if given"""
+    from .render import build_table
+
+    headers = [
+        "workload",
+        "instructions",
+        "cycles",
+        "parse (s)",
+        "simulate (s)",
+        "render (s)",
+        "inst/s",
+        "peak memory (KiB)",
+    ]
+    if baseline:
+        headers.append("speedup")
+    rows = []
+    for name, result in results.items():
+        row = [
+            name,
+            result["n_instructions"],
+            result["total_cycles"],
+            f"{result['parse']:.4f}",
+            f"{result['simulate']:.4f}",
+            f"{result['render']:.4f}",
+            f"{result['instructions_per_second']:.0f}",
+            result["peak_memory"] // 1024,
+        ]
+        if baseline:
+            reference = baseline.get(name)
+            row.append(
+                f"{reference['simulate'] / result['simulate']:.2f}x"
+                if reference
+                else None
+            )
+        rows.append(row)
+    return build_table(rows, headers)
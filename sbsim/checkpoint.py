@@ -0,0 +1,68 @@
+import os
+import pickle
+import zlib
+
+# Bumped whenever the saved state changes, old checkpoints can't be resumed then
+CHECKPOINT_VERSION = 3
+
+# Attributes of ScoreboardingSIM saved in a checkpoint, the loaded program plus
+# everything process_cycle reads or writes between two cycles
+CHECKPOINT_STATE = [
+    "isa",
+    "functional_units_config",
+    "instructions_to_execute",
+    "raw_instructions",
+    "instruction_order",
+    "instruction_table",
+    "functional_unit_table",
+    "register_table",
+    "cycle",
+    "registers_to_update",
+    "reset_fu",
+    "issue_done_flag",
+    "n_issued",
+    "issue_width",
+    "instruction_before_issue_state",
+    "pending_events",
+    "cycle_changed",
+    "waiting_operands",
+    "pending_readers",
+    "in_flight",
+    "next_issue",
+    "n_finished",
+]
+
+
+def dump_state(state: dict) -> bytes:
+    """Serialize the state of a simulator into a compressed checkpoint.
+
+    The state is pickled as a whole, so the F.U.s shared by the instruction
+    statuses and the waiting operand index are still shared once loaded, and
+    compressed with the fastest zlib level, that is already enough for the
+    repeated None and small ints of the tables.
+    """
+    return zlib.compress(
+        pickle.dumps((CHECKPOINT_VERSION, state), pickle.HIGHEST_PROTOCOL), 1
+    )
+
+
+def load_state(data: bytes) -> dict:
+    """Get back the state given to dump_state, only load checkpoints from a trusted source since they are pickles"""
+    version, state = pickle.loads(zlib.decompress(data))
+    if version != CHECKPOINT_VERSION:
+        raise ValueError(
+            f"Checkpoint version {version} can't be loaded, expected {CHECKPOINT_VERSION}"
+        )
+    return state
+
+
+def save_checkpoint(path: os.path, data: bytes) -> None:
+    """Write a checkpoint to a file"""
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def load_checkpoint(path: os.path) -> bytes:
+    """Read a checkpoint written by save_checkpoint"""
+    with open(path, "rb") as f:
+        return f.read()
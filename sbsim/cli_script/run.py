@@ -1,6 +1,9 @@
 import argparse
+import sys
 
+from ..isa import ISA
 from ..scoreboarding import ScoreboardingSIM
+from ..streaming import StreamingScoreboardingSIM
 
 def parse_args() -> None:
     parser = argparse.ArgumentParser(
@@ -19,18 +22,665 @@ def parse_args() -> None:
     action="store_true",
     help="print all of the stages",
     )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=ScoreboardingSIM.ENGINES,
+        default="cycle",
+        help="simulation engine, 'event' skips the cycles where nothing changes",
+    )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help="read the instructions lazily, from stdin if no file or '-' is given, and write each row as soon as it is done",
+    )
+
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print the time spent in each stage and the stall cycles by cause",
+    )
+    parser.add_argument(
+        "--steady-state",
+        action="store_true",
+        help="skip the repeated iterations of loop bodies once their timing is periodic",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="reuse the results of programs and F.U. configs already simulated, stored in this directory",
+    )
+    parser.add_argument(
+        "-o",
+        "--export",
+        type=str,
+        default=None,
+        help="write the cycles of every instruction to a .npz, .npy or .csv file",
+    )
+    parser.add_argument(
+        "--isa",
+        type=str,
+        default=None,
+        help="JSON file with the opcodes, F.U. classes and register files to use instead of the default ones",
+    )
+    parser.add_argument(
+        "-w",
+        "--issue-width",
+        type=int,
+        default=1,
+        help="number of instructions that can issue in the same cycle, in order",
+    )
+    parser.add_argument(
+        "-t",
+        "--trace",
+        type=str,
+        default=None,
+        help="record the scoreboard of every cycle to this compressed trace file, see the view command",
+    )
 
     args = parser.parse_args()
+    if args.issue_width < 1:
+        parser.error("--issue-width must be at least 1")
+    if args.stream and args.print_all:
+        parser.error("--stream can't be used with --print-all")
+    if args.stream and args.export:
+        parser.error("--stream can't be used with --export")
+    if args.stream and args.steady_state:
+        parser.error("--stream can't be used with --steady-state")
+    if args.stats and args.steady_state:
+        parser.error("--stats can't be used with --steady-state")
+    if args.cache_dir and (args.stream or args.print_all or args.stats):
+        parser.error("--cache-dir can't be used with --stream, --print-all or --stats")
+    if args.trace and (
+        args.stream or args.cache_dir or args.print_all or args.steady_state
+    ):
+        parser.error(
+            "--trace can't be used with --stream, --cache-dir, --print-all or --steady-state"
+        )
     dict_args = vars(args)
     return dict_args
 
 
+def parse_fu_values(arg: str) -> tuple[str, list[int]]:
+    """Parse a "fu=v1,v2,..." argument into the F.U. and its list of values"""
+    try:
+        fu, values = arg.lower().split("=")
+        return fu, [int(value) for value in values.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected fu=v1,v2,..., got '{arg}'")
+
+
+def parse_sweep_args(argv: list) -> dict:
+    parser = argparse.ArgumentParser(
+        prog="scoreboarding_sim sweep",
+        description="Simulate the same program against a grid of functional unit configs",
+    )
+    parser.add_argument(
+        "file-path",
+        metavar="file path",
+        nargs="*",
+        type=str,
+        help="file path for each file",
+    )
+    parser.add_argument(
+        "-u",
+        "--units",
+        nargs="*",
+        type=parse_fu_values,
+        default=[],
+        help="number of units to try for a F.U., like int=1,2",
+    )
+    parser.add_argument(
+        "-c",
+        "--cycles",
+        nargs="*",
+        type=parse_fu_values,
+        default=[],
+        help="number of cycles to try for a F.U., like div=10,16",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of worker processes, defaults to the number of cores",
+    )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=ScoreboardingSIM.ENGINES,
+        default="event",
+        help="simulation engine used for every config",
+    )
+    parser.add_argument(
+        "-t",
+        "--timings",
+        action="store_true",
+        help="print the cycles of every instruction for each config",
+    )
+    parser.add_argument(
+        "--bounds",
+        action="store_true",
+        help="only estimate a lower bound of the cycles of each config, without simulating, the best ones first",
+    )
+    parser.add_argument(
+        "-w",
+        "--issue-width",
+        type=int,
+        default=1,
+        help="number of instructions that can issue in the same cycle, in order",
+    )
+    parser.add_argument(
+        "--isa",
+        type=str,
+        default=None,
+        help="JSON file with the opcodes, F.U. classes and register files to use instead of the default ones",
+    )
+    return vars(parser.parse_args(argv))
+
+
+def sweep_main(argv: list) -> None:
+    # The process pool is only needed by the sweep, keep it out of the plain run startup
+    from ..sweep import build_sweep_table, sweep
+
+    cmd_args = parse_sweep_args(argv)
+    isa = ISA.from_file(cmd_args["isa"]) if cmd_args["isa"] else None
+    if cmd_args["bounds"]:
+        from ..sweep import bound_sweep, build_bound_sweep_table
+
+        analyses = bound_sweep(
+            cmd_args["file-path"],
+            units=dict(cmd_args["units"]),
+            cycles=dict(cmd_args["cycles"]),
+            issue_width=cmd_args["issue_width"],
+            isa=isa,
+        )
+        ScoreboardingSIM.pretty_print(build_bound_sweep_table(analyses))
+        return
+    results = sweep(
+        cmd_args["file-path"],
+        units=dict(cmd_args["units"]),
+        cycles=dict(cmd_args["cycles"]),
+        n_workers=cmd_args["jobs"],
+        engine=cmd_args["engine"],
+        isa=isa,
+        issue_width=cmd_args["issue_width"],
+    )
+    ScoreboardingSIM.pretty_print(build_sweep_table(results, cmd_args["timings"]))
+
+
+def parse_bound_args(argv: list) -> dict:
+    parser = argparse.ArgumentParser(
+        prog="scoreboarding_sim bound",
+        description="Estimate a lower bound of the cycles of a program and its bottlenecks without simulating it",
+    )
+    parser.add_argument(
+        "file-path",
+        metavar="file path",
+        nargs="*",
+        type=str,
+        help="file path for each file",
+    )
+    parser.add_argument(
+        "-w",
+        "--issue-width",
+        type=int,
+        default=1,
+        help="number of instructions that can issue in the same cycle, in order",
+    )
+    parser.add_argument(
+        "--isa",
+        type=str,
+        default=None,
+        help="JSON file with the opcodes, F.U. classes and register files to use instead of the default ones",
+    )
+    return vars(parser.parse_args(argv))
+
+
+def bound_main(argv: list) -> None:
+    from ..analysis import analyze, build_analysis_table
+    from ..session import Program
+
+    cmd_args = parse_bound_args(argv)
+    isa = ISA.from_file(cmd_args["isa"]) if cmd_args["isa"] else None
+    program = Program.from_files(cmd_args["file-path"], isa)
+    analysis = analyze(
+        program, program.default_config(issue_width=cmd_args["issue_width"])
+    )
+    ScoreboardingSIM.pretty_print(build_analysis_table(analysis))
+    path = analysis["critical_instructions"]
+    if path:
+        print(
+            f"\ncritical path: {len(path)} instructions, from {path[0]} to {path[-1]}"
+        )
+
+
+def parse_sample_args(argv: list) -> dict:
+    from ..sampling import (
+        DEFAULT_CONFIDENCE,
+        DEFAULT_INTERVAL,
+        DEFAULT_N_SAMPLES,
+        DEFAULT_WARMUP,
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="scoreboarding_sim sample",
+        description="Estimate the cycles and CPI of a long program simulating only a sample of its intervals in detail",
+    )
+    parser.add_argument(
+        "file-path",
+        metavar="file path",
+        nargs="*",
+        type=str,
+        help="file path for each file",
+    )
+    parser.add_argument(
+        "-i",
+        "--interval",
+        type=int,
+        default=DEFAULT_INTERVAL,
+        help="instructions of each interval",
+    )
+    parser.add_argument(
+        "-s",
+        "--samples",
+        type=int,
+        default=DEFAULT_N_SAMPLES,
+        help="number of intervals simulated in detail, besides the last one",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=DEFAULT_WARMUP,
+        help="instructions simulated before each sample to warm the F.U. and register tables up",
+    )
+    parser.add_argument(
+        "-c",
+        "--confidence",
+        type=float,
+        default=DEFAULT_CONFIDENCE,
+        help="confidence level of the interval of the estimate",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed of the offset of the sampled intervals",
+    )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=ScoreboardingSIM.ENGINES,
+        default="event",
+        help="simulation engine used for the samples",
+    )
+    parser.add_argument(
+        "-w",
+        "--issue-width",
+        type=int,
+        default=1,
+        help="number of instructions that can issue in the same cycle, in order",
+    )
+    parser.add_argument(
+        "--isa",
+        type=str,
+        default=None,
+        help="JSON file with the opcodes, F.U. classes and register files to use instead of the default ones",
+    )
+    return vars(parser.parse_args(argv))
+
+
+def sample_main(argv: list) -> None:
+    from ..sampling import build_sampling_table, sample
+    from ..session import Program
+
+    cmd_args = parse_sample_args(argv)
+    isa = ISA.from_file(cmd_args["isa"]) if cmd_args["isa"] else None
+    program = Program.from_files(cmd_args["file-path"], isa)
+    estimate = sample(
+        program,
+        program.default_config(cmd_args["engine"], cmd_args["issue_width"]),
+        cmd_args["interval"],
+        cmd_args["samples"],
+        cmd_args["warmup"],
+        cmd_args["confidence"],
+        cmd_args["seed"],
+    )
+    ScoreboardingSIM.pretty_print(build_sampling_table(estimate))
+    print(
+        f"\n{estimate['detailed_instructions']} of {estimate['n_instructions']} instructions simulated in detail"
+    )
+
+
+def parse_fuzz_args(argv: list) -> dict:
+    from ..differential import DEFAULT_MAX_INSTRUCTIONS, MODES
+
+    parser = argparse.ArgumentParser(
+        prog="scoreboarding_sim fuzz",
+        description="Compare every engine and mode against the reference cycle loop on random programs and F.U. configs",
+    )
+    parser.add_argument(
+        "-n",
+        "--n-cases",
+        type=int,
+        default=100,
+        help="number of random cases",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed of the random cases, the same seed gives the same cases",
+    )
+    parser.add_argument(
+        "--max-instructions",
+        type=int,
+        default=DEFAULT_MAX_INSTRUCTIONS,
+        help="length of the longest generated program",
+    )
+    parser.add_argument(
+        "-m",
+        "--modes",
+        nargs="*",
+        choices=list(MODES),
+        default=None,
+        help="modes to compare, all of them by default",
+    )
+    parser.add_argument(
+        "--no-shrink",
+        action="store_true",
+        help="report the failing cases as generated instead of shrinking them",
+    )
+    return vars(parser.parse_args(argv))
+
+
+def fuzz_main(argv: list) -> None:
+    from ..differential import (
+        MODES,
+        build_differential_table,
+        format_failure,
+        run_differential,
+    )
+
+    cmd_args = parse_fuzz_args(argv)
+    modes = MODES
+    if cmd_args["modes"]:
+        modes = {name: MODES[name] for name in cmd_args["modes"]}
+    report = run_differential(
+        cmd_args["n_cases"],
+        cmd_args["seed"],
+        cmd_args["max_instructions"],
+        modes,
+        not cmd_args["no_shrink"],
+    )
+    ScoreboardingSIM.pretty_print(build_differential_table(report))
+    for failure in report["failures"]:
+        ScoreboardingSIM.pretty_print(format_failure(failure))
+    if report["failures"]:
+        sys.exit(1)
+
+
+def parse_bench_args(argv: list) -> dict:
+    from ..benchmark import SUITE
+
+    parser = argparse.ArgumentParser(
+        prog="scoreboarding_sim bench",
+        description="Time the simulator over synthetic programs",
+    )
+    parser.add_argument(
+        "-n",
+        "--n-instructions",
+        type=int,
+        default=10000,
+        help="number of instructions of each generated program",
+    )
+    parser.add_argument(
+        "-w",
+        "--workloads",
+        nargs="*",
+        choices=list(SUITE),
+        default=None,
+        help="workloads to run, all of them by default",
+    )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=ScoreboardingSIM.ENGINES,
+        default="cycle",
+        help="simulation engine",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=3,
+        help="number of timed runs, the best one is kept",
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        type=str,
+        default=None,
+        help="compare against the results stored in this file",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        type=str,
+        default=None,
+        help="store the results in this file",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="relative slowdown over the baseline reported as a regression",
+    )
+    return vars(parser.parse_args(argv))
+
+
+def bench_main(argv: list) -> None:
+    from ..benchmark import (
+        build_suite_table,
+        compare_to_baseline,
+        load_baseline,
+        run_suite,
+        save_baseline,
+    )
+
+    cmd_args = parse_bench_args(argv)
+    results = run_suite(
+        cmd_args["n_instructions"],
+        cmd_args["engine"],
+        cmd_args["repeat"],
+        cmd_args["workloads"],
+    )
+    baseline = load_baseline(cmd_args["baseline"]) if cmd_args["baseline"] else None
+    ScoreboardingSIM.pretty_print(build_suite_table(results, baseline))
+    if cmd_args["save_baseline"]:
+        save_baseline(cmd_args["save_baseline"], results)
+    if baseline:
+        regressions = compare_to_baseline(results, baseline, cmd_args["tolerance"])
+        for regression in regressions:
+            print(regression)
+        if regressions:
+            sys.exit(1)
+
+
+def parse_serve_args(argv: list) -> dict:
+    from ..server import DEFAULT_HOST, DEFAULT_PORT
+
+    parser = argparse.ArgumentParser(
+        prog="scoreboarding_sim serve",
+        description="Run a simulation service with an HTTP/JSON API",
+    )
+    parser.add_argument(
+        "--host",
+        type=str,
+        default=DEFAULT_HOST,
+        help="address to listen on",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help="port to listen on",
+    )
+    parser.add_argument(
+        "--unix",
+        type=str,
+        default=None,
+        help="listen on this Unix socket instead of TCP",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes, one per CPU by default",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="store the results in this directory and reuse them",
+    )
+    return vars(parser.parse_args(argv))
+
+
+def serve_main(argv: list) -> None:
+    from ..server import serve
+
+    cmd_args = parse_serve_args(argv)
+    serve(
+        host=cmd_args["host"],
+        port=cmd_args["port"],
+        unix_path=cmd_args["unix"],
+        n_workers=cmd_args["workers"],
+        cache_dir=cmd_args["cache_dir"],
+    )
+
+
+def parse_view_args(argv: list) -> dict:
+    parser = argparse.ArgumentParser(
+        prog="scoreboarding_sim view",
+        description="Show the scoreboard tables of any cycle of a trace recorded with --trace",
+    )
+    parser.add_argument(
+        "trace",
+        type=str,
+        help="trace file",
+    )
+    parser.add_argument(
+        "-c",
+        "--cycles",
+        nargs="*",
+        type=int,
+        default=[],
+        help="cycles to show, a summary of the trace is shown without them",
+    )
+    parser.add_argument(
+        "-a",
+        "--all",
+        action="store_true",
+        help="show every instruction, not only the ones in flight",
+    )
+    return vars(parser.parse_args(argv))
+
+
+def view_main(argv: list) -> None:
+    from ..trace import TraceReader
+
+    cmd_args = parse_view_args(argv)
+    with TraceReader(cmd_args["trace"]) as reader:
+        if not cmd_args["cycles"]:
+            print(reader.build_summary())
+        for cycle in cmd_args["cycles"]:
+            try:
+                tables = reader.build_tables(cycle, cmd_args["all"])
+            except ValueError as error:
+                sys.exit(str(error))
+            ScoreboardingSIM.pretty_print(tables)
+
+
+def cached_main(
+    files: list[str],
+    engine: str,
+    cache_dir: str,
+    export_path: str = None,
+    isa: ISA = None,
+    issue_width: int = 1,
+) -> None:
+    from ..export import export_timings
+    from ..session import Program, ResultCache, build_result_table, simulate
+
+    program = Program.from_files(files, isa)
+    config = program.default_config(engine, issue_width)
+    result = simulate(program, config, ResultCache(cache_dir))
+    ScoreboardingSIM.pretty_print(build_result_table(program, result))
+    if export_path:
+        export_timings(export_path, program.labels, result["timings"])
+
+
+# Subcommands, given as the first argument, and the function that runs each one
+# with the arguments after it
+SUBCOMMANDS = {
+    "sweep": sweep_main,
+    "bench": bench_main,
+    "serve": serve_main,
+    "bound": bound_main,
+    "sample": sample_main,
+    "fuzz": fuzz_main,
+    "view": view_main,
+}
+
+
 def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+        return
     cmd_args = parse_args()
     files = cmd_args["file-path"]
     print_all = cmd_args["print_all"]
-    obj = ScoreboardingSIM(files, print_all)
+    engine = cmd_args["engine"]
+    isa = ISA.from_file(cmd_args["isa"]) if cmd_args["isa"] else None
+    issue_width = cmd_args["issue_width"]
+    if cmd_args["cache_dir"]:
+        cached_main(
+            files, engine, cmd_args["cache_dir"], cmd_args["export"], isa, issue_width
+        )
+        return
+    if cmd_args["trace"]:
+        from ..trace import TracingSIM
+
+        obj = TracingSIM(
+            files,
+            cmd_args["trace"],
+            engine,
+            cmd_args["stats"],
+            isa,
+            issue_width,
+        )
+    elif cmd_args["stream"]:
+        obj = StreamingScoreboardingSIM(
+            files, engine, stats=cmd_args["stats"], isa=isa, issue_width=issue_width
+        )
+    else:
+        obj = ScoreboardingSIM(
+            files,
+            print_all,
+            engine,
+            cmd_args["stats"],
+            cmd_args["steady_state"],
+            isa,
+            issue_width,
+        )
     obj.execute()
+    if obj.stats is not None:
+        obj.pretty_print(obj.stats.build_report())
+    if cmd_args["export"]:
+        obj.export_timings(cmd_args["export"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,374 @@
+import os
+import random
+import tempfile
+import time
+from typing import NamedTuple
+
+from .benchmark import generate_trace
+from .render import build_table
+from .scoreboarding import ScoreboardingSIM
+from .session import MachineConfig, Program, simulate
+
+# Longest program of a generated case
+DEFAULT_MAX_INSTRUCTIONS = 60
+
+
+class Case(NamedTuple):
+    """A generated program and the machine it runs on"""
+
+    functional_units: dict
+    instructions: list  # Instruction lines, without the F.U. config
+    issue_width: int = 1
+
+    def lines(self) -> list[str]:
+        """Get the lines of the program, the F.U. config first"""
+        return build_config_lines(self.functional_units) + self.instructions
+
+
+def build_config_lines(functional_units: dict) -> list[str]:
+    """Get the F.U. lines of a config, in the format read by parse_functional_unit"""
+    lines = []
+    for fu, config in functional_units.items():
+        values = [config["n_units"], config["n_cycles"]]
+        if "initiation_interval" in config:
+            values.append(config["initiation_interval"])
+        lines.append(" ".join([fu] + [str(value) for value in values]))
+    return lines
+
+
+def generate_case(
+    rng: random.Random, max_instructions: int = DEFAULT_MAX_INSTRUCTIONS
+) -> Case:
+    """Generate a random F.U. config, issue width and program.
+
+    Half of the programs are a random loop body repeated many times, so the
+    modes that only kick in on periodic programs are exercised too.
+    """
+    functional_units = {}
+    for fu in ScoreboardingSIM.FUNCTIONAL_UNITS:
+        functional_units[fu] = {
+            "n_units": rng.randint(1, 3),
+            "n_cycles": rng.randint(1, 10),
+        }
+        if rng.random() < 0.25:
+            functional_units[fu]["initiation_interval"] = rng.randint(1, 3)
+    opcodes = list(ScoreboardingSIM.OPCODE_MAP)
+    opcode_mix = {op: rng.randint(0, 3) for op in opcodes}
+    opcode_mix[rng.choice(opcodes)] += 1  # At least one opcode can be picked
+    n_instructions = rng.randint(1, max_instructions)
+    body_size = n_instructions
+    if rng.random() < 0.5:
+        body_size = rng.randint(1, max(1, n_instructions // 4))
+    body = generate_trace(
+        body_size,
+        dependency_distance=rng.randint(1, 8),
+        opcode_mix={op: weight for op, weight in opcode_mix.items() if weight},
+        functional_units_config=functional_units,
+        n_registers=rng.randint(2, 32),
+        seed=rng.randrange(2**32),
+    )[len(functional_units) :]
+    instructions = (body * (n_instructions // body_size + 1))[:n_instructions]
+    return Case(functional_units, instructions, rng.randint(1, 3))
+
+
+def run_reference(program: Program, config: MachineConfig) -> dict:
+    """Simulate with ScoreboardingSIM.loop, the cycle engine every other mode must match"""
+    return simulate(program, config._replace(engine="cycle"))
+
+
+def run_engine(program: Program, config: MachineConfig, engine: str, **options) -> dict:
+    """Simulate with a ScoreboardingSIM engine built with extra constructor options"""
+    obj = ScoreboardingSIM(
+        [],
+        False,
+        engine,
+        isa=program.isa,
+        issue_width=config.issue_width,
+        **options,
+    )
+    obj.load_program(
+        config.functional_units,
+        program.instructions_to_execute,
+        program.raw_instructions,
+    )
+    obj.run()
+    return obj.get_result()
+
+
+def run_streaming(program: Program, config: MachineConfig) -> dict:
+    """Simulate with the streaming simulator, reading the program lines lazily"""
+    from .streaming import StreamingScoreboardingSIM
+
+    class CollectingSIM(StreamingScoreboardingSIM):
+        def write_row(self, instruction, status) -> None:
+            self.timings.append((status.issue, status.read, status.ex, status.write))
+
+    obj = CollectingSIM(
+        [], "event", output=open(os.devnull, "w"), issue_width=config.issue_width
+    )
+    obj.timings = []
+    instructions = [
+        ScoreboardingSIM.join_raw_instructions(fields)
+        for fields in program.raw_instructions
+    ]
+    obj.lines = iter(build_config_lines(config.functional_units) + instructions)
+    obj.functional_units_config = obj.read_functional_units_config()
+    obj.instructions = obj.iter_instructions()
+    obj.raw_instructions = []
+    obj.run()
+    obj.output.close()
+    return {"total_cycles": obj.total_cycles, "timings": obj.timings}
+
+
+def run_checkpointed(program: Program, config: MachineConfig) -> dict:
+    """Pause a simulation halfway, checkpoint it and resume it in a new simulator"""
+    obj = ScoreboardingSIM([], False, "event", issue_width=config.issue_width)
+    obj.load_program(
+        config.functional_units,
+        program.instructions_to_execute,
+        program.raw_instructions,
+    )
+    obj.run(stop_cycle=len(program) + 1)
+    resumed = ScoreboardingSIM([], False, "cycle")
+    resumed.restore(obj.checkpoint())
+    resumed.resume()
+    return resumed.get_result()
+
+
+def run_incremental(program: Program, config: MachineConfig) -> dict:
+    """Simulate the program as an edit of itself without its last instruction"""
+    from .incremental import IncrementalSimulator
+
+    base = Program(
+        dict(list(program.instructions_to_execute.items())[:-1]),
+        program.raw_instructions[:-1],
+        program.functional_units_config,
+        program.isa,
+    )
+    simulator = IncrementalSimulator(base, config, snapshot_interval=4)
+    return simulator.simulate(program)
+
+
+def run_batch(program: Program, config: MachineConfig) -> dict:
+    """Simulate with the NumPy batch engine, it doesn't model pipelines or wide issue"""
+    from .batch import simulate_batch
+
+    pipelined = any(
+        "initiation_interval" in fu_config
+        for fu_config in config.functional_units.values()
+    )
+    if pipelined or config.issue_width != 1:
+        return None
+    return simulate_batch([program], config)[0]
+
+
+def run_snapshots(program: Program, config: MachineConfig) -> dict:
+    """Simulate handing every cycle to a callback, like the server does, so no cycle is skipped"""
+    from .server import simulate_with_snapshots
+
+    return simulate_with_snapshots(
+        program, config._replace(engine="event"), lambda cycle, rows: None
+    )
+
+
+def run_traced(program: Program, config: MachineConfig) -> dict:
+    """Simulate while recording a trace to a temporary file"""
+    from .trace import record_trace
+
+    with tempfile.TemporaryDirectory() as directory:
+        return record_trace(
+            program, config._replace(engine="event"), os.path.join(directory, "t")
+        )
+
+
+# Every alternative to the reference loop, each gets a program and a machine and
+# returns the total cycles and timings, or None when it can't simulate them
+MODES = {
+    "event": lambda program, config: run_engine(program, config, "event"),
+    "steady_state": lambda program, config: run_engine(
+        program, config, "cycle", steady_state=True
+    ),
+    "event_steady_state": lambda program, config: run_engine(
+        program, config, "event", steady_state=True
+    ),
+    "stats": lambda program, config: run_engine(program, config, "event", stats=True),
+    "streaming": run_streaming,
+    "checkpoint": run_checkpointed,
+    "incremental": run_incremental,
+    "batch": run_batch,
+    "snapshots": run_snapshots,
+    "trace": run_traced,
+}
+
+
+def compare_results(expected: dict, result: dict) -> str:
+    """Describe the first difference between two results, None when they are the same"""
+    for idx, (timing, other) in enumerate(zip(expected["timings"], result["timings"])):
+        if tuple(timing) != tuple(other):
+            return f"instruction {idx}: expected (issue, read, ex, write) {tuple(timing)}, got {tuple(other)}"
+    if len(expected["timings"]) != len(result["timings"]):
+        return f"expected {len(expected['timings'])} instructions, got {len(result['timings'])}"
+    if expected["total_cycles"] != result["total_cycles"]:
+        return (
+            f"expected {expected['total_cycles']} cycles, got {result['total_cycles']}"
+        )
+    return None
+
+
+def check_case(case: Case, mode) -> str:
+    """Run a mode on a case, get the difference with the reference or the error it raised, None when it matches or doesn't apply"""
+    program = Program.from_lines(case.lines())
+    config = program.default_config("cycle", case.issue_width)
+    try:
+        result = mode(program, config)
+    except Exception as error:
+        return f"{type(error).__name__}: {error}"
+    if result is None:
+        return None
+    return compare_results(run_reference(program, config), result)
+
+
+def shrink_case(case: Case, mode) -> Case:
+    """Make a failing case as small as possible while the mode still fails on it.
+
+    Runs of instructions are removed, from half of the program down to single
+    instructions, then the issue width and the F.U. config are simplified one
+    value at a time.
+    """
+    instructions = list(case.instructions)
+    chunk = max(1, len(instructions) // 2)
+    while True:
+        start = 0
+        while start < len(instructions) and len(instructions) > 1:
+            candidate = instructions[:start] + instructions[start + chunk :]
+            if candidate and check_case(case._replace(instructions=candidate), mode):
+                instructions = candidate
+            else:
+                start += chunk
+        if chunk == 1:
+            break
+        chunk //= 2
+    case = case._replace(instructions=instructions)
+
+    def simpler_configs(functional_units: dict):
+        for fu, config in functional_units.items():
+            simpler = []
+            if "initiation_interval" in config:
+                simpler.append(
+                    {"n_units": config["n_units"], "n_cycles": config["n_cycles"]}
+                )
+            for key in ["n_units", "n_cycles"]:
+                if config[key] > 1:
+                    simpler.append(dict(config, **{key: 1}))
+                    simpler.append(dict(config, **{key: config[key] - 1}))
+            for fu_config in simpler:
+                yield dict(functional_units, **{fu: fu_config})
+
+    changed = True
+    while changed:
+        changed = False
+        candidates = list(simpler_configs(case.functional_units))
+        if case.issue_width > 1:
+            candidates.insert(0, case.issue_width - 1)
+        for candidate in candidates:
+            if isinstance(candidate, int):
+                simpler_case = case._replace(issue_width=candidate)
+            else:
+                simpler_case = case._replace(functional_units=candidate)
+            if check_case(simpler_case, mode):
+                case = simpler_case
+                changed = True
+                break
+    return case
+
+
+def run_differential(
+    n_cases: int = 100,
+    seed: int = 0,
+    max_instructions: int = DEFAULT_MAX_INSTRUCTIONS,
+    modes: dict = None,
+    shrink: bool = True,
+) -> dict:
+    """Run random cases through the reference loop and every mode, comparing the cycles of every stage.
+
+    The report has the number of cases each mode ran on, the time taken by each
+    mode and by the reference on those cases, the speedup of each mode over the
+    reference and the failures. A failure has the mode, the first difference
+    and the case, shrunk to a minimal reproducer unless shrink is False.
+    """
+    modes = modes if modes is not None else MODES
+    rng = random.Random(seed)
+    report = {
+        "n_cases": n_cases,
+        "runs": {name: 0 for name in modes},
+        "times": {name: 0.0 for name in modes},
+        "reference_times": {name: 0.0 for name in modes},
+        "failures": [],
+    }
+    for _ in range(n_cases):
+        case = generate_case(rng, max_instructions)
+        program = Program.from_lines(case.lines())
+        config = program.default_config("cycle", case.issue_width)
+        start = time.perf_counter()
+        expected = run_reference(program, config)
+        reference_time = time.perf_counter() - start
+        for name, mode in modes.items():
+            start = time.perf_counter()
+            try:
+                result = mode(program, config)
+            except Exception as error:
+                result = error
+            elapsed = time.perf_counter() - start
+            if result is None:
+                continue
+            report["runs"][name] += 1
+            report["times"][name] += elapsed
+            report["reference_times"][name] += reference_time
+            if isinstance(result, Exception):
+                difference = f"{type(result).__name__}: {result}"
+            else:
+                difference = compare_results(expected, result)
+            if difference is None:
+                continue
+            failing = case
+            if shrink:
+                failing = shrink_case(case, mode)
+                difference = check_case(failing, mode)
+            report["failures"].append(
+                {"mode": name, "difference": difference, "case": failing}
+            )
+    report["speedups"] = {
+        name: report["reference_times"][name] / report["times"][name]
+        for name in modes
+        if report["times"][name]
+    }
+    return report
+
+
+def build_differential_table(report: dict) -> str:
+    """Build a table with the cases, failures and speedup over the reference of every mode"""
+    rows = []
+    for name, runs in report["runs"].items():
+        failures = sum(1 for failure in report["failures"] if failure["mode"] == name)
+        speedup = report["speedups"].get(name)
+        rows.append(
+            [
+                name,
+                runs,
+                failures,
+                f"{report['times'][name]:.4f}",
+                None if speedup is None else f"{speedup:.2f}x",
+            ]
+        )
+    return build_table(rows, ["mode", "cases", "failures", "time (s)", "speedup"])
+
+
+def format_failure(failure: dict) -> str:
+    """Describe a failure with the lines of its case, that can be simulated again with the printed issue width"""
+    case = failure["case"]
+    return "\n".join(
+        [
+            f"{failure['mode']} with issue width {case.issue_width}: {failure['difference']}",
+            *case.lines(),
+        ]
+    )
@@ -0,0 +1,60 @@
+import csv
+import os
+
+from .render import STAGES
+
+# Cycle stored for a stage that didn't happen yet
+MISSING_CYCLE = -1
+
+EXPORT_FORMATS = [".npz", ".npy", ".csv"]
+
+
+def timings_to_array(timings: list):
+    """Build an int64 (n_instructions, 4) array from (issue, read, ex, write) tuples.
+
+    The array is in Fortran order, so every stage column is contiguous, and the
+    stages that didn't happen are MISSING_CYCLE.
+    """
+    import numpy as np
+
+    rows = [
+        [MISSING_CYCLE if cycle is None else cycle for cycle in timing]
+        for timing in timings
+    ]
+    array = np.array(rows, dtype=np.int64, order="F").reshape(len(timings), len(STAGES))
+    return array
+
+
+def export_timings(path: os.path, labels: list, timings: list) -> None:
+    """Write the cycles of every instruction to path, the format comes from its extension.
+
+    .npz has one contiguous int64 array per stage plus the instruction labels,
+    .npy has the (n_instructions, 4) array, that can be opened with
+    numpy.load(path, mmap_mode="r"), and .csv has one row per instruction.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Unknown export format '{extension}', expected one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    if extension == ".csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["instruction"] + STAGES)
+            for label, timing in zip(labels, timings):
+                writer.writerow(
+                    [label]
+                    + [MISSING_CYCLE if cycle is None else cycle for cycle in timing]
+                )
+        return
+
+    import numpy as np
+
+    array = timings_to_array(timings)
+    if extension == ".npy":
+        np.save(path, array)
+        return
+    columns = {
+        stage: np.ascontiguousarray(array[:, i]) for i, stage in enumerate(STAGES)
+    }
+    np.savez(path, instruction=np.array(labels, dtype=str), **columns)
@@ -0,0 +1,184 @@
+import bisect
+import heapq
+import pickle
+
+from .isa import ISA
+from .scoreboarding import ScoreboardingSIM
+from .session import MachineConfig, Program
+from .steady_state import instruction_signature
+
+# Issues between two snapshots, a resumed simulation starts at most this many
+# issues before the edit. A snapshot takes around a kilobyte
+DEFAULT_SNAPSHOT_INTERVAL = 16
+
+# Everything process_cycle reads between two cycles besides the instruction
+# table, the flags and per cycle lists are always reset at a cycle start
+SNAPSHOT_STATE = [
+    "functional_unit_table",
+    "register_table",
+    "waiting_operands",
+    "pending_readers",
+    "next_issue",
+    "n_finished",
+]
+
+
+class RecordingSIM(ScoreboardingSIM):
+    """Simulator that snapshots its state every time the first issue candidate reaches or passes a multiple of snapshot_interval.
+
+    Before an instruction becomes one of the issue candidates nothing looks at
+    it, so the state at the start of that cycle only depends on the
+    instructions before it. A snapshot only holds the frontier of the simulation, the F.U.s,
+    registers and instructions in flight, the instructions already written are
+    the same in the final instruction table.
+    """
+
+    def __init__(
+        self,
+        engine: str,
+        snapshot_interval: int,
+        isa: ISA = None,
+        issue_width: int = 1,
+    ) -> None:
+        super().__init__([], False, engine, isa=isa, issue_width=issue_width)
+        self.snapshot_interval = snapshot_interval
+        self.snapshots = {}
+        self.last_boundary = 0
+
+    def process_cycle(self, cycle: int) -> None:
+        """Run the cycle, taking a snapshot if the issue candidate moved to or past a snapshot boundary"""
+        super().process_cycle(cycle)
+        interval = self.snapshot_interval
+        if self.next_issue // interval != self.last_boundary // interval:
+            self.snapshots[self.next_issue] = self.take_snapshot(cycle + 1)
+        self.last_boundary = self.next_issue
+
+    def take_snapshot(self, cycle: int) -> bytes:
+        """Get the state at the start of cycle as a compact blob"""
+        state = {name: getattr(self, name) for name in SNAPSHOT_STATE}
+        state["cycle"] = cycle
+        # Completions already passed are never looked at again
+        state["pending_events"] = [t for t in self.pending_events if t >= cycle]
+        state["in_flight"] = [
+            (instruction.idx, self.instruction_table[instruction.idx])
+            for instruction in self.in_flight
+        ]
+        # Snapshots are small and taken often, compressing them costs more than
+        # the simulation of the cycle, unlike checkpoints
+        return pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+
+    def restore_snapshot(self, data: bytes, written: list) -> None:
+        """Load a snapshot into the loaded program, written is the final instruction table of the run it was taken in"""
+        self.build_status()
+        self.start_pipeline()
+        state = pickle.loads(data)
+        in_flight = state.pop("in_flight")
+        for name, value in state.items():
+            setattr(self, name, value)
+        heapq.heapify(self.pending_events)
+        # Instructions written before the snapshot didn't change since then
+        self.instruction_table[: self.next_issue] = written[: self.next_issue]
+        for idx, status in in_flight:
+            self.instruction_table[idx] = status
+        self.in_flight = [self.instruction_order[idx] for idx, _ in in_flight]
+        self.last_boundary = self.next_issue
+
+
+class IncrementalSimulator:
+    """Re-simulate edited versions of a program, only from the first cycle the edit can change.
+
+    The base program is simulated once, keeping a snapshot every
+    snapshot_interval issues. An edited program shares the instructions
+    before its first changed one with the base, so its simulation resumes from
+    the last snapshot taken before that instruction became the issue candidate
+    and only the suffix is simulated again. The results are the same as a full
+    simulation with session.simulate.
+    """
+
+    def __init__(
+        self,
+        program: Program,
+        config: MachineConfig = None,
+        snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+    ) -> None:
+        if snapshot_interval < 1:
+            raise ValueError(
+                f"The snapshot interval must be at least 1, got {snapshot_interval}"
+            )
+        self.config = config or program.default_config()
+        self.snapshot_interval = snapshot_interval
+        self.resumed_cycle = 1
+        sim = self.build_sim(program)
+        sim.run()
+        self.commit(program, sim, {})
+
+    def build_sim(self, program: Program) -> RecordingSIM:
+        """Get a simulator with the program loaded"""
+        sim = RecordingSIM(
+            self.config.engine,
+            self.snapshot_interval,
+            program.isa,
+            self.config.issue_width,
+        )
+        sim.load_program(
+            self.config.functional_units,
+            program.instructions_to_execute,
+            program.raw_instructions,
+        )
+        return sim
+
+    def commit(self, program: Program, sim: RecordingSIM, snapshots: dict) -> None:
+        """Make a simulated program the base, snapshots are the ones still valid from the previous base"""
+        self.program = program
+        self.signatures = [instruction_signature(i) for i in sim.instruction_order]
+        self.instruction_table = sim.instruction_table
+        self.snapshots = {**snapshots, **sim.snapshots}
+        self.result = sim.get_result()
+
+    def first_change(self, program: Program) -> int:
+        """Get the id of the first instruction of program that isn't the same in the base program"""
+        signatures = self.signatures
+        for idx, instruction in enumerate(program.instructions_to_execute.values()):
+            if idx == len(signatures) or instruction_signature(instruction) != (
+                signatures[idx]
+            ):
+                return idx
+        return len(program)
+
+    def simulate(self, program: Program, commit: bool = False) -> dict:
+        """Simulate an edited version of the base program, in the same format as session.simulate.
+
+        With commit the edited program becomes the new base, so later edits are
+        compared against it.
+        """
+        first = self.first_change(program)
+        if first == len(program) == len(self.signatures):
+            self.resumed_cycle = self.result["total_cycles"] + 1
+            return self.result  # Nothing changed
+        # The changed instruction is looked at once it is the last of the issue
+        # candidates, snapshots are sorted since they are taken in issue order
+        boundaries = list(self.snapshots)
+        limit = first - self.config.issue_width + 1
+        position = bisect.bisect_right(boundaries, limit)
+        boundary = boundaries[position - 1] if position and limit > 0 else 0
+        self.resumed_cycle = self.cycle_of(boundary)
+        sim = self.build_sim(program)
+        if boundary:
+            sim.restore_snapshot(self.snapshots[boundary], self.instruction_table)
+            sim.resume()
+        else:
+            sim.run()
+        if commit:
+            self.commit(
+                program,
+                sim,
+                {b: s for b, s in self.snapshots.items() if b <= boundary},
+            )
+            return self.result
+        return sim.get_result()
+
+    def cycle_of(self, boundary: int) -> int:
+        """Get the cycle a simulation resuming from the snapshot of boundary starts at"""
+        if not boundary:
+            return 1
+        return self.instruction_table[boundary - 1].issue + 1
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+from typing import NamedTuple
+
+# Roles an opcode can give to its operands, src1 is required since every
+# instruction reads at least one register. An imm operand isn't a register and
+# is left out of the scoreboard
+OPERAND_ROLES = ["dest", "src1", "src2", "imm"]
+
+# The instruction set the simulator was written for, loads and stores take a
+# displacement(register) operand, only the register is used
+DEFAULT_ISA_DESCRIPTION = {
+    "register_files": {
+        "int": {"prefix": "x", "count": 32},
+        "float": {"prefix": "f", "count": 32},
+    },
+    "functional_units": ["int", "mult", "add", "div"],
+    "opcodes": {
+        "ild": {"fu": "int", "operands": ["dest", "src1"]},
+        "fld": {"fu": "int", "operands": ["dest", "src1"]},
+        "isw": {"fu": "int", "operands": ["src1", "src2"]},
+        "fsd": {"fu": "int", "operands": ["src1", "src2"]},
+        "isub": {"fu": "int", "operands": ["dest", "src1", "src2"]},
+        "fsub": {"fu": "add", "operands": ["dest", "src1", "src2"]},
+        "iadd": {"fu": "int", "operands": ["dest", "src1", "src2"]},
+        "fadd": {"fu": "add", "operands": ["dest", "src1", "src2"]},
+        "fmul": {"fu": "mult", "operands": ["dest", "src1", "src2"]},
+        "fdiv": {"fu": "div", "operands": ["dest", "src1", "src2"]},
+    },
+}
+
+
+class OpcodeInfo(NamedTuple):
+    """Everything the parser needs to know about an opcode, resolved once when the ISA is loaded"""
+
+    fu: str
+    n_operands: int
+    dest: int  # Field of the operand of each role, None when there is none
+    src1: int
+    src2: int
+    latency: int  # None takes the n_cycles of the F.U.
+
+
+class ISA:
+    """An instruction set compiled into the lookup tables used by the parser and the simulator.
+
+    The description is a dict, or a JSON file, with the register files (a
+    prefix and a number of registers each, the register ids follow the order of
+    the files), the F.U. classes and the opcodes. Each opcode has its F.U.
+    class, the role of each of its operands in order ("dest", "src1", "src2" or
+    "imm") and an optional latency used instead of the n_cycles of the F.U.
+    """
+
+    def __init__(self, description: dict) -> None:
+        self.description = description
+        self.register_names = []
+        for name, register_file in description["register_files"].items():
+            if register_file["count"] < 1:
+                raise ValueError(f"The '{name}' register file has no registers")
+            self.register_names += [
+                register_file["prefix"] + str(i) for i in range(register_file["count"])
+            ]
+        self.register_ids = {name: idx for idx, name in enumerate(self.register_names)}
+        if len(self.register_ids) != len(self.register_names):
+            raise ValueError("Two register files give the same register name")
+        self.reg_prefixes = {
+            name: register_file["prefix"]
+            for name, register_file in description["register_files"].items()
+        }
+        self.functional_units = list(description["functional_units"])
+        self.opcodes = {
+            op: self.compile_opcode(op, opcode)
+            for op, opcode in description["opcodes"].items()
+        }
+        self.opcode_map = {op: info.fu for op, info in self.opcodes.items()}
+
+    def compile_opcode(self, op: str, opcode: dict) -> OpcodeInfo:
+        """Check the description of an opcode and turn its operand roles into positions"""
+        if opcode["fu"] not in self.functional_units:
+            raise ValueError(f"Unknown F.U. '{opcode['fu']}' for the opcode '{op}'")
+        roles = opcode["operands"]
+        for role in roles:
+            if role not in OPERAND_ROLES:
+                raise ValueError(
+                    f"Unknown operand role '{role}' for the opcode '{op}', expected one of: {', '.join(OPERAND_ROLES)}"
+                )
+        registers = [role for role in roles if role != "imm"]
+        if len(set(registers)) != len(registers) or "src1" not in registers:
+            raise ValueError(
+                f"The opcode '{op}' must read src1 and have each register role once, got {roles}"
+            )
+        latency = opcode.get("latency")
+        if latency is not None and latency < 1:
+            raise ValueError(f"The latency of '{op}' must be at least 1, got {latency}")
+        # The opcode is the first field
+        positions = {role: roles.index(role) + 1 for role in registers}
+        return OpcodeInfo(
+            opcode["fu"],
+            len(roles),
+            positions.get("dest"),
+            positions["src1"],
+            positions.get("src2"),
+            latency,
+        )
+
+    @classmethod
+    def from_file(cls, path: os.path) -> "ISA":
+        """Load the description of an ISA from a JSON file"""
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def digest(self) -> str:
+        """Content hash of the description"""
+        data = json.dumps(self.description, sort_keys=True)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+
+DEFAULT_ISA = ISA(DEFAULT_ISA_DESCRIPTION)
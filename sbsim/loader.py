@@ -0,0 +1,160 @@
+import contextlib
+import gc
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .isa import DEFAULT_ISA, ISA
+from .scoreboarding import Instruction, ScoreboardingSIM
+
+# Bytes of a file tokenized at once, large files are split in chunks of about
+# this size at line boundaries
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Below this many bytes in total the files are tokenized in the calling process,
+# starting the workers would take longer
+PARALLEL_THRESHOLD = 16 * 1024 * 1024
+
+# Parser of the worker process, built once when the worker starts
+_worker_sim = None
+
+
+@contextlib.contextmanager
+def paused_gc():
+    """Turn the cyclic garbage collector off in the block.
+
+    Tokenizing allocates millions of lists that are never part of a cycle, and
+    the collections triggered by them take several times longer than the
+    tokenizing itself.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def split_file(path: os.path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> list[tuple]:
+    """Get the (path, start, end) byte ranges of the chunks of a file, each one ending after a newline or at the end of the file"""
+    size = os.path.getsize(path)
+    if not size:
+        return []
+    chunks = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = mm.find(b"\n", min(start + chunk_size, size) - 1) + 1
+            if not end or end > size:
+                end = size
+            chunks.append((path, start, end))
+            start = end
+    return chunks
+
+
+def read_chunk(path: os.path, start: int, end: int) -> str:
+    """Read a byte range of a file through a memory map, decoded"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm[start:end].decode()
+
+
+def tokenize_chunk(sim: ScoreboardingSIM, chunk: tuple) -> tuple[list, list]:
+    """Parse the lines of a chunk into the (fu, config) pairs of the F.U. lines and the instructions, in order.
+
+    The whole chunk is lowercased and split at once, like get_inputed_files_data
+    and parse_file do line by line, lines that are neither are skipped. The
+    instructions are (op, fu, dest, src1, src2, fields, latency) tuples, their
+    ids and labels depend on the chunks before and are given by merge_chunks.
+    """
+    text = read_chunk(*chunk).lower().replace(",", " ")
+    functional_units = sim.isa.functional_units
+    opcodes = sim.isa.opcodes
+    register_ids = sim.register_ids
+    configs = []
+    instructions = []
+    with paused_gc():
+        for line in text.splitlines():
+            fields = line.split()
+            if not fields:
+                continue
+            op = fields[0]
+            info = opcodes.get(op)
+            if info is None:
+                if op in functional_units:
+                    configs.append((op, sim.parse_functional_unit(fields)))
+                continue
+            if len(fields) - 1 != info.n_operands:
+                # Let parse_instruction raise the same error as parse_file
+                sim.parse_instruction(fields, 0, {})
+            # Plain registers are looked up directly, get_register_id handles
+            # the displacements and raises on unknown registers
+            registers = [
+                None
+                if position is None
+                else register_ids.get(fields[position])
+                or sim.get_register_id(fields, position)
+                for position in (info.dest, info.src1, info.src2)
+            ]
+            instructions.append((op, info.fu, *registers, fields, info.latency))
+    return configs, instructions
+
+
+def _init_worker(isa: ISA) -> None:
+    """Build the parser of the worker once, with the ISA of the files"""
+    global _worker_sim
+    _worker_sim = ScoreboardingSIM([], False, isa=isa)
+
+
+def _tokenize_in_worker(chunk: tuple) -> tuple[list, list]:
+    return tokenize_chunk(_worker_sim, chunk)
+
+
+def load_files(
+    file_paths: list[os.path],
+    isa: ISA = None,
+    n_workers: int = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> tuple[dict, dict, list]:
+    """Read and parse the files of a program, the same as parse_file(get_inputed_files_data()) but faster on large files.
+
+    The files are memory mapped and split in chunks at line boundaries. When
+    they hold more than PARALLEL_THRESHOLD bytes and there is more than one
+    worker, the chunks are tokenized and parsed in a process pool, one worker
+    per CPU by default. The F.U. lines and instructions of the chunks are then
+    merged in file order, giving the instructions their program ids and
+    labels.
+    """
+    isa = isa or DEFAULT_ISA
+    chunks = [chunk for path in file_paths for chunk in split_file(path, chunk_size)]
+    total_size = sum(end - start for _, start, end in chunks)
+    n_workers = n_workers or os.cpu_count()
+    if n_workers == 1 or len(chunks) < 2 or total_size < PARALLEL_THRESHOLD:
+        sim = ScoreboardingSIM([], False, isa=isa)
+        results = (tokenize_chunk(sim, chunk) for chunk in chunks)
+        return merge_chunks(results)
+    with ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker, initargs=(isa,)
+    ) as executor:
+        return merge_chunks(executor.map(_tokenize_in_worker, chunks))
+
+
+def merge_chunks(results) -> tuple[dict, dict, list]:
+    """Merge the tokenized chunks, in order, into the F.U. config, instructions and raw instructions of parse_file"""
+    functional_units_config = {}
+    instructions_to_execute = {}
+    raw_instructions = []
+    opcode_counter = {}
+    with paused_gc():
+        for configs, instructions in results:
+            for fu, config in configs:
+                functional_units_config[fu] = config
+            for row in instructions:
+                op = row[0]
+                opcode_counter[op] = opcode_counter.get(op, 0) + 1
+                label = op + "_" + str(opcode_counter[op])
+                instructions_to_execute[label] = Instruction._make(
+                    (len(raw_instructions), label, *row)
+                )
+                raw_instructions.append(row[5])
+    return functional_units_config, instructions_to_execute, raw_instructions
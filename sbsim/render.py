@@ -0,0 +1,36 @@
+from typing import TextIO
+
+STAGES = ["issue", "read", "ex", "write"]
+
+HEADERS = ["instruction"] + STAGES
+
+
+def build_table(rows: list, headers: list = HEADERS) -> str:
+    """Build an aligned text table from the rows, tabulate is only imported when a table is built"""
+    from tabulate import tabulate
+
+    return tabulate(rows, headers=headers)
+
+
+class RowWriter:
+    """Lightweight formatter that writes each row as soon as it is given, with fixed width columns"""
+
+    ROW_FORMAT = "{:<24}{:>8}{:>8}{:>8}{:>8}\n"
+
+    def __init__(self, output: TextIO) -> None:
+        self.output = output
+
+    def write_header(self) -> None:
+        """Write the name of every column"""
+        self.output.write(self.ROW_FORMAT.format(*HEADERS))
+
+    def write_row(self, instruction: str, timings: tuple) -> None:
+        """Write the (issue, read, ex, write) cycles of an instruction"""
+        self.output.write(self.ROW_FORMAT.format(instruction, *map(str, timings)))
+
+    def write_cycle(self, cycle: int, rows: list) -> None:
+        """Write the snapshot of a cycle, the rows of the instructions that did something in it"""
+        self.output.write(f"\ncycle {cycle}\n")
+        self.write_header()
+        for instruction, timings in rows:
+            self.write_row(instruction, timings)
@@ -0,0 +1,184 @@
+import math
+import random
+import statistics
+
+from .render import build_table
+from .session import MachineConfig, Program, simulate
+
+# Instructions of each interval the program is split in
+DEFAULT_INTERVAL = 1000
+
+# Intervals simulated in detail, besides the last one
+DEFAULT_N_SAMPLES = 30
+
+# Instructions simulated in detail before a sample to warm the F.U. and
+# register tables up, their cycles are not measured
+DEFAULT_WARMUP = 200
+
+DEFAULT_CONFIDENCE = 0.95
+
+
+def slice_program(
+    program: Program, start: int, end: int, instructions: list = None
+) -> Program:
+    """Get the instructions from start to end of a program as a program of their own, with ids counted from 0.
+
+    instructions is the list of the instructions of the program, so it is not
+    built again for every slice.
+    """
+    if instructions is None:
+        instructions = list(program.instructions_to_execute.values())
+    return Program(
+        {
+            instruction.label: instruction._replace(idx=idx)
+            for idx, instruction in enumerate(instructions[start:end])
+        },
+        program.raw_instructions[start:end],
+        program.functional_units_config,
+        program.isa,
+    )
+
+
+def select_intervals(n_intervals: int, n_samples: int, seed: int = 0) -> list[int]:
+    """Pick n_samples of the intervals systematically, evenly spaced from a random offset, or all of them when there are fewer"""
+    if n_samples >= n_intervals:
+        return list(range(n_intervals))
+    step = n_intervals / n_samples
+    offset = random.Random(seed).random() * step
+    return [int(offset + i * step) for i in range(n_samples)]
+
+
+def get_warmup_starts(
+    functional_units_config: dict,
+    instructions: list,
+    starts: list[int],
+    warmup: int = DEFAULT_WARMUP,
+) -> list[int]:
+    """Get the first instruction of the warm-up of each sample, fast forwarding over the program in a single sweep.
+
+    Only the last producer of every register is kept while fast forwarding. A
+    warm-up starts warmup instructions before its sample, or earlier at the
+    last producer of a register read in the first warmup instructions of the
+    sample when its latency is longer than the instructions between them, as
+    it may still be executing when the sample starts.
+    """
+    last_producer = {}  # Register -> its last writer
+    warmup_starts = []
+    idx = 0
+    for start in starts:
+        for instruction in instructions[idx:start]:
+            if instruction.dest is not None:
+                last_producer[instruction.dest] = instruction
+        idx = max(idx, start)
+        warmup_start = max(start - warmup, 0)
+        for instruction in instructions[start : start + warmup]:
+            for reg in (instruction.src1, instruction.src2):
+                producer = last_producer.get(reg)
+                if producer is None or producer.idx >= warmup_start:
+                    continue
+                latency = (
+                    producer.latency or functional_units_config[producer.fu]["n_cycles"]
+                )
+                if start - producer.idx < latency:
+                    warmup_start = producer.idx
+        warmup_starts.append(warmup_start)
+    return warmup_starts
+
+
+def sample(
+    program: Program,
+    config: MachineConfig = None,
+    interval: int = DEFAULT_INTERVAL,
+    n_samples: int = DEFAULT_N_SAMPLES,
+    warmup: int = DEFAULT_WARMUP,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = 0,
+) -> dict:
+    """Estimate the total cycles and CPI of a program simulating only some of its intervals in detail.
+
+    The program is split in intervals of interval instructions and n_samples
+    of them, besides the last one, are picked systematically. Each one is
+    simulated in detail after its warm-up (see get_warmup_starts), and takes
+    the cycles from its first issue to the first issue of the next interval.
+    The last interval, with the drain of the pipeline, takes the cycles from
+    its first issue to the end. The total cycles are the cycles of the last
+    interval plus the mean of the samples times the other intervals, with a
+    normal confidence interval of the sampling error, that is 0 when every
+    interval is a sample. The error of a warm-up too short to rebuild the
+    state is not part of it.
+    """
+    if interval < 1:
+        raise ValueError(
+            f"The interval must have at least one instruction, got {interval}"
+        )
+    if n_samples < 1:
+        raise ValueError(f"At least one interval must be sampled, got {n_samples}")
+    config = config or program.default_config()
+    n_instructions = len(program)
+    n_intervals = max(math.ceil(n_instructions / interval), 1)
+    last = (n_intervals - 1) * interval
+    sampled = select_intervals(n_intervals - 1, n_samples, seed)
+    starts = [i * interval for i in sampled] + [last]
+    instructions = list(program.instructions_to_execute.values())
+    warmup_starts = get_warmup_starts(
+        config.functional_units, instructions, starts, warmup
+    )
+
+    interval_cycles = []
+    detailed_instructions = 0
+    for start, warmup_start in zip(starts, warmup_starts):
+        # A sample runs until the first instruction of the next interval issues
+        end = min(start + interval + 1, n_instructions)
+        result = simulate(
+            slice_program(program, warmup_start, end, instructions), config
+        )
+        detailed_instructions += end - warmup_start
+        first_issue = result["timings"][start - warmup_start][0] if end else 1
+        if start == last:
+            last_cycles = result["total_cycles"] - first_issue + 1
+        else:
+            interval_cycles.append(result["timings"][-1][0] - first_issue)
+
+    n_other = n_intervals - 1
+    mean = statistics.fmean(interval_cycles) if interval_cycles else 0.0
+    if len(interval_cycles) == n_other:
+        half_width = 0.0
+    elif len(interval_cycles) < 2:
+        half_width = math.inf
+    else:
+        z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        error = statistics.stdev(interval_cycles) / math.sqrt(len(interval_cycles))
+        # Finite population correction, the intervals are sampled without
+        # replacement
+        half_width = z * error * math.sqrt(1 - len(interval_cycles) / n_other)
+    total_cycles = last_cycles + n_other * mean
+    cycles_interval = (
+        total_cycles - n_other * half_width,
+        total_cycles + n_other * half_width,
+    )
+    n = max(n_instructions, 1)
+    return {
+        "config": config.functional_units,
+        "n_instructions": n_instructions,
+        "n_intervals": n_intervals,
+        "sampled_intervals": sampled + [n_intervals - 1],
+        "detailed_instructions": detailed_instructions,
+        "confidence": confidence,
+        "total_cycles": total_cycles,
+        "cycles_interval": cycles_interval,
+        "cpi": total_cycles / n,
+        "cpi_interval": (cycles_interval[0] / n, cycles_interval[1] / n),
+        "interval_cycles": interval_cycles,
+    }
+
+
+def build_sampling_table(estimate: dict) -> str:
+    """Build a table with the estimated total cycles and CPI and their confidence interval"""
+    rows = [
+        ["total cycles", estimate["total_cycles"], *estimate["cycles_interval"]],
+        ["CPI", estimate["cpi"], *estimate["cpi_interval"]],
+    ]
+    confidence = f"{estimate['confidence']:.0%}"
+    return build_table(
+        rows, ["", "estimate", f"{confidence} low", f"{confidence} high"]
+    )
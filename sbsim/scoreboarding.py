@@ -1,44 +1,273 @@
+import heapq
 import os
-
-import pandas as pd
-from tabulate import tabulate
+import sys
+from typing import NamedTuple
+
+from . import checkpoint
+from .export import export_timings, timings_to_array
+from .isa import DEFAULT_ISA, ISA
+from .render import RowWriter, build_table
+from .stats import SimulationStats
+
+
+class Instruction(NamedTuple):
+    """A parsed instruction, with everything the stages need resolved once at parse time"""
+
+    idx: int
+    label: str
+    op: str
+    fu: str
+    dest: int
+    src1: int
+    src2: int
+    fields: list
+    latency: int = None  # None executes for the n_cycles of the F.U.
+
+
+class Pipeline:
+    """Execution pipeline shared by the slots of a pipelined F.U., it starts a new instruction every initiation_interval cycles"""
+
+    __slots__ = ["initiation_interval", "next_start"]
+
+    def __init__(self, initiation_interval: int) -> None:
+        self.initiation_interval = initiation_interval
+        self.next_start = 0  # First cycle a new instruction can execute in
+
+
+class FunctionalUnit:
+    """State of a single F.U., one row of the functional unit table.
+
+    A pipelined F.U. has one row per instruction it can hold at once, all of
+    them sharing the same Pipeline.
+    """
+
+    __slots__ = [
+        "busy",
+        "op",
+        "fi",
+        "fj",
+        "fk",
+        "qj",
+        "qk",
+        "rj",
+        "rk",
+        "reserved_by",
+        "n_cycles",
+        "latency",
+        "done_cycles",
+        "finished",
+        "pipeline",
+    ]
+
+    def __init__(self, n_cycles: int, pipeline: Pipeline = None) -> None:
+        self.n_cycles = n_cycles
+        self.pipeline = pipeline
+        self.reset()
+
+    def reset(self) -> None:
+        """Put the F.U. back to its default state, used when the instruction using it is written"""
+        self.busy = None
+        self.op = None
+        self.fi = None
+        self.fj = None
+        self.fk = None
+        self.qj = None
+        self.qk = None
+        self.rj = None
+        self.rk = None
+        self.reserved_by = None
+        self.latency = None
+        self.done_cycles = 0
+        self.finished = None
+
+    def as_dict(self) -> dict:
+        """Get the F.U. as a dict with one key per column"""
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+class InstructionStatus:
+    """Stage cycles and states of a single instruction, one row of the instruction table"""
+
+    __slots__ = [
+        "issue",
+        "read",
+        "ex",
+        "write",
+        "processed",
+        "finished",
+        "issue_state",
+        "read_state",
+        "ex_state",
+        "write_state",
+        "unit",
+    ]
+
+    def __init__(self) -> None:
+        self.issue = None
+        self.read = None
+        self.ex = None
+        self.write = None
+        self.processed = None
+        self.finished = None
+        self.issue_state = None
+        self.read_state = None
+        self.ex_state = None
+        self.write_state = None
+        self.unit = None
+
+    def as_dict(self) -> dict:
+        """Get the instruction status as a dict with one key per column"""
+        return {key: getattr(self, key) for key in self.__slots__}
 
 
 class ScoreboardingSIM:
 
-    FUNCTIONAL_UNITS = ["int", "mult", "add", "div"]
-
-    OPCODE_MAP = {
-        "ild": "int",
-        "fld": "int",
-        "isw": "int",
-        "fsd": "int",
-        "isub": "int",
-        "fsub": "add",
-        "iadd": "int",
-        "fadd": "add",
-        "fmul": "mult",
-        "fdiv": "div",
-    }
-
-    REG_PREFIXES = {"int": "x", "float": "f"}
-
-    def __init__(self, file_paths: list[os.path], print_each_stage: bool) -> None:
+    # Tables of the default ISA, a simulator built with another ISA uses the ones of self.isa
+    FUNCTIONAL_UNITS = DEFAULT_ISA.functional_units
+
+    OPCODE_MAP = DEFAULT_ISA.opcode_map
+
+    REG_PREFIXES = DEFAULT_ISA.reg_prefixes
+
+    ENGINES = ["cycle", "event"]
+
+    def __init__(
+        self,
+        file_paths: list[os.path],
+        print_each_stage: bool,
+        engine: str = "cycle",
+        stats: bool = False,
+        steady_state: bool = False,
+        isa: ISA = None,
+        issue_width: int = 1,
+    ) -> None:
+        if engine not in self.ENGINES:
+            raise ValueError(
+                f"Unknown engine '{engine}', expected one of: {', '.join(self.ENGINES)}"
+            )
+        if issue_width < 1:
+            raise ValueError(f"The issue width must be at least 1, got {issue_width}")
+        if stats and steady_state:
+            # The stalls of the skipped loop iterations are never seen by the stats
+            raise ValueError("The stats can't be collected with the steady state")
         self.files = file_paths
         self.print_each_stage = print_each_stage
+        self.engine = engine
+        self.issue_width = issue_width
+        self.stats = SimulationStats() if stats else None
+        self.steady_state = None
+        if steady_state:
+            from .steady_state import SteadyStateDetector
+
+            self.steady_state = SteadyStateDetector()
+        self.use_isa(isa or DEFAULT_ISA)
+
+    def use_isa(self, isa: ISA) -> None:
+        """Parse and simulate with the opcodes, F.U. classes and register files of an ISA"""
+        self.isa = isa
+        self.register_names = self.build_register_names()
+        self.register_ids = isa.register_ids
 
     def execute(self) -> None:
         """Method to execute the simulator"""
-        file_data = self.get_inputed_files_data()
-        (
-            self.functional_units_config,
-            self.instructions_to_execute,
-            self.raw_instructions,
-        ) = self.parse_file(file_data)
+        self.load_files()
+        self.run()
+        self.pretty_print(self.build_table_from_array())
+
+    def load_program(
+        self,
+        functional_units_config: dict,
+        instructions_to_execute: dict,
+        raw_instructions: list,
+    ) -> None:
+        """Load an already parsed program, so it can be simulated without reading the files again"""
+        self.functional_units_config = functional_units_config
+        self.instructions_to_execute = instructions_to_execute
+        self.raw_instructions = raw_instructions
+
+    def load_files(self, n_workers: int = None) -> None:
+        """Read, parse and load the inputed files, large files are memory mapped and parsed in n_workers processes"""
+        from .loader import load_files
+
+        self.load_program(*load_files(self.files, self.isa, n_workers))
+
+    def run(self, stop_cycle: int = None) -> None:
+        """Build the status tables and simulate the loaded program with the selected engine.
+
+        With stop_cycle the simulation pauses before processing that cycle, it
+        can then be checkpointed and continued with resume.
+        """
         self.build_status()
-        self.loop()
-        if not self.print_each_stage:
-            self.pretty_print(self.build_table_from_array())
+        if self.stats is not None:
+            self.stats.instrument(self)
+        if self.steady_state is not None:
+            self.steady_state.prepare(self)
+        self.start_pipeline()
+        self.resume(stop_cycle)
+
+    def resume(self, stop_cycle: int = None) -> None:
+        """Continue the simulation from the current cycle, until the end or until stop_cycle"""
+        if self.engine == "event":
+            self.run_events(stop_cycle)
+        else:
+            self.run_cycles(stop_cycle)
+
+    def checkpoint(self) -> bytes:
+        """Get the complete state of a paused simulation as a compact blob, see restore"""
+        return checkpoint.dump_state(
+            {name: getattr(self, name) for name in checkpoint.CHECKPOINT_STATE}
+        )
+
+    def restore(self, data: bytes) -> None:
+        """Load a checkpoint taken by checkpoint, resume then goes on exactly like the original run.
+
+        The program is part of the checkpoint, so this simulator doesn't need
+        to load one first. The stats, when enabled, only count from here on.
+        """
+        for name, value in checkpoint.load_state(data).items():
+            setattr(self, name, value)
+        self.use_isa(self.isa)
+        if self.stats is not None:
+            self.stats.instrument(self)
+        if self.steady_state is not None:
+            self.steady_state.prepare(self)
+
+    def save_checkpoint(self, path: os.path) -> None:
+        """Write the checkpoint of a paused simulation to a file"""
+        checkpoint.save_checkpoint(path, self.checkpoint())
+
+    def load_checkpoint(self, path: os.path) -> None:
+        """Restore a checkpoint written by save_checkpoint"""
+        self.restore(checkpoint.load_checkpoint(path))
+
+    def is_finished(self) -> bool:
+        """Check if the simulation ran to the end"""
+        return not self.check_if_pipeline_is_finished()
+
+    def get_timings(self) -> list:
+        """Get the (issue, read, ex, write) cycles of every instruction"""
+        return [
+            (status.issue, status.read, status.ex, status.write)
+            for status in self.instruction_table
+        ]
+
+    def get_result(self) -> dict:
+        """Get the F.U. config, the total number of cycles and the (issue, read, ex, write) cycles of every instruction of a finished run"""
+        return {
+            "config": self.functional_units_config,
+            "total_cycles": self.total_cycles,
+            "timings": self.get_timings(),
+        }
+
+    def get_timings_array(self):
+        """Get the cycles of every instruction as an int64 NumPy array with one column per stage, -1 for the stages not done"""
+        return timings_to_array(self.get_timings())
+
+    def export_timings(self, path: os.path) -> None:
+        """Write the cycles of every instruction to a .npz, .npy or .csv file"""
+        export_timings(
+            path, [i.label for i in self.instruction_order], self.get_timings()
+        )
 
     @staticmethod
     def pretty_print(print_word) -> None:
@@ -47,17 +276,10 @@ class ScoreboardingSIM:
         print(print_word)
 
     @staticmethod
-    def add_prefix_to_instructions(
-        instruction_now: str, current_instructions: dict
-    ) -> str:
-        """Add a prefix to every instruction to indentify different ones in the execution"""
-        start_idx = 1
-        prefix = "_"
-        for instruction in current_instructions.keys():
-            if instruction_now == instruction.split("_")[0]:
-                start_idx += 1
-        instruction_idx = instruction_now + prefix + str(start_idx)
-        return instruction_idx
+    def add_prefix_to_instructions(instruction_now: str, opcode_counter: dict) -> str:
+        """Add a prefix to every instruction to indentify different ones in the execution, counting the opcodes already seen"""
+        opcode_counter[instruction_now] = opcode_counter.get(instruction_now, 0) + 1
+        return instruction_now + "_" + str(opcode_counter[instruction_now])
 
     @staticmethod
     def remove_instruction_idx(instruction: str) -> str:
@@ -66,7 +288,13 @@ class ScoreboardingSIM:
 
     def get_fu_from_inst(self, instruction: str) -> str:
         """Get the functional unit for the given instruction"""
-        return self.OPCODE_MAP[self.remove_instruction_idx(instruction)]
+        return self.isa.opcode_map[self.remove_instruction_idx(instruction)]
+
+    def get_register_name(self, register: int) -> str:
+        """Get the name of a register from its id"""
+        if register is None:
+            return None
+        return self.register_names[register]
 
     def get_inputed_files_data(self) -> list:
         """Get the data in the inputed files and return a list with all information"""
@@ -80,36 +308,68 @@ class ScoreboardingSIM:
                     data.append(striped_line)
         return data
 
+    def parse_instruction(
+        self, fields: list, idx: int, opcode_counter: dict
+    ) -> Instruction:
+        """Resolve the opcode, F.U. and register ids of a single instruction, the role of each operand comes from the ISA"""
+        op = fields[0]
+        info = self.isa.opcodes[op]
+        if len(fields) - 1 != info.n_operands:
+            raise ValueError(
+                f"'{op}' takes {info.n_operands} operands, got {len(fields) - 1} in: {' '.join(fields)}"
+            )
+        return Instruction(
+            idx,
+            self.add_prefix_to_instructions(op, opcode_counter),
+            op,
+            info.fu,
+            None if info.dest is None else self.get_register_id(fields, info.dest),
+            self.get_register_id(fields, info.src1),
+            None if info.src2 is None else self.get_register_id(fields, info.src2),
+            fields,
+            info.latency,
+        )
+
+    def get_register_id(self, fields: list, position: int) -> int:
+        """Get the id of the register in a field of an instruction"""
+        reg = fields[position]
+        if "(" in reg:
+            reg = reg.split("(")[1].split(")")[
+                0
+            ]  # Get only the reg and dont care for the displacement
+        if reg not in self.register_ids:
+            raise ValueError(f"Unknown register '{reg}' in: {' '.join(fields)}")
+        return self.register_ids[reg]
+
+    @staticmethod
+    def parse_functional_unit(fields: list) -> dict:
+        """Parse a "fu n_units n_cycles [initiation_interval]" line, a F.U. with an initiation interval is pipelined"""
+        config = {"n_units": int(fields[1]), "n_cycles": int(fields[2])}
+        if len(fields) > 3:
+            config["initiation_interval"] = int(fields[3])
+        return config
+
     def parse_file(self, file_data: str) -> tuple[dict, dict, list]:
-        """Parse inputed information and build functional units and instructions config"""
+        """Parse inputed information and build functional units and instructions config.
+
+        Every instruction gets an integer id, its position in the program, and is
+        stored as an Instruction under its label, like "fadd_2".
+        """
         functional_units_config = {}
         instructions_to_execute = {}
         raw_instructions = []
+        opcode_counter = {}
         for info in file_data:
             fields = info.replace(",", " ").split()
-            if fields[0].lower() in self.FUNCTIONAL_UNITS:
-                functional_units_config[fields[0]] = {}
-                functional_units_config[fields[0]]["n_units"] = int(fields[1])
-                functional_units_config[fields[0]]["n_cycles"] = int(fields[2])
+            if fields[0].lower() in self.isa.functional_units:
+                functional_units_config[fields[0]] = self.parse_functional_unit(fields)
                 continue
-            elif fields[0].lower() in self.OPCODE_MAP:
+            elif fields[0].lower() in self.isa.opcodes:
                 raw_instructions.append(fields)
-                parsed_regs = []
-                for reg in fields[1:]:
-                    if "(" in reg:
-                        reg = reg.split("(")[1].split(")")[
-                            0
-                        ]  # Get only the reg and dont care for the displacement
-                    parsed_regs.append(reg)
-                instruction_with_index = self.add_prefix_to_instructions(
-                    fields[0], instructions_to_execute
+                instruction = self.parse_instruction(
+                    fields, len(instructions_to_execute), opcode_counter
                 )
-                instructions_to_execute[instruction_with_index] = parsed_regs
-                if len(instructions_to_execute[instruction_with_index]) == 2:
-                    if "sd" in instruction_with_index or "sw" in instruction_with_index:
-                        instructions_to_execute[instruction_with_index].insert(0, None)
-                    else:
-                        instructions_to_execute[instruction_with_index].append(None)
+                instructions_to_execute[instruction.label] = instruction
         return functional_units_config, instructions_to_execute, raw_instructions
 
     def build_status(self) -> None:
@@ -118,333 +378,489 @@ class ScoreboardingSIM:
         self.functional_unit_table = self.build_functional_unit_status()
         self.build_register_status()
 
-    def create_default_fus(self) -> dict:
-        """Create a default empy F.U. table, this is used to build the first table and also to reset a F.U. to default when it is finished"""
-        return_value = {}
-        functional_unit_elements = [
-            "busy",
-            "op",
-            "fi",
-            "fj",
-            "fk",
-            "qj",
-            "qk",
-            "rj",
-            "rk",
-            "reserved_by",
-            "n_cycles",
-            "done_cycles",
-            "finished",
-        ]
-        for i in functional_unit_elements:
-            return_value[i] = None
-        return return_value
-
     def build_instruction_status(self) -> None:
-        """Build instruction table based in the inputed instructions"""
-        self.instruction_table = {}
-        stages = [
-            "issue",
-            "read",
-            "ex",
-            "write",
-            "processed",
-            "finished",
-            "issue_state",
-            "read_state",
-            "ex_state",
-            "write_state",
-        ]
-        instructions = [i for i in self.instructions_to_execute.keys()]
-        for instruction in instructions:
-            self.instruction_table[instruction] = {}
-            for i in stages:
-                self.instruction_table[instruction][i] = None
+        """Build instruction table based in the inputed instructions, indexed by instruction id"""
+        self.instruction_order = [i for i in self.instructions_to_execute.values()]
+        self.instruction_table = [InstructionStatus() for i in self.instruction_order]
 
     def build_functional_unit_status(self) -> dict:
-        """Build functional unit table based in the inputed Functional Units"""
+        """Build functional unit table based in the inputed Functional Units.
+
+        A pipelined F.U. holds up to ceil(n_cycles / initiation_interval)
+        instructions, one row each, from their issue to their write.
+        """
         functional_unit_table = {}
-        for fu in self.functional_units_config.keys():
+        for fu, config in self.functional_units_config.items():
+            initiation_interval = config.get("initiation_interval")
+            if initiation_interval is None:
+                functional_unit_table[fu] = [
+                    FunctionalUnit(config["n_cycles"]) for i in range(config["n_units"])
+                ]
+                continue
+            if initiation_interval < 1:
+                raise ValueError(
+                    f"The initiation interval of '{fu}' must be at least 1, got {initiation_interval}"
+                )
+            depth = -(-config["n_cycles"] // initiation_interval)
             functional_unit_table[fu] = []
-            for i in range(self.functional_units_config[fu]["n_units"]):
-                functional_unit_table[fu].append(self.create_default_fus())
-                functional_unit_table[fu][i]["n_cycles"] = self.functional_units_config[
-                    fu
-                ]["n_cycles"]
-                functional_unit_table[fu][i]["done_cycles"] = 0
+            for i in range(config["n_units"]):
+                pipeline = Pipeline(initiation_interval)
+                functional_unit_table[fu] += [
+                    FunctionalUnit(config["n_cycles"], pipeline) for j in range(depth)
+                ]
         return functional_unit_table
 
-    def build_register_status(self, regr: int = 32, regf: int = 32) -> None:
-        """Build register table based in the inputed Functional Units"""
-        self.register_table = {}
-        for i in range(regr):
-            self.register_table[self.REG_PREFIXES["int"] + str(i)] = None
-        for i in range(regf):
-            self.register_table[self.REG_PREFIXES["float"] + str(i)] = None
+    def build_register_names(self) -> list:
+        """Build the name of every register of the register files of the ISA, the position in the list is the register id"""
+        return list(self.isa.register_names)
+
+    def build_register_status(self) -> None:
+        """Build register table, holding the id of the instruction that will write each register"""
+        self.register_table = [None] * len(self.register_names)
 
-    def issue_stage(self, cycle: int, instruction: str) -> None:
+    def issue_stage(self, cycle: int, instruction: Instruction) -> None:
         """Process the issue stage, making the needed check, basically the required F.U. mustn't be busy and the dest register must no be free (avoiding WAW hazard)"""
-        dest_register_idx = 0
-        source_register_1_idx = 1
-        source_register_2_idx = 2
-        dest_register = self.instructions_to_execute[instruction][dest_register_idx]
-        source_register_1 = self.instructions_to_execute[instruction][
-            source_register_1_idx
-        ]
-        source_register_2 = self.instructions_to_execute[instruction][
-            source_register_2_idx
-        ]
-        raw_functional_unit = self.get_fu_from_inst(instruction)
         if self.instruction_before_issue_state != "done":
             return
         if self.issue_done_flag:
             return
-        if self.instruction_table[instruction]["issue_state"] == "done":
+        status = self.instruction_table[instruction.idx]
+        if status.issue_state == "done":
             #  Issue already occured, skip this one
             return
-        if dest_register is not None:
-            if self.register_table[dest_register] is not None:
+        if instruction.dest is not None:
+            if self.register_table[instruction.dest] is not None:
                 #  Dest register is busy
                 self.issue_done_flag = True
+                if self.stats is not None:
+                    self.stats.record_stall("waw", instruction)
                 return
 
-        for idx, fu in enumerate(self.functional_unit_table[raw_functional_unit]):
-            if fu["busy"]:
+        for fu in self.functional_unit_table[instruction.fu]:
+            if fu.busy:
                 # Functional Unit already in use
                 continue
             # All checks done, now we can issu o/
 
             # Now the functional Unit table
-            self.functional_unit_table[raw_functional_unit][idx][
-                "reserved_by"
-            ] = instruction
-            self.functional_unit_table[raw_functional_unit][idx]["busy"] = True
-            self.functional_unit_table[raw_functional_unit][idx][
-                "op"
-            ] = self.remove_instruction_idx(instruction)
-            self.functional_unit_table[raw_functional_unit][idx]["fi"] = dest_register
-            self.functional_unit_table[raw_functional_unit][idx][
-                "fj"
-            ] = source_register_1
-            self.functional_unit_table[raw_functional_unit][idx][
-                "fk"
-            ] = source_register_2
-            self.functional_unit_table[raw_functional_unit][idx][
-                "qj"
-            ] = self.register_table[source_register_1]
-            if self.register_table[source_register_1] is not None:
-                self.functional_unit_table[raw_functional_unit][idx]["rj"] = 0
+            fu.reserved_by = instruction.idx
+            fu.busy = True
+            fu.op = instruction.op
+            fu.fi = instruction.dest
+            fu.fj = instruction.src1
+            fu.fk = instruction.src2
+            fu.latency = instruction.latency or fu.n_cycles
+            fu.qj = self.register_table[instruction.src1]
+            if fu.qj is not None:
+                fu.rj = 0
+                self.add_waiting_operand(fu.qj, (fu, "j"))
             else:
-                self.functional_unit_table[raw_functional_unit][idx]["rj"] = 1
-            if self.functional_unit_table[raw_functional_unit][idx]["fk"] is not None:
-                self.functional_unit_table[raw_functional_unit][idx][
-                    "qk"
-                ] = self.register_table[source_register_2]
-                if self.register_table[source_register_2] is not None:
-                    self.functional_unit_table[raw_functional_unit][idx]["rk"] = 0
+                self.set_operand_ready(fu, "j")
+            if fu.fk is not None:
+                fu.qk = self.register_table[instruction.src2]
+                if fu.qk is not None:
+                    fu.rk = 0
+                    self.add_waiting_operand(fu.qk, (fu, "k"))
                 else:
-                    self.functional_unit_table[raw_functional_unit][idx]["rk"] = 1
+                    self.set_operand_ready(fu, "k")
             else:
-                self.functional_unit_table[raw_functional_unit][idx]["rk"] = 1
+                self.set_operand_ready(fu, "k")
 
             # Request the dest register in register table
-            if dest_register is not None:
-                self.register_table[dest_register] = instruction
+            if instruction.dest is not None:
+                self.register_table[instruction.dest] = instruction.idx
 
             # Instruction table
-            self.instruction_table[instruction]["issue"] = cycle
-            self.instruction_table[instruction]["issue_state"] = "done"
-            self.instruction_table[instruction]["processed"] = True
-
-            # Set the flag to tell that one instruction already issued this cycle
-            self.issue_done_flag = True
+            status.issue = cycle
+            status.issue_state = "done"
+            status.processed = True
+            status.unit = fu
+
+            # Set the flag to tell that the issue width is used up for this cycle
+            self.n_issued += 1
+            if self.n_issued == self.issue_width:
+                self.issue_done_flag = True
+            self.cycle_changed = True
             break
+        else:
+            # Every F.U. of this kind is busy
+            if self.stats is not None:
+                self.stats.record_stall("structural", instruction)
 
-    def read_stage(self, cycle: int, instruction: str) -> None:
+    def read_stage(self, cycle: int, instruction: Instruction) -> None:
         """Process the read stage. Check if rk and rj are both 1, and make the reading if so"""
-        raw_functional_unit = self.get_fu_from_inst(instruction)
-        if self.instruction_table[instruction]["issue_state"] != "done":
+        status = self.instruction_table[instruction.idx]
+        if status.issue_state != "done":
             #  Issue didn't even occured yet
             return
-        if self.instruction_table[instruction]["read_state"] == "done":
+        if status.read_state == "done":
             #  Read already occured, skip this one
             return
-        if self.instruction_table[instruction]["processed"]:
+        if status.processed:
             # This instruction already processed this cycle
             return
-        for idx, fu in enumerate(self.functional_unit_table[raw_functional_unit]):
-            if instruction != fu["reserved_by"]:
-                # Not the unit that is being used by this instruction
-                continue
-            if fu["rj"] != 1 or fu["rk"] != 1:
-                self.instruction_table[instruction]["processed"] = True
-                break
-            # If we reached here, everything is fine and we can read
+        fu = status.unit
+        if fu.rj != 1 or fu.rk != 1:
+            status.processed = True
+            if self.stats is not None:
+                self.stats.record_stall("raw", instruction)
+            return
+        pipeline = fu.pipeline
+        if pipeline is not None:
+            if pipeline.next_start > cycle + 1:
+                # The pipeline can't take one more instruction yet, read once it can
+                status.processed = True
+                heapq.heappush(self.pending_events, pipeline.next_start - 1)
+                if self.stats is not None:
+                    self.stats.record_stall("structural", instruction)
+                return
+            pipeline.next_start = cycle + 1 + pipeline.initiation_interval
+        # If we reached here, everything is fine and we can read
+
+        # Update functional unit table
+        fu.rj = 0
+        fu.rk = 0
+        self.pending_readers[fu.fj] -= 1
+        self.pending_readers[fu.fk] -= 1
 
-            # Update functional unit table
-            self.functional_unit_table[raw_functional_unit][idx]["rj"] = 0
-            self.functional_unit_table[raw_functional_unit][idx]["rk"] = 0
+        # Update instruction table
+        status.processed = True
+        status.read = cycle
+        status.read_state = "done"
 
-            # Update instruction table
-            self.instruction_table[instruction]["processed"] = True
-            self.instruction_table[instruction]["read"] = cycle
-            self.instruction_table[instruction]["read_state"] = "done"
+        # The unit executes from the next cycle on, so we know when it finishes
+        heapq.heappush(self.pending_events, cycle + fu.latency)
+        self.cycle_changed = True
 
-    def execute_stage(self, cycle: int, instruction: str) -> None:
+    def execute_stage(self, cycle: int, instruction: Instruction) -> None:
         """Process the execution stage. Check the number of cycles needed for each F.U. and keep executing until reach this number of cycles"""
-        raw_functional_unit = self.get_fu_from_inst(instruction)
-        if self.instruction_table[instruction]["read_state"] != "done":
+        status = self.instruction_table[instruction.idx]
+        if status.read_state != "done":
             #  Issue didn't even occured yet
             return
-        if self.instruction_table[instruction]["ex_state"] == "done":
+        if status.ex_state == "done":
             #  Read already occured, skip this one
             return
-        if self.instruction_table[instruction]["processed"]:
+        if status.processed:
             # This instruction already processed this cycle
             return
-        for idx, fu in enumerate(self.functional_unit_table[raw_functional_unit]):
-            if instruction != fu["reserved_by"]:
-                # Not the unit that is being used by this instruction
-                continue
-            if fu["finished"]:
-                # Already fininished this unit
-                continue
-            # If we reached here, everything is fine and we can execute
-            # Update instruction table:
-            self.instruction_table[instruction]["ex"] = cycle
-            self.instruction_table[instruction]["processed"] = True
-
-            # Update functional unit table
-            self.functional_unit_table[raw_functional_unit][idx]["done_cycles"] += 1
-            if fu["done_cycles"] == fu["n_cycles"]:
-                self.functional_unit_table[raw_functional_unit][idx]["finished"] = True
-                self.instruction_table[instruction]["ex_state"] = "done"
-
-    def write_stage(self, cycle: int, instruction: str) -> None:
-        """Process the write stage. Checks to see if the value calculated in the execute stage can be written (Avoid WAR hazard)."""
-        dest_register_idx = 0
-        raw_functional_unit = self.get_fu_from_inst(instruction)
-        dest_register = self.instructions_to_execute[instruction][dest_register_idx]
+        fu = status.unit
+        if fu.finished:
+            # Already fininished this unit
+            return
+        # If we reached here, everything is fine and we can execute
+        # Update instruction table:
+        status.ex = cycle
+        status.processed = True
+
+        # Update functional unit table
+        fu.done_cycles += 1
+        if fu.done_cycles == fu.latency:
+            fu.finished = True
+            status.ex_state = "done"
+            self.cycle_changed = True
 
-        if self.instruction_table[instruction]["ex_state"] != "done":
+    def write_stage(self, cycle: int, instruction: Instruction) -> None:
+        """Process the write stage. Checks to see if the value calculated in the execute stage can be written (Avoid WAR hazard)."""
+        status = self.instruction_table[instruction.idx]
+        if status.ex_state != "done":
             #  Ex didn't even occured yet
             return
-        if self.instruction_table[instruction]["write_state"] == "done":
+        if status.write_state == "done":
             #  Read already occured, skip this one
             return
-
-        def check_source_register(reg: str) -> bool:
-            """Method to check if a destination register is source for a instruction, return true if it can proceed avoiding WAR hazard"""
-            for fu in self.functional_unit_table.keys():
-                for fu_unit in self.functional_unit_table[fu]:
-                    if reg == fu_unit["fj"] and fu_unit["rj"] == 1:
-                        return False
-                    if reg == fu_unit["fk"] and fu_unit["rk"] == 1:
-                        return False
-            return True
-
-        if self.instruction_table[instruction]["processed"]:
+        if status.processed:
             # This instruction already processed this cycle
             return
-        if not check_source_register(dest_register):
+        if not self.check_source_register(instruction.dest):
+            if self.stats is not None:
+                self.stats.record_stall("war", instruction)
             return
-
-        for idx, fu in enumerate(self.functional_unit_table[raw_functional_unit]):
-            if instruction != fu["reserved_by"]:
-                # Not the unit that is being used by this instruction
-                continue
-            if not fu["finished"]:
-                # Execute not finished yet
-                return
-            self.reset_fu.append((raw_functional_unit, idx))
+        if not status.unit.finished:
+            # Execute not finished yet
+            return
+        self.reset_fu.append(status.unit)
 
         # Interact with register table
-        self.registers_to_update.append((dest_register, instruction))
+        self.registers_to_update.append((instruction.dest, instruction.idx))
 
         # Update instruction table:
-        self.instruction_table[instruction]["write"] = cycle
-        self.instruction_table[instruction]["write_status"] = "done"
-        self.instruction_table[instruction]["finished"] = True
+        status.write = cycle
+        status.write_state = "done"
+        status.finished = True
+        self.n_finished += 1
+        self.cycle_changed = True
+
+    def add_waiting_operand(self, producer: int, slot: tuple) -> None:
+        """Register a (F.U., "j"/"k") operand slot as waiting for the result of the producer instruction"""
+        if producer not in self.waiting_operands:
+            self.waiting_operands[producer] = []
+        self.waiting_operands[producer].append(slot)
+
+    def set_operand_ready(self, fu: FunctionalUnit, operand: str) -> None:
+        """Mark an operand as ready to be read, its register has now one more pending reader"""
+        if operand == "j":
+            fu.rj = 1
+            reg = fu.fj
+        else:
+            fu.rk = 1
+            reg = fu.fk
+        self.pending_readers[reg] = self.pending_readers.get(reg, 0) + 1
+
+    def check_source_register(self, reg: int) -> bool:
+        """Method to check if a destination register is source for a instruction, return true if it can proceed avoiding WAR hazard"""
+        return not self.pending_readers.get(reg, 0)
 
     def update_source_registers(self) -> None:
         """Update the source register, sending the message that the source operand is now available"""
-        for reg in self.registers_to_update:
-            self.register_table[reg[0]] = None  # Register is not reserved anymore
-            for fu in self.functional_unit_table.keys():
-                for idx, fu_unit in enumerate(self.functional_unit_table[fu]):
-                    if reg[1] == fu_unit["qj"]:
-                        self.functional_unit_table[fu][idx]["rj"] = 1
-                    if reg[1] == fu_unit["qk"]:
-                        self.functional_unit_table[fu][idx]["rk"] = 1
+        for reg, producer in self.registers_to_update:
+            if reg is not None:
+                self.register_table[reg] = None  # Register is not reserved anymore
+            for fu, operand in self.waiting_operands.pop(producer, []):
+                self.set_operand_ready(fu, operand)
 
     def reset_state_to_next_cycle(self) -> None:
         """Reset needed states to begin a new cycle"""
         self.issue_done_flag = False
+        self.n_issued = 0
         self.registers_to_update = []
-        default_functional_unit_table = self.build_functional_unit_status()
         for fu in self.reset_fu:
-            self.functional_unit_table[fu[0]][fu[1]] = default_functional_unit_table[
-                fu[0]
-            ][fu[1]]
-        for instruction in self.instruction_table.values():
-            instruction["processed"] = False
+            fu.reset()
+        for instruction in self.in_flight:
+            self.instruction_table[instruction.idx].processed = False
         self.reset_fu = []
 
     def check_if_pipeline_is_finished(self) -> bool:
         """Method to check if all instructions are done processing"""
-        for instruction in self.instruction_table.values():
-            if not instruction["finished"]:
-                return True
-        return False
-
-    def loop(self) -> None:
-        """loop between instructions to process them using the scoreboarding techinique"""
+        return self.n_finished < len(self.instruction_table)
+
+    def get_instruction_window(self) -> list:
+        """Get the instructions that can do something this cycle, the issued but not written ones plus the next issue_width ones to be issued"""
+        return (
+            self.in_flight
+            + self.instruction_order[
+                self.next_issue : self.next_issue + self.issue_width
+            ]
+        )
+
+    def update_instruction_window(self, window: list) -> None:
+        """Drop written instructions from the window and move the issue candidate forward if it was issued"""
+        self.in_flight = [
+            instruction
+            for instruction in window
+            if self.instruction_table[instruction.idx].issue_state == "done"
+            and not self.instruction_table[instruction.idx].finished
+        ]
+        self.advance_issue_candidate()
+
+    def advance_issue_candidate(self) -> None:
+        """Move the issue candidate past the instructions already issued"""
+        while (
+            self.next_issue < len(self.instruction_order)
+            and self.instruction_table[self.next_issue].issue_state == "done"
+        ):
+            self.next_issue += 1
+
+    def start_pipeline(self) -> None:
+        """Set the state needed before the first cycle is processed"""
         self.issue_done_flag = False
+        self.n_issued = 0
         self.instruction_before_issue_state = "done"
         self.registers_to_update = []
         self.reset_fu = []
-        cycle = 1
-        while self.check_if_pipeline_is_finished():
-            for instruction in self.instruction_table.keys():
-                if self.instruction_table[instruction]["finished"]:
-                    self.instruction_before_issue_state = self.instruction_table[
-                        instruction
-                    ]["issue_state"]
-                    continue
-                self.issue_stage(cycle, instruction)
-                self.read_stage(cycle, instruction)
-                self.execute_stage(cycle, instruction)
-                self.write_stage(cycle, instruction)
-                self.instruction_before_issue_state = self.instruction_table[
-                    instruction
-                ]["issue_state"]
-
-            self.update_source_registers()
-            self.reset_state_to_next_cycle()
-            if self.print_each_stage:
-                self.pretty_print(self.build_table_from_array())
-            cycle += 1
-
-    def build_table_from_array(self) -> pd.DataFrame:
-        """Build a pandas DtaFrame form an array"""
-
-        def join_raw_instructions(inst: list) -> str:
-            """Rebuild raw instruction for pretty print"""
-            return_str = inst[0] + " " + inst[1] + ", " + inst[2]
-            if len(inst) == 4:
-                return_str += ", " + inst[3]
-            return return_str
-
-        instructions = [join_raw_instructions(i) for i in self.raw_instructions]
-        table = {"instruction": instructions}
-        stages = {"issue": [], "read": [], "ex": [], "write": []}
-        for instruction in self.instructions_to_execute.keys():
-            for stage in stages.keys():
-                stages[stage].append(str(self.instruction_table[instruction][stage]))
-        table_stages = {stage: stages[stage] for stage in stages}
-        table.update(table_stages)
-        df = pd.DataFrame(table)
-        return tabulate(df, showindex=False, headers=df.columns)
+        self.pending_events = []
+        self.cycle_changed = False
+        # Reverse indexes, producer instruction -> operand slots waiting for it and
+        # register -> number of ready operands that still have to read it
+        self.waiting_operands = {}
+        self.pending_readers = {}
+        self.in_flight = []
+        self.next_issue = 0
+        self.n_finished = 0
+        self.cycle = 1
+
+    def process_cycle(self, cycle: int) -> None:
+        """Run every stage of the instructions in the window for a single cycle.
+
+        Instructions already written and the ones behind the issue candidate
+        can't do anything, so only the window is visited.
+        """
+        self.cycle_changed = False
+        window = self.get_instruction_window()
+        # Everything before the window was already issued
+        self.instruction_before_issue_state = "done"
+        for instruction in window:
+            self.issue_stage(cycle, instruction)
+            self.read_stage(cycle, instruction)
+            self.execute_stage(cycle, instruction)
+            self.write_stage(cycle, instruction)
+            self.instruction_before_issue_state = self.instruction_table[
+                instruction.idx
+            ].issue_state
+
+        self.update_instruction_window(window)
+        self.update_source_registers()
+        self.reset_state_to_next_cycle()
+        if self.stats is not None:
+            self.stats.end_cycle()
+        if self.print_each_stage:
+            self.print_cycle(cycle, window)
+
+    def loop(self) -> None:
+        """loop between instructions to process them using the scoreboarding techinique"""
+        self.start_pipeline()
+        self.run_cycles()
+
+    def run_cycles(self, stop_cycle: int = None) -> None:
+        """Process one cycle after the other, from the current one until the end or until stop_cycle"""
+        while self.check_if_pipeline_is_finished() and (
+            stop_cycle is None or self.cycle < stop_cycle
+        ):
+            self.process_cycle(self.cycle)
+            # Only the event engine jumps to the queued cycles, drop the past ones
+            # so the queue stays as small as the instructions in flight
+            self.drop_past_events(self.cycle)
+            if self.steady_state is not None:
+                self.steady_state.check(self, self.cycle, stop_cycle)
+            self.cycle += 1
+        self.end_simulation()
+
+    def end_simulation(self) -> None:
+        """Set the total cycles once every instruction is done"""
+        if self.check_if_pipeline_is_finished():
+            return  # Paused, there are still cycles to process
+        self.total_cycles = self.cycle - 1
+        if self.stats is not None:
+            self.stats.finish()
+
+    def drop_past_events(self, cycle: int) -> None:
+        """Remove the queued events of the cycles up to cycle"""
+        while self.pending_events and self.pending_events[0] <= cycle:
+            heapq.heappop(self.pending_events)
+
+    def next_event_cycle(self, cycle: int) -> int:
+        """Get the next cycle in which a F.U. finishes its execution"""
+        # Only F.U. completions are queued. A register is released only by a write,
+        # and a write marks its cycle as changed, so it is never skipped over.
+        # Any new way of releasing a register must be queued here as well.
+        self.drop_past_events(cycle)
+        if not self.pending_events:
+            raise RuntimeError(
+                f"Pipeline stalled at cycle {cycle}: no instruction can make progress"
+            )
+        return self.pending_events[0]
+
+    def advance_execution(self, last_cycle: int, n_cycles: int) -> None:
+        """Account n_cycles of execution, ending in last_cycle, for every executing instruction"""
+        for instruction in self.in_flight:
+            status = self.instruction_table[instruction.idx]
+            if status.read_state != "done" or status.ex_state == "done":
+                continue
+            status.unit.done_cycles += n_cycles
+            status.ex = last_cycle
+
+    def skip_cycles(self, first_cycle: int, next_cycle: int) -> None:
+        """Account the execution of the cycles in [first_cycle, next_cycle) without simulating them"""
+        if self.stats is not None:
+            self.stats.repeat_last_cycle(next_cycle - first_cycle)
+        if self.print_each_stage:
+            # Every cycle must still be shown, so account them one at a time
+            for cycle in range(first_cycle, next_cycle):
+                self.advance_execution(cycle, 1)
+                self.print_cycle(cycle, self.in_flight)
+            return
+        self.advance_execution(next_cycle - 1, next_cycle - first_cycle)
+
+    def event_loop(self) -> None:
+        """Same as loop, but jump over the cycles where nothing but execution counting happens.
+
+        A cycle without any issue, read, end of execution or write leaves the
+        scoreboard exactly as it was, so every following cycle would do the same
+        until some F.U. finishes executing. Those cycles are skipped straight to
+        the next finishing F.U., taken from a priority queue. When every stage is
+        printed the skipped cycles are still printed, one at a time.
+        """
+        self.start_pipeline()
+        self.run_events()
+
+    def run_events(self, stop_cycle: int = None) -> None:
+        """Same as run_cycles for the event engine, a jump never goes past stop_cycle"""
+        while self.check_if_pipeline_is_finished() and (
+            stop_cycle is None or self.cycle < stop_cycle
+        ):
+            cycle = self.cycle
+            self.process_cycle(cycle)
+            if self.steady_state is not None:
+                self.steady_state.check(self, cycle, stop_cycle)
+            if self.cycle_changed or not self.check_if_pipeline_is_finished():
+                self.cycle += 1
+                continue
+            next_cycle = self.next_event_cycle(cycle)
+            if stop_cycle is not None:
+                next_cycle = min(next_cycle, stop_cycle)
+            self.skip_cycles(cycle + 1, next_cycle)
+            self.cycle = next_cycle
+        self.end_simulation()
+
+    def build_functional_unit_view(self) -> dict:
+        """Build the functional unit table as dicts, with register names and instruction labels"""
+        view = {}
+        for fu, units in self.functional_unit_table.items():
+            view[fu] = []
+            for unit in units:
+                row = unit.as_dict()
+                for key in ["fi", "fj", "fk"]:
+                    row[key] = self.get_register_name(row[key])
+                for key in ["qj", "qk", "reserved_by"]:
+                    if row[key] is not None:
+                        row[key] = self.instruction_order[row[key]].label
+                if unit.pipeline is not None:
+                    row["pipeline"] = unit.pipeline.next_start
+                view[fu].append(row)
+        return view
+
+    def build_register_view(self) -> dict:
+        """Build the register table as a dict from register name to the label of the instruction that will write it"""
+        return {
+            name: None
+            if self.register_table[reg] is None
+            else self.instruction_order[self.register_table[reg]].label
+            for reg, name in enumerate(self.register_names)
+        }
+
+    @staticmethod
+    def join_raw_instructions(inst: list) -> str:
+        """Rebuild raw instruction for pretty print"""
+        return inst[0] + " " + ", ".join(inst[1:])
+
+    def get_cycle_rows(self, cycle: int, instructions: list) -> list:
+        """Get the (instruction, timings) rows of the given instructions that did something in this cycle"""
+        rows = []
+        for instruction in instructions:
+            timings = self.get_instruction_timings(instruction.idx)
+            if cycle in timings:
+                rows.append((self.join_raw_instructions(instruction.fields), timings))
+        return rows
+
+    def print_cycle(self, cycle: int, instructions: list) -> None:
+        """Print the rows of the given instructions that did something in this cycle"""
+        RowWriter(sys.stdout).write_cycle(
+            cycle, self.get_cycle_rows(cycle, instructions)
+        )
+
+    def get_instruction_timings(self, idx: int) -> tuple:
+        """Get the (issue, read, ex, write) cycles of a single instruction"""
+        status = self.instruction_table[idx]
+        return status.issue, status.read, status.ex, status.write
+
+    def build_table_from_array(self) -> str:
+        """Build the text table with the cycle of every stage of every instruction"""
+        rows = [
+            [self.join_raw_instructions(inst)]
+            + [str(cycle) for cycle in self.get_instruction_timings(idx)]
+            for idx, inst in enumerate(self.raw_instructions)
+        ]
+        return build_table(rows)
 
 
 def main() -> None:
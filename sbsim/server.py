@@ -0,0 +1,510 @@
+import asyncio
+import collections
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .isa import ISA
+from .scoreboarding import ScoreboardingSIM
+from .session import MachineConfig, Program, ResultCache, simulate
+
+DEFAULT_HOST = "127.0.0.1"
+
+DEFAULT_PORT = 8642
+
+# Parsed programs kept in memory, the least recently used ones are dropped
+MAX_PROGRAMS = 64
+
+# Jobs waiting for a worker, more are rejected with 503
+MAX_QUEUED_JOBS = 1024
+
+# Finished jobs whose result can still be fetched
+MAX_FINISHED_JOBS = 1024
+
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+# Keys a F.U. config of a request can have, an initiation interval makes it pipelined
+FU_CONFIG_KEYS = {"n_units", "n_cycles", "initiation_interval"}
+
+REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+# Programs already sent to this worker process, by program id, so a job only
+# pickles its program to a worker that doesn't have it yet
+_worker_programs = collections.OrderedDict()
+
+
+class HTTPError(Exception):
+    """Error sent back to the client with its status code"""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class SnapshotSIM(ScoreboardingSIM):
+    """Simulator that hands the snapshot of every cycle to a callback instead of printing it"""
+
+    def __init__(
+        self, engine: str, on_cycle, isa: ISA = None, issue_width: int = 1
+    ) -> None:
+        super().__init__([], True, engine, isa=isa, issue_width=issue_width)
+        self.on_cycle = on_cycle
+
+    def print_cycle(self, cycle: int, instructions: list) -> None:
+        """Send the rows of the instructions that did something in this cycle"""
+        self.on_cycle(cycle, self.get_cycle_rows(cycle, instructions))
+
+
+def simulate_with_snapshots(program: Program, config: MachineConfig, on_cycle) -> dict:
+    """Same as session.simulate, calling on_cycle(cycle, rows) after every cycle"""
+    obj = SnapshotSIM(config.engine, on_cycle, program.isa, config.issue_width)
+    obj.load_program(
+        config.functional_units,
+        program.instructions_to_execute,
+        program.raw_instructions,
+    )
+    obj.run()
+    return obj.get_result()
+
+
+def simulate_in_worker(
+    key: str, program: Program, config: MachineConfig, cache: ResultCache = None
+) -> dict:
+    """Simulate a program kept by the worker process, keeping the program when it is given.
+
+    None when the program isn't given and the worker doesn't have it, the job
+    is then sent again with its program.
+    """
+    if program is not None:
+        _worker_programs[key] = program
+        while len(_worker_programs) > MAX_PROGRAMS:
+            _worker_programs.popitem(last=False)
+    else:
+        program = _worker_programs.get(key)
+        if program is None:
+            return None
+        _worker_programs.move_to_end(key)
+    return simulate(program, config, cache)
+
+
+class Job:
+    """A simulation request, queued until a worker runs it"""
+
+    __slots__ = [
+        "id",
+        "key",
+        "program",
+        "config",
+        "status",
+        "result",
+        "error",
+        "done",
+    ]
+
+    def __init__(
+        self, job_id: int, key: str, program: Program, config: MachineConfig
+    ) -> None:
+        self.id = job_id
+        self.key = key
+        self.program = program
+        self.config = config
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.done = asyncio.Event()
+
+    def as_dict(self) -> dict:
+        """Get the job as sent to the client"""
+        job = {"job": self.id, "status": self.status}
+        if self.result is not None:
+            job["result"] = self.result
+        if self.error is not None:
+            job["error"] = self.error
+        return job
+
+
+class SimulationServer:
+    """Long running simulation service with a small HTTP/JSON API, over TCP or a Unix socket.
+
+    Programs are parsed once and kept in memory by content hash, jobs go
+    through a queue to a pool of worker processes, that keep the programs
+    they were already sent, and a simulation can stream
+    the snapshot of every cycle back as newline delimited JSON. Every response
+    is JSON, errors are {"error": message} with the matching status code.
+
+        GET  /health          server status
+        POST /programs        {"lines": [...]}, parse and keep a program
+        POST /jobs            queue a simulation, returns its job id
+        GET  /jobs/<id>       status and result of a job
+        POST /simulate        run a simulation and wait for its result
+
+    A simulation body has either "program", the id returned by /programs, or
+    "lines", plus optional "functional_units" (the config from the program by
+    default) and "engine". /simulate with "snapshots": true streams one
+    {"cycle", "rows"} object per cycle and then the result.
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        unix_path: os.path = None,
+        n_workers: int = None,
+        cache_dir: os.path = None,
+        max_programs: int = MAX_PROGRAMS,
+        max_queued_jobs: int = MAX_QUEUED_JOBS,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.n_workers = n_workers or os.cpu_count()
+        self.cache = ResultCache(cache_dir) if cache_dir else None
+        self.max_programs = max_programs
+        self.max_queued_jobs = max_queued_jobs
+        self.programs = collections.OrderedDict()
+        self.jobs = collections.OrderedDict()
+        self.job_ids = itertools.count(1)
+        self.routes = {
+            ("GET", "/health"): self.handle_health,
+            ("POST", "/programs"): self.handle_programs,
+            ("POST", "/jobs"): self.handle_jobs,
+            ("POST", "/simulate"): self.handle_simulate,
+        }
+
+    async def start(self) -> None:
+        """Start listening and the workers, the bound port is in self.port"""
+        if self.n_workers == 1:
+            # No process to start, handy for tests and tiny programs
+            self.executor = ThreadPoolExecutor(1)
+        else:
+            self.executor = ProcessPoolExecutor(self.n_workers)
+        self.snapshot_executor = ThreadPoolExecutor(self.n_workers)
+        self.queue = asyncio.Queue(self.max_queued_jobs)
+        self.workers = [
+            asyncio.create_task(self.worker()) for _ in range(self.n_workers)
+        ]
+        if self.unix_path:
+            self.server = await asyncio.start_unix_server(
+                self.handle_connection, self.unix_path
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self.handle_connection, self.host, self.port
+            )
+            self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop listening, cancel the workers and shut the pools down"""
+        self.server.close()
+        await self.server.wait_closed()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.executor.shutdown(cancel_futures=True)
+        self.snapshot_executor.shutdown(cancel_futures=True)
+
+    async def serve_forever(self) -> None:
+        """Start the server and run it until cancelled"""
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def worker(self) -> None:
+        """Run the queued jobs one at a time in the executor"""
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            try:
+                result = await loop.run_in_executor(
+                    self.executor,
+                    simulate_in_worker,
+                    job.key,
+                    None,
+                    job.config,
+                    self.cache,
+                )
+                if result is None:
+                    # First job of this program on that worker
+                    result = await loop.run_in_executor(
+                        self.executor,
+                        simulate_in_worker,
+                        job.key,
+                        job.program,
+                        job.config,
+                        self.cache,
+                    )
+                job.result = result
+                job.status = "done"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.program = None  # The program may be evicted, don't hold it
+                job.done.set()
+                self.queue.task_done()
+                self.forget_finished_jobs()
+
+    def forget_finished_jobs(self) -> None:
+        """Drop the oldest finished jobs above MAX_FINISHED_JOBS"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.done.is_set()]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def add_program(self, lines: list) -> str:
+        """Parse a program and keep it, getting its id, the same content is parsed only once"""
+        if not isinstance(lines, list) or not all(isinstance(i, str) for i in lines):
+            raise HTTPError(400, "'lines' must be a list of strings")
+        try:
+            program = Program.from_lines(lines)
+        except (ValueError, IndexError, KeyError) as e:
+            raise HTTPError(400, f"Can't parse the program: {e}")
+        digest = program.digest()
+        # Same instructions but maybe another F.U. config in the lines
+        key = f"{digest}:{program.default_config().digest()}"
+        if key in self.programs:
+            self.programs.move_to_end(key)
+            return key
+        self.programs[key] = program
+        while len(self.programs) > self.max_programs:
+            self.programs.popitem(last=False)
+        return key
+
+    def get_program(self, body: dict) -> tuple[str, Program]:
+        """Get the id and program of a request, from its id or its lines"""
+        if "program" in body:
+            key = body["program"]
+            program = self.programs.get(key) if isinstance(key, str) else None
+            if program is None:
+                raise HTTPError(404, f"Unknown program '{key}'")
+            self.programs.move_to_end(key)
+            return key, program
+        if "lines" in body:
+            key = self.add_program(body["lines"])
+            return key, self.programs[key]
+        raise HTTPError(400, "Either 'program' or 'lines' must be given")
+
+    def get_job_request(self, body: dict) -> tuple[str, Program, MachineConfig]:
+        """Get the program id, program and machine of a simulation request"""
+        key, program = self.get_program(body)
+        engine = body.get("engine", "event")
+        if engine not in ScoreboardingSIM.ENGINES:
+            raise HTTPError(400, f"Unknown engine '{engine}'")
+        functional_units = body.get("functional_units", program.functional_units_config)
+        if not isinstance(functional_units, dict):
+            raise HTTPError(400, "'functional_units' must be an object")
+        for fu, config in functional_units.items():
+            if fu not in program.isa.functional_units:
+                raise HTTPError(400, f"Unknown functional unit '{fu}'")
+            if (
+                not isinstance(config, dict)
+                or not {"n_units", "n_cycles"} <= set(config) <= FU_CONFIG_KEYS
+                or not all(is_positive_int(v) for v in config.values())
+            ):
+                raise HTTPError(
+                    400,
+                    f"'{fu}' must have positive integer 'n_units' and 'n_cycles', and optionally 'initiation_interval'",
+                )
+        issue_width = body.get("issue_width", 1)
+        if not is_positive_int(issue_width):
+            raise HTTPError(400, "'issue_width' must be a positive integer")
+        return key, program, MachineConfig(functional_units, engine, issue_width)
+
+    def submit(self, body: dict) -> Job:
+        """Queue a simulation request"""
+        key, program, config = self.get_job_request(body)
+        job = Job(next(self.job_ids), key, program, config)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise HTTPError(503, "Too many queued jobs")
+        self.jobs[job.id] = job
+        return job
+
+    async def handle_health(self, body: dict, writer) -> tuple[int, dict]:
+        return 200, {
+            "status": "ok",
+            "programs": len(self.programs),
+            "queued": self.queue.qsize(),
+            "workers": self.n_workers,
+        }
+
+    async def handle_programs(self, body: dict, writer) -> tuple[int, dict]:
+        key = self.add_program(body.get("lines"))
+        program = self.programs[key]
+        return 200, {
+            "program": key,
+            "n_instructions": len(program),
+            "functional_units": program.functional_units_config,
+        }
+
+    async def handle_jobs(self, body: dict, writer) -> tuple[int, dict]:
+        job = self.submit(body)
+        return 202, job.as_dict()
+
+    async def handle_job(self, job_id: str) -> tuple[int, dict]:
+        job = self.jobs.get(int(job_id)) if job_id.isdigit() else None
+        if job is None:
+            raise HTTPError(404, f"Unknown job '{job_id}'")
+        return 200, job.as_dict()
+
+    async def handle_simulate(self, body: dict, writer) -> tuple[int, dict]:
+        if body.get("snapshots"):
+            await self.stream_snapshots(body, writer)
+            return None
+        job = self.submit(body)
+        await job.done.wait()
+        if job.error is not None:
+            raise HTTPError(400, job.error)
+        return 200, job.result
+
+    async def stream_snapshots(self, body: dict, writer) -> None:
+        """Run a simulation in a thread, writing each cycle snapshot as soon as it is done"""
+        _, program, config = self.get_job_request(body)
+        loop = asyncio.get_running_loop()
+        snapshots = asyncio.Queue()
+
+        def on_cycle(cycle: int, rows: list) -> None:
+            snapshot = {"cycle": cycle, "rows": [[i, *t] for i, t in rows]}
+            loop.call_soon_threadsafe(snapshots.put_nowait, snapshot)
+
+        future = loop.run_in_executor(
+            self.snapshot_executor,
+            simulate_with_snapshots,
+            program,
+            config,
+            on_cycle,
+        )
+        future.add_done_callback(lambda _: snapshots.put_nowait(None))
+        self.write_head(writer, 200, {"Transfer-Encoding": "chunked"})
+        while True:
+            snapshot = await snapshots.get()
+            if snapshot is None:
+                break
+            self.write_chunk(writer, snapshot)
+            await writer.drain()
+        try:
+            self.write_chunk(writer, future.result())
+        except Exception as e:
+            self.write_chunk(writer, {"error": str(e)})
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer) -> None:
+        """Serve the requests of a connection until the client closes it"""
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    response = await self.dispatch(method, path, body, writer)
+                except HTTPError as e:
+                    response = e.status, {"error": e.message}
+                except Exception as e:
+                    # A bug in a handler, answer instead of dropping the connection
+                    response = 500, {"error": f"{type(e).__name__}: {e}"}
+                if response is not None:
+                    self.write_response(writer, *response)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HTTPError as e:
+            # The request itself couldn't be read, answer and drop the connection
+            self.write_response(writer, e.status, {"error": e.message})
+        finally:
+            writer.close()
+
+    async def dispatch(self, method: str, path: str, body: bytes, writer):
+        """Call the handler of a route with the decoded JSON body"""
+        if path.startswith("/jobs/"):
+            if method != "GET":
+                raise HTTPError(405, f"{method} not allowed on {path}")
+            return await self.handle_job(path[len("/jobs/") :])
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                raise HTTPError(405, f"{method} not allowed on {path}")
+            raise HTTPError(404, f"Unknown path '{path}'")
+        try:
+            data = json.loads(body) if body else {}
+        except json.JSONDecodeError as e:
+            raise HTTPError(400, f"Invalid JSON: {e}")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "The body must be a JSON object")
+        return await handler(data, writer)
+
+    @staticmethod
+    async def read_request(reader) -> tuple:
+        """Read the method, path, headers and body of a request, None when the connection is closed"""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, _ = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = headers.get("content-length", "0")
+        if not length.isdigit():
+            raise HTTPError(400, f"Invalid Content-Length '{length}'")
+        length = int(length)
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, "Body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?")[0], headers, body
+
+    @staticmethod
+    def write_head(writer, status: int, headers: dict) -> None:
+        """Write the status line and headers of a response"""
+        head = f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        headers = {"Content-Type": "application/json", **headers}
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write((head + "\r\n").encode("latin-1"))
+
+    def write_response(self, writer, status: int, data: dict) -> None:
+        """Write a whole JSON response"""
+        body = json.dumps(data).encode()
+        self.write_head(writer, status, {"Content-Length": len(body)})
+        writer.write(body)
+
+    @staticmethod
+    def write_chunk(writer, data: dict) -> None:
+        """Write a JSON line as a chunk of a streamed response"""
+        line = json.dumps(data).encode() + b"\n"
+        writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+
+
+def is_positive_int(value) -> bool:
+    """Check a JSON value is a positive integer, JSON booleans are Python ints but not accepted"""
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def serve(**kwargs) -> None:
+    """Run a SimulationServer until interrupted, see SimulationServer for the arguments"""
+    try:
+        asyncio.run(SimulationServer(**kwargs).serve_forever())
+    except KeyboardInterrupt:
+        pass
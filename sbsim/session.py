@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+from typing import NamedTuple
+
+from .isa import DEFAULT_ISA, ISA
+from .render import build_table
+from .scoreboarding import ScoreboardingSIM
+
+# Bumped whenever the simulation results change, so old cache entries are not used
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_SIZE = 1024
+
+
+class MachineConfig(NamedTuple):
+    """The machine a program runs on, the F.U. config and issue width, and the engine used to simulate it"""
+
+    functional_units: dict
+    engine: str = "event"
+    issue_width: int = 1
+
+    def digest(self) -> str:
+        """Content hash of the F.U. config and issue width, the engine doesn't change the results so it is left out"""
+        data = json.dumps([self.functional_units, self.issue_width], sort_keys=True)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+
+class Program:
+    """A parsed program, that can be simulated many times without reading or parsing it again"""
+
+    def __init__(
+        self,
+        instructions_to_execute: dict,
+        raw_instructions: list,
+        functional_units_config: dict = None,
+        isa: ISA = None,
+    ) -> None:
+        self.instructions_to_execute = instructions_to_execute
+        self.raw_instructions = raw_instructions
+        self.functional_units_config = functional_units_config or {}
+        self.isa = isa or DEFAULT_ISA
+        self._digest = None
+
+    @classmethod
+    def from_lines(cls, lines: list[str], isa: ISA = None) -> "Program":
+        """Parse the lines of a program, the F.U. config found in them is kept as the default one"""
+        lines = [line.strip().lower() for line in lines if line.strip()]
+        (
+            functional_units_config,
+            instructions_to_execute,
+            raw_instructions,
+        ) = ScoreboardingSIM([], False, isa=isa).parse_file(lines)
+        return cls(
+            instructions_to_execute, raw_instructions, functional_units_config, isa
+        )
+
+    @classmethod
+    def from_files(
+        cls, file_paths: list[os.path], isa: ISA = None, n_workers: int = None
+    ) -> "Program":
+        """Read and parse the files of a program, in order, large files are parsed in n_workers processes"""
+        from .loader import load_files
+
+        (
+            functional_units_config,
+            instructions_to_execute,
+            raw_instructions,
+        ) = load_files(file_paths, isa, n_workers)
+        return cls(
+            instructions_to_execute, raw_instructions, functional_units_config, isa
+        )
+
+    def __len__(self) -> int:
+        """Number of instructions of the program"""
+        return len(self.raw_instructions)
+
+    @property
+    def labels(self) -> list[str]:
+        """Label of every instruction, in program order"""
+        return list(self.instructions_to_execute)
+
+    def default_config(
+        self, engine: str = "event", issue_width: int = 1
+    ) -> MachineConfig:
+        """Get the machine with the F.U. config found in the program files"""
+        return MachineConfig(self.functional_units_config, engine, issue_width)
+
+    def digest(self) -> str:
+        """Content hash of the instructions and the ISA they were parsed with, computed once"""
+        if self._digest is None:
+            data = "\n".join(
+                [self.isa.digest()]
+                + [" ".join(fields) for fields in self.raw_instructions]
+            )
+            self._digest = hashlib.sha256(data.encode()).hexdigest()
+        return self._digest
+
+
+class ResultCache:
+    """Directory of simulation results keyed by a content hash of the program and F.U. config.
+
+    Each result is a small JSON file. Reading an entry refreshes its
+    modification time and, when more than max_entries are stored, the least
+    recently used ones are removed.
+    """
+
+    def __init__(
+        self, directory: os.path, max_entries: int = DEFAULT_CACHE_SIZE
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError(
+                f"The cache must hold at least one entry, got {max_entries}"
+            )
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(program: Program, config: MachineConfig) -> str:
+        """Get the cache key of a program simulated on a machine"""
+        data = f"{CACHE_VERSION}:{program.digest()}:{config.digest()}"
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def path(self, key: str) -> os.path:
+        """Get the file of a cache entry"""
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key: str) -> dict:
+        """Get a stored result, None when there is none"""
+        path = self.path(key)
+        try:
+            with open(path, "r") as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        os.utime(path)
+        result["timings"] = [tuple(timing) for timing in result["timings"]]
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        """Store a result, evicting the least recently used ones if the cache is full"""
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(result, f, separators=(",", ":"))
+        os.replace(tmp_path, path)  # Readers never see a half written entry
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries above max_entries"""
+        entries = [
+            entry
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(".json")
+        ]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in entries[: len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass  # Already evicted by someone else
+
+    def __len__(self) -> int:
+        """Number of stored results"""
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+
+
+def simulate(
+    program: Program, config: MachineConfig = None, cache: ResultCache = None
+) -> dict:
+    """Simulate a parsed program on a machine, the one from the program files by default.
+
+    The result has the F.U. config, the total number of cycles and the (issue,
+    read, ex, write) cycles of every instruction. With a cache, a program and
+    F.U. config already simulated are not simulated again.
+    """
+    config = config or program.default_config()
+    if cache is not None:
+        key = cache.key(program, config)
+        result = cache.get(key)
+        if result is not None:
+            return result
+    obj = ScoreboardingSIM(
+        [], False, config.engine, isa=program.isa, issue_width=config.issue_width
+    )
+    obj.load_program(
+        config.functional_units,
+        program.instructions_to_execute,
+        program.raw_instructions,
+    )
+    obj.run()
+    result = obj.get_result()
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+
+def build_result_table(program: Program, result: dict) -> str:
+    """Build the same table printed by ScoreboardingSIM.execute from a result"""
+    rows = [
+        [ScoreboardingSIM.join_raw_instructions(fields)]
+        + [str(cycle) for cycle in timing]
+        for fields, timing in zip(program.raw_instructions, result["timings"])
+    ]
+    return build_table(rows)
@@ -0,0 +1,155 @@
+import functools
+import time
+
+# Methods of the simulator timed when the stats are enabled
+TIMED_METHODS = [
+    "issue_stage",
+    "read_stage",
+    "execute_stage",
+    "write_stage",
+    "update_source_registers",
+    "reset_state_to_next_cycle",
+]
+
+# structural: no free F.U. to issue, waw: dest register busy at issue,
+# raw: operands not ready to read, war: dest register still to be read by someone
+STALL_CAUSES = ["structural", "waw", "raw", "war"]
+
+
+class SimulationStats:
+    """Host time spent in each stage method and stall cycles by cause, F.U. class and instruction.
+
+    It is only built when asked for, the simulator checks for it only on the
+    stall paths and at the end of each cycle, so a run without stats pays
+    nothing for the timers and close to nothing for the counters.
+    """
+
+    def __init__(self) -> None:
+        self.stage_time = {method: 0.0 for method in TIMED_METHODS}
+        self.stage_calls = {method: 0 for method in TIMED_METHODS}
+        self.stalls = {cause: 0 for cause in STALL_CAUSES}
+        self.stalls_by_fu = {cause: {} for cause in STALL_CAUSES}
+        self.stalls_by_instruction = {}
+        # Length of the consecutive stall runs, cause -> run length -> count
+        self.stall_histogram = {cause: {} for cause in STALL_CAUSES}
+        self.active_runs = {}
+        self.cycle_stalls = []
+        self.last_cycle_stalls = []
+
+    def instrument(self, sim) -> None:
+        """Replace the stage methods of a simulator instance by timed ones, once"""
+        for method in TIMED_METHODS:
+            if method in vars(sim):
+                continue  # Already timed
+            setattr(sim, method, self.timed(method, getattr(sim, method)))
+
+    def timed(self, name: str, method):
+        """Wrap a method, adding its wall time to the stage timers"""
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.stage_time[name] += time.perf_counter() - start
+                self.stage_calls[name] += 1
+
+        return wrapper
+
+    def record_stall(self, cause: str, instruction) -> None:
+        """Count a stall cycle of an instruction"""
+        self.cycle_stalls.append((cause, instruction.fu, instruction.label))
+
+    def add_stalls(self, stalls: list, n_cycles: int) -> None:
+        """Add n_cycles of each (cause, F.U., label) stall to the counters and runs"""
+        for cause, fu, label in stalls:
+            self.stalls[cause] += n_cycles
+            self.stalls_by_fu[cause][fu] = (
+                self.stalls_by_fu[cause].get(fu, 0) + n_cycles
+            )
+            by_cause = self.stalls_by_instruction.setdefault(label, {})
+            by_cause[cause] = by_cause.get(cause, 0) + n_cycles
+            self.active_runs[(cause, label)] = (
+                self.active_runs.get((cause, label), 0) + n_cycles
+            )
+
+    def end_cycle(self) -> None:
+        """Account the stalls of the cycle, closing the runs of the stalls that didn't happen again"""
+        self.add_stalls(self.cycle_stalls, 1)
+        stalled = {(cause, label) for cause, _, label in self.cycle_stalls}
+        for key in [key for key in self.active_runs if key not in stalled]:
+            self.close_run(key)
+        self.last_cycle_stalls = self.cycle_stalls
+        self.cycle_stalls = []
+
+    def repeat_last_cycle(self, n_cycles: int) -> None:
+        """Account n_cycles skipped by the event engine, they stall exactly like the last simulated one"""
+        self.add_stalls(self.last_cycle_stalls, n_cycles)
+
+    def close_run(self, key: tuple) -> None:
+        """Add a finished stall run to the histogram of its cause"""
+        length = self.active_runs.pop(key)
+        histogram = self.stall_histogram[key[0]]
+        histogram[length] = histogram.get(length, 0) + 1
+
+    def finish(self) -> None:
+        """Close the runs still open at the end of the simulation"""
+        for key in list(self.active_runs):
+            self.close_run(key)
+
+    def as_dict(self) -> dict:
+        """Get every counter and timer as plain dicts"""
+        return {
+            "stage_time": self.stage_time,
+            "stage_calls": self.stage_calls,
+            "stalls": self.stalls,
+            "stalls_by_fu": self.stalls_by_fu,
+            "stalls_by_instruction": self.stalls_by_instruction,
+            "stall_histogram": self.stall_histogram,
+        }
+
+    def build_report(self) -> str:
+        """Build text tables with the stage timers, the stalls by cause and F.U. and the most stalled instructions"""
+        from .render import build_table
+
+        stage_rows = [
+            [
+                method,
+                self.stage_calls[method],
+                f"{self.stage_time[method]:.6f}",
+            ]
+            for method in TIMED_METHODS
+        ]
+        fus = sorted({fu for by_fu in self.stalls_by_fu.values() for fu in by_fu})
+        stall_rows = [
+            [cause, self.stalls[cause]]
+            + [self.stalls_by_fu[cause].get(fu, 0) for fu in fus]
+            + [
+                ", ".join(
+                    f"{length}:{count}"
+                    for length, count in sorted(self.stall_histogram[cause].items())
+                )
+            ]
+            for cause in STALL_CAUSES
+        ]
+        instruction_rows = sorted(
+            (
+                [label, sum(by_cause.values())]
+                + [by_cause.get(cause, 0) for cause in STALL_CAUSES]
+                for label, by_cause in self.stalls_by_instruction.items()
+            ),
+            key=lambda row: -row[1],
+        )[:10]
+        return "\n\n".join(
+            [
+                build_table(stage_rows, ["method", "calls", "time (s)"]),
+                build_table(
+                    stall_rows,
+                    ["stall", "cycles"] + fus + ["run length:count"],
+                ),
+                build_table(
+                    instruction_rows, ["instruction", "stall cycles"] + STALL_CAUSES
+                ),
+            ]
+        )
@@ -0,0 +1,263 @@
+import heapq
+
+from .scoreboarding import InstructionStatus
+
+# Longest loop body looked for when the block size isn't given
+MAX_BLOCK_SIZE = 256
+
+# Times a block must repeat to be taken as a loop body
+MIN_REPEATS = 4
+
+# Number of block boundary fingerprints kept to look for a repeated state
+MAX_HISTORY = 64
+
+STAGES = ["issue", "read", "ex", "write"]
+
+
+def instruction_signature(instruction) -> tuple:
+    """What makes two instructions behave the same in the scoreboard, the label and offsets don't matter"""
+    return (instruction.op, instruction.dest, instruction.src1, instruction.src2)
+
+
+def find_period(signatures: list, max_block_size: int = MAX_BLOCK_SIZE) -> int:
+    """Get the smallest block size repeated at least MIN_REPEATS times around the middle of the program, None if there is none"""
+    for block_size in range(1, max_block_size + 1):
+        start, end = find_periodic_region(signatures, block_size)
+        if end - start >= MIN_REPEATS * block_size:
+            return block_size
+    return None
+
+
+def find_periodic_region(signatures: list, block_size: int) -> tuple[int, int]:
+    """Get the largest [start, end) around the middle of the program repeating every block_size instructions"""
+    middle = len(signatures) // 2
+    if middle + block_size > len(signatures):
+        return middle, middle
+    start = middle
+    while start > 0 and signatures[start - 1] == signatures[start - 1 + block_size]:
+        start -= 1
+    end = middle + block_size
+    while end < len(signatures) and signatures[end] == signatures[end - block_size]:
+        end += 1
+    return start, end
+
+
+class SteadyStateDetector:
+    """Skip the repeated iterations of a loop body once the scoreboard reaches a periodic state.
+
+    Every time the issue candidate reaches a block boundary of the periodic
+    part of the program, the scoreboard state is fingerprinted, with instruction
+    ids relative to the boundary and cycles relative to the current one. When a
+    fingerprint comes back, the cycles between the two boundaries repeat
+    forever, so the timings of the following iterations are the ones already
+    simulated shifted by a whole number of periods. The simulation jumps to the
+    last boundary that keeps the program periodic and goes on from there, so the
+    tail of the program and anything after the loop is simulated as usual.
+    """
+
+    def __init__(self, block_size: int = None) -> None:
+        self.block_size = block_size
+        self.n_jumps = 0
+        self.skipped_instructions = 0
+
+    def prepare(self, sim) -> None:
+        """Find the periodic part of the loaded program and forget the previous fingerprints"""
+        signatures = [instruction_signature(i) for i in sim.instruction_order]
+        self.period = self.block_size or find_period(signatures)
+        self.start = self.end = 0
+        if self.period:
+            self.start, self.end = find_periodic_region(signatures, self.period)
+        self.history = {}
+        self.last_boundary = None
+
+    def check(self, sim, cycle: int, stop_cycle: int = None) -> None:
+        """Fingerprint the state if cycle ended on a block boundary, jumping ahead when it already happened"""
+        boundary = sim.next_issue
+        if boundary == self.last_boundary or sim.print_each_stage:
+            return
+        self.last_boundary = boundary
+        if (
+            not self.period
+            or boundary < self.start
+            or boundary >= self.end
+            or (boundary - self.start) % self.period
+        ):
+            return
+        fingerprint = self.fingerprint(sim, boundary, cycle)
+        if fingerprint not in self.history:
+            if len(self.history) >= MAX_HISTORY:
+                del self.history[next(iter(self.history))]
+            self.history[fingerprint] = (boundary, cycle)
+            return
+        last_boundary, last_cycle = self.history[fingerprint]
+        shift = boundary - last_boundary
+        cycle_shift = cycle - last_cycle
+        # The issue candidates after the first one are looked at too, they must
+        # still be in the periodic part
+        n_periods = (self.end - boundary - sim.issue_width + 1) // shift
+        if stop_cycle is not None:
+            # The jump must not go past the cycle the simulation pauses at
+            n_periods = min(n_periods, (stop_cycle - 1 - cycle) // cycle_shift)
+        if n_periods < 1:
+            return
+        self.jump(sim, boundary, shift, cycle_shift, n_periods)
+        sim.cycle = cycle + n_periods * cycle_shift
+        self.last_boundary = sim.next_issue
+        self.history = {}
+
+    @staticmethod
+    def fingerprint(sim, boundary: int, cycle: int) -> tuple:
+        """Build a hashable snapshot of the scoreboard, relative to the boundary and cycle"""
+
+        def rel(idx: int) -> int:
+            return None if idx is None else idx - boundary
+
+        def rel_cycle(value: int) -> int:
+            return None if value is None else value - cycle
+
+        positions = {}
+        units = []
+        for fu, fus in sim.functional_unit_table.items():
+            for i, unit in enumerate(fus):
+                positions[id(unit)] = (fu, i)
+                units.append(
+                    (
+                        unit.busy,
+                        unit.op,
+                        unit.fi,
+                        unit.fj,
+                        unit.fk,
+                        rel(unit.qj),
+                        rel(unit.qk),
+                        unit.rj,
+                        unit.rk,
+                        rel(unit.reserved_by),
+                        unit.done_cycles,
+                        unit.finished,
+                        # Only whether the pipeline starts a new instruction soon matters
+                        None
+                        if unit.pipeline is None
+                        else max(unit.pipeline.next_start - cycle, 0),
+                    )
+                )
+        in_flight = []
+        for instruction in sim.in_flight:
+            status = sim.instruction_table[instruction.idx]
+            in_flight.append(
+                (rel(instruction.idx),)
+                + instruction_signature(instruction)
+                + tuple(rel_cycle(getattr(status, stage)) for stage in STAGES)
+                + (
+                    status.issue_state,
+                    status.read_state,
+                    status.ex_state,
+                    status.write_state,
+                    status.processed,
+                    status.finished,
+                    positions[id(status.unit)],
+                )
+            )
+        waiting = sorted(
+            (rel(producer), tuple((positions[id(fu)], op) for fu, op in slots))
+            for producer, slots in sim.waiting_operands.items()
+        )
+        readers = sorted(
+            ((reg, n) for reg, n in sim.pending_readers.items() if n),
+            key=lambda item: (item[0] is not None, item[0] or 0),
+        )
+        events = sorted(t - cycle for t in sim.pending_events if t > cycle)
+        return (
+            tuple(units),
+            tuple(in_flight),
+            tuple(rel(producer) for producer in sim.register_table),
+            tuple(waiting),
+            tuple(readers),
+            tuple(events),
+        )
+
+    def jump(
+        self, sim, boundary: int, shift: int, cycle_shift: int, n_periods: int
+    ) -> None:
+        """Move the simulator n_periods periods ahead, filling the timings of the instructions jumped over.
+
+        A stage of an instruction that didn't happen yet happens cycle_shift
+        cycles after the same stage of the instruction shift positions before it.
+        """
+        offset = n_periods * shift
+        cycle_offset = n_periods * cycle_shift
+        table = sim.instruction_table
+        first = sim.in_flight[0].idx if sim.in_flight else boundary
+        target = boundary + offset
+
+        # The instructions in flight after the jump are the ones in flight now, shifted
+        in_flight = []
+        for instruction in sim.in_flight:
+            status = table[instruction.idx]
+            moved = InstructionStatus()
+            for key in InstructionStatus.__slots__:
+                setattr(moved, key, getattr(status, key))
+            for stage in STAGES:
+                value = getattr(status, stage)
+                if value is not None:
+                    setattr(moved, stage, value + cycle_offset)
+            in_flight.append((sim.instruction_order[instruction.idx + offset], moved))
+        moved_ids = set()
+        for instruction, status in in_flight:
+            # Set first, the instructions after them may take their done stages
+            table[instruction.idx] = status
+            moved_ids.add(instruction.idx)
+
+        # Instructions in flight now, some of their stages are already done
+        for idx in range(first, boundary):
+            status = table[idx]
+            if idx in moved_ids or status.finished:
+                continue
+            previous = table[idx - shift]
+            for stage in STAGES:
+                if getattr(status, stage + "_state") != "done":
+                    setattr(status, stage, getattr(previous, stage) + cycle_shift)
+                    setattr(status, stage + "_state", "done")
+            status.processed = previous.processed
+            status.finished = True
+        # Instructions not issued yet, every stage comes from the previous period
+        for idx in range(boundary, target):
+            if idx in moved_ids:
+                continue
+            status = table[idx]
+            previous = table[idx - shift]
+            status.issue = previous.issue + cycle_shift
+            status.read = previous.read + cycle_shift
+            status.ex = previous.ex + cycle_shift
+            status.write = previous.write + cycle_shift
+            status.issue_state = "done"
+            status.read_state = "done"
+            status.ex_state = "done"
+            status.write_state = "done"
+            status.processed = previous.processed
+            status.finished = True
+            status.unit = previous.unit
+
+        pipelines = set()
+        for fus in sim.functional_unit_table.values():
+            for unit in fus:
+                for key in ["qj", "qk", "reserved_by"]:
+                    if getattr(unit, key) is not None:
+                        setattr(unit, key, getattr(unit, key) + offset)
+                if unit.pipeline is not None and id(unit.pipeline) not in pipelines:
+                    pipelines.add(id(unit.pipeline))
+                    unit.pipeline.next_start += cycle_offset
+        sim.register_table = [
+            None if producer is None else producer + offset
+            for producer in sim.register_table
+        ]
+        sim.waiting_operands = {
+            producer + offset: slots for producer, slots in sim.waiting_operands.items()
+        }
+        cycle = sim.cycle
+        sim.pending_events = [t + cycle_offset for t in sim.pending_events if t > cycle]
+        heapq.heapify(sim.pending_events)
+        sim.in_flight = [instruction for instruction, _ in in_flight]
+        sim.next_issue = target
+        sim.n_finished = target - len(sim.in_flight)
+        self.n_jumps += 1
+        self.skipped_instructions += offset
@@ -0,0 +1,185 @@
+import collections
+import os
+import sys
+from typing import Iterator, TextIO
+
+from .isa import ISA
+from .render import RowWriter
+from .scoreboarding import Instruction, InstructionStatus, ScoreboardingSIM
+
+STDIN_PATH = "-"
+
+
+class StreamingInstructionTable:
+    """Instruction table holding only the instructions that weren't retired yet.
+
+    It is indexed by instruction id like the full instruction table, but the
+    statuses of retired instructions are dropped, so its size is bounded by the
+    distance between the oldest unwritten instruction and the issue candidate.
+    """
+
+    def __init__(self) -> None:
+        self.offset = 0
+        self.instructions = collections.deque()
+        self.statuses = collections.deque()
+
+    def __getitem__(self, idx: int) -> InstructionStatus:
+        return self.statuses[idx - self.offset]
+
+    def __len__(self) -> int:
+        """Number of instructions seen so far, retired or not"""
+        return self.offset + len(self.statuses)
+
+    def append(self, instruction: Instruction) -> None:
+        """Add the status of a new instruction, its id must be the next one"""
+        self.instructions.append(instruction)
+        self.statuses.append(InstructionStatus())
+
+    def retire(self) -> Iterator[tuple[Instruction, InstructionStatus]]:
+        """Drop the written instructions at the head of the table, in program order"""
+        while self.statuses and self.statuses[0].finished:
+            self.offset += 1
+            yield self.instructions.popleft(), self.statuses.popleft()
+
+
+class StreamingScoreboardingSIM(ScoreboardingSIM):
+    """Simulator that reads the instructions lazily and writes each timing row as soon as it is retired.
+
+    The F.U. config must come before the first instruction. Files are read one
+    line at a time, "-" reads from stdin, and the memory used is bounded by the
+    instructions in flight instead of the length of the trace.
+    """
+
+    def __init__(
+        self,
+        file_paths: list[os.path],
+        engine: str = "cycle",
+        output: TextIO = None,
+        stats: bool = False,
+        isa: ISA = None,
+        issue_width: int = 1,
+    ) -> None:
+        super().__init__(
+            file_paths or [STDIN_PATH],
+            False,
+            engine,
+            stats,
+            isa=isa,
+            issue_width=issue_width,
+        )
+        self.output = output or sys.stdout
+        self.row_writer = RowWriter(self.output)
+
+    def execute(self) -> None:
+        """Method to execute the simulator, writing the rows while simulating"""
+        self.lines = self.iter_inputed_files_data()
+        self.functional_units_config = self.read_functional_units_config()
+        self.instructions = self.iter_instructions()
+        self.raw_instructions = []
+        self.row_writer.write_header()
+        self.run()
+        self.output.flush()
+
+    def checkpoint(self) -> bytes:
+        """The input is read lazily and can't be saved, so a streaming run can't be checkpointed"""
+        raise RuntimeError("A streaming simulation can't be checkpointed")
+
+    def iter_inputed_files_data(self) -> Iterator[str]:
+        """Yield the lines of the inputed files one at a time"""
+        for file in self.files:
+            if file == STDIN_PATH:
+                yield from self.iter_lines(sys.stdin)
+                continue
+            with open(file, "r") as f:
+                yield from self.iter_lines(f)
+
+    @staticmethod
+    def iter_lines(f: TextIO) -> Iterator[str]:
+        """Yield the non blank lines of a file, stripped and in lower case"""
+        for line in f:
+            striped_line = line.strip().lower()
+            if not striped_line:  # Skip blank lines
+                continue
+            yield striped_line
+
+    def read_functional_units_config(self) -> dict:
+        """Read the F.U. config lines, stopping at the first instruction"""
+        functional_units_config = {}
+        self.first_instruction = None
+        for info in self.lines:
+            fields = info.replace(",", " ").split()
+            if fields[0] in self.isa.functional_units:
+                functional_units_config[fields[0]] = self.parse_functional_unit(fields)
+            elif fields[0] in self.isa.opcodes:
+                self.first_instruction = fields
+                break
+        return functional_units_config
+
+    def iter_instructions(self) -> Iterator[Instruction]:
+        """Yield the parsed instructions, in program order"""
+        opcode_counter = {}
+        idx = 0
+        if self.first_instruction is not None:
+            yield self.parse_instruction(self.first_instruction, idx, opcode_counter)
+            idx += 1
+        for info in self.lines:
+            fields = info.replace(",", " ").split()
+            if fields[0] in self.isa.functional_units:
+                raise ValueError(
+                    f"Functional unit config after the first instruction: {info}"
+                )
+            elif fields[0] in self.isa.opcodes:
+                yield self.parse_instruction(fields, idx, opcode_counter)
+                idx += 1
+
+    def build_instruction_status(self) -> None:
+        """Start an empty instruction table, filled as the instructions are read"""
+        self.instruction_table = StreamingInstructionTable()
+
+    def read_next_instruction(self) -> Instruction:
+        """Read the next instruction to be issued, None when the input is over"""
+        instruction = next(self.instructions, None)
+        if instruction is not None:
+            self.instruction_table.append(instruction)
+        return instruction
+
+    def start_pipeline(self) -> None:
+        """Set the state needed before the first cycle is processed"""
+        super().start_pipeline()
+        self.candidates = collections.deque()
+        self.read_candidates()
+
+    def read_candidates(self) -> None:
+        """Read instructions until there are issue_width issue candidates or the input is over"""
+        while len(self.candidates) < self.issue_width:
+            instruction = self.read_next_instruction()
+            if instruction is None:
+                return
+            self.candidates.append(instruction)
+
+    def check_if_pipeline_is_finished(self) -> bool:
+        """Method to check if there is still some instruction to process"""
+        return bool(self.in_flight) or bool(self.candidates)
+
+    def get_instruction_window(self) -> list:
+        """Get the issued but not written instructions plus the next ones to be issued"""
+        return self.in_flight + list(self.candidates)
+
+    def advance_issue_candidate(self) -> None:
+        """Read the next issue candidates in place of the issued ones, and retire the written instructions"""
+        while (
+            self.candidates
+            and self.instruction_table[self.candidates[0].idx].issue_state == "done"
+        ):
+            self.candidates.popleft()
+            self.next_issue += 1
+        self.read_candidates()
+        for instruction, status in self.instruction_table.retire():
+            self.write_row(instruction, status)
+
+    def write_row(self, instruction: Instruction, status: InstructionStatus) -> None:
+        """Write the timing row of a retired instruction"""
+        self.row_writer.write_row(
+            self.join_raw_instructions(instruction.fields),
+            (status.issue, status.read, status.ex, status.write),
+        )
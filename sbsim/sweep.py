@@ -0,0 +1,184 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .isa import DEFAULT_ISA, ISA
+from .render import build_table
+from .scoreboarding import ScoreboardingSIM
+
+# Parsed program of the worker process, sent once when the worker starts
+_worker_program = None
+
+
+def build_config_grid(
+    functional_units_config: dict,
+    units: dict = None,
+    cycles: dict = None,
+    isa: ISA = None,
+) -> list[dict]:
+    """Build every F.U. config combining the values given for each F.U.
+
+    units and cycles map a F.U. to the list of values to try for its number of
+    units and number of cycles, the F.U.s and values left out, like the
+    initiation interval of a pipelined F.U., keep the base config ones.
+    """
+    units = units or {}
+    cycles = cycles or {}
+    fus = (isa or DEFAULT_ISA).functional_units
+    for fu in list(units) + list(cycles):
+        if fu not in fus:
+            raise ValueError(f"Unknown functional unit '{fu}'")
+    axes = []
+    for fu in fus:
+        base = functional_units_config.get(fu, {})
+        axes.append(units.get(fu, [base.get("n_units")]))
+        axes.append(cycles.get(fu, [base.get("n_cycles")]))
+    grid = []
+    for values in itertools.product(*axes):
+        config = {}
+        for i, fu in enumerate(fus):
+            n_units, n_cycles = values[2 * i], values[2 * i + 1]
+            if n_units is None or n_cycles is None:
+                continue
+            config[fu] = dict(
+                functional_units_config.get(fu, {}), n_units=n_units, n_cycles=n_cycles
+            )
+        grid.append(config)
+    return grid
+
+
+def _init_worker(program: tuple) -> None:
+    """Keep the parsed program in the worker so it is not sent with every config"""
+    global _worker_program
+    _worker_program = program
+
+
+def simulate_config(
+    config: dict, engine: str = "event", program: tuple = None, issue_width: int = 1
+) -> dict:
+    """Simulate the parsed program with a single F.U. config and return its result row"""
+    instructions_to_execute, raw_instructions, isa = program or _worker_program
+    obj = ScoreboardingSIM([], False, engine, isa=isa, issue_width=issue_width)
+    obj.load_program(config, instructions_to_execute, raw_instructions)
+    obj.run()
+    return obj.get_result()
+
+
+def sweep(
+    file_paths: list[os.path],
+    units: dict = None,
+    cycles: dict = None,
+    configs: list[dict] = None,
+    n_workers: int = None,
+    engine: str = "event",
+    isa: ISA = None,
+    issue_width: int = 1,
+) -> list[dict]:
+    """Parse the program once and simulate it against a grid of F.U. configs in parallel.
+
+    The grid is built from units and cycles over the config found in the files,
+    unless the configs are given directly. Each result row has the config, the
+    total number of cycles and the (issue, read, ex, write) cycles of every
+    instruction, in the order of the configs.
+    """
+    from .session import Program
+
+    parsed = Program.from_files(file_paths, isa)
+    if configs is None:
+        configs = build_config_grid(parsed.functional_units_config, units, cycles, isa)
+    program = (parsed.instructions_to_execute, parsed.raw_instructions, isa)
+    if n_workers == 1:
+        return [
+            simulate_config(config, engine, program, issue_width) for config in configs
+        ]
+    with ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker, initargs=(program,)
+    ) as executor:
+        return list(
+            executor.map(
+                simulate_config,
+                configs,
+                itertools.repeat(engine),
+                itertools.repeat(None),
+                itertools.repeat(issue_width),
+                chunksize=max(1, len(configs) // (4 * (n_workers or os.cpu_count()))),
+            )
+        )
+
+
+def bound_sweep(
+    file_paths: list[os.path],
+    units: dict = None,
+    cycles: dict = None,
+    configs: list[dict] = None,
+    issue_width: int = 1,
+    isa: ISA = None,
+) -> list[dict]:
+    """Same as sweep, but only get the lower bound of the cycles of each config from analysis.analyze.
+
+    It takes a fraction of a simulation, so a large grid can be screened first
+    and only the configs with the best bounds simulated.
+    """
+    from .analysis import analyze
+    from .session import MachineConfig, Program
+
+    program = Program.from_files(file_paths, isa)
+    if configs is None:
+        configs = build_config_grid(program.functional_units_config, units, cycles, isa)
+    return [
+        analyze(program, MachineConfig(config, issue_width=issue_width))
+        for config in configs
+    ]
+
+
+def get_table_units(configs: list[dict]) -> list[str]:
+    """Get the F.U.s shown in a table of the configs, the default ones and then the ones of other ISAs"""
+    fus = list(ScoreboardingSIM.FUNCTIONAL_UNITS)
+    for config in configs:
+        fus += [fu for fu in config if fu not in fus]
+    return fus
+
+
+def get_config_row(config: dict, fus: list[str] = None) -> list:
+    """Get the n_units and n_cycles of every F.U. of a config, None for the ones left out"""
+    row = []
+    for fu in fus or ScoreboardingSIM.FUNCTIONAL_UNITS:
+        row += [config.get(fu, {}).get("n_units"), config.get(fu, {}).get("n_cycles")]
+    return row
+
+
+def get_config_headers(fus: list[str] = None) -> list:
+    """Get the headers of the columns of get_config_row"""
+    headers = []
+    for fu in fus or ScoreboardingSIM.FUNCTIONAL_UNITS:
+        headers += [fu + "_units", fu + "_cycles"]
+    return headers
+
+
+def build_sweep_table(results: list[dict], with_timings: bool = False) -> str:
+    """Build a table with the config and total cycles of every result, or one row per instruction with with_timings"""
+    fus = get_table_units([result["config"] for result in results])
+    headers = get_config_headers(fus)
+    rows = []
+    for result in results:
+        config_row = get_config_row(result["config"], fus)
+        if not with_timings:
+            rows.append(config_row + [result["total_cycles"]])
+            continue
+        for idx, timing in enumerate(result["timings"]):
+            rows.append(config_row + [result["total_cycles"], idx, *timing])
+    headers.append("total_cycles")
+    if with_timings:
+        headers += ["instruction_id", "issue", "read", "ex", "write"]
+    return build_table(rows, headers)
+
+
+def build_bound_sweep_table(analyses: list[dict]) -> str:
+    """Build a table with the config, lower bound and bottlenecks of every result of bound_sweep, the lowest bounds first"""
+    fus = get_table_units([analysis["config"] for analysis in analyses])
+    rows = [
+        get_config_row(analysis["config"], fus)
+        + [analysis["lower_bound"], ", ".join(analysis["bottlenecks"])]
+        for analysis in sorted(analyses, key=lambda analysis: analysis["lower_bound"])
+    ]
+    return build_table(rows, get_config_headers(fus) + ["lower_bound", "bottlenecks"])
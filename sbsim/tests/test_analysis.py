@@ -0,0 +1,83 @@
+import copy
+import os
+import random
+
+import pytest
+
+import sbsim
+import sbsim.analysis as analysis
+import sbsim.benchmark as bm
+import sbsim.session as ss
+from sbsim.sweep import bound_sweep
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_lower_bound(seed):
+    rng = random.Random(seed)
+    config = {
+        fu: {"n_units": rng.randint(1, 3), "n_cycles": rng.randint(1, 10)}
+        for fu in ["int", "mult", "add", "div"]
+    }
+    for fu in rng.sample(list(config), seed % 3):
+        config[fu]["initiation_interval"] = rng.randint(1, 3)
+    lines = bm.generate_trace(
+        rng.randint(1, 150),
+        dependency_distance=rng.randint(1, 8),
+        n_registers=rng.randint(2, 16),
+        functional_units_config=config,
+        seed=seed,
+    )
+    program = ss.Program.from_lines(lines)
+    config = ss.MachineConfig(config, "event", rng.randint(1, 3))
+    result = analysis.analyze(program, config)
+    total_cycles = sbsim.simulate(program, config)["total_cycles"]
+    assert result["critical_path"] <= result["lower_bound"] <= total_cycles
+    for cycles in result["resource_bounds"].values():
+        assert cycles <= result["lower_bound"]
+
+
+def test_exact_cases():
+    # A chain of dependencies only waits for the producers
+    chain = ["add 10 2", "int 1 1"] + [f"fadd f{i + 1}, f{i}, f{i}" for i in range(10)]
+    program = ss.Program.from_lines(chain)
+    result = analysis.analyze(program)
+    assert result["lower_bound"] == result["critical_path"]
+    assert result["lower_bound"] == sbsim.simulate(program)["total_cycles"]
+    assert result["critical_instructions"] == program.labels
+    assert result["bottlenecks"] == []
+
+    # Independent divisions only wait for the single divider
+    divisions = ["div 1 10", "int 1 1"] + [f"fdiv f{i}, f20, f21" for i in range(10)]
+    program = ss.Program.from_lines(divisions)
+    result = analysis.analyze(program)
+    assert result["lower_bound"] == sbsim.simulate(program)["total_cycles"]
+    assert result["resource_bounds"]["div"] == 10 * (10 + analysis.HELD_CYCLES)
+    assert result["bottlenecks"] == ["div"]
+
+
+def test_latency_and_pipelines():
+    description = copy.deepcopy(sbsim.isa.DEFAULT_ISA_DESCRIPTION)
+    description["opcodes"]["fdiv"]["latency"] = 20
+    lines = ["div 1 4", "add 1 2 1", "fdiv f1, f2, f3", "fadd f4, f1, f1"]
+    program = ss.Program.from_lines(lines, sbsim.isa.ISA(description))
+    result = analysis.analyze(program)
+    assert result["lower_bound"] == sbsim.simulate(program)["total_cycles"]
+    # The division takes 20 cycles instead of the 4 of the F.U.
+    assert result["critical_path"] > 20
+    assert analysis.get_n_rows({"n_units": 2, "n_cycles": 4}) == 2
+    assert (
+        analysis.get_n_rows({"n_units": 2, "n_cycles": 5, "initiation_interval": 2})
+        == 6
+    )
+
+
+def test_bound_sweep():
+    paths = [os.path.join(DATA_DIR, "test_1.txt")]
+    analyses = bound_sweep(paths, units={"mult": [1, 2]}, cycles={"div": [5, 40]})
+    assert len(analyses) == 4
+    for result in analyses:
+        program = ss.Program.from_files(paths)
+        config = ss.MachineConfig(result["config"])
+        assert result["lower_bound"] <= sbsim.simulate(program, config)["total_cycles"]
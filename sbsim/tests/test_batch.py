@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pytest
+
+import sbsim
+import sbsim.batch as bt
+import sbsim.benchmark as bm
+import sbsim.session as ss
+from sbsim.export import MISSING_CYCLE
+
+
+@pytest.fixture
+def test_1_path():
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    return os.path.join(dir_path, "data", "test_1.txt")
+
+
+def random_programs(n_programs, seed=0):
+    """Programs of different lengths and dependency distances, with the default F.U. config"""
+    return [
+        ss.Program.from_lines(
+            bm.generate_trace(
+                (seed + i) % 30,
+                dependency_distance=1 + i % 4,
+                n_registers=6,
+                seed=seed + i,
+            )
+        )
+        for i in range(n_programs)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_same_results(seed):
+    programs = random_programs(40, seed * 100)
+    config = ss.Program.from_lines(bm.generate_trace(0)).default_config()
+    results = bt.simulate_batch(programs, config)
+    for program, result in zip(programs, results):
+        if len(program):
+            assert result == sbsim.simulate(program, config)
+        else:
+            assert result["timings"] == [] and result["total_cycles"] == 0
+
+
+def test_test_1(test_1_path):
+    program = ss.Program.from_files([test_1_path])
+    slow = dict(program.functional_units_config, div={"n_units": 1, "n_cycles": 40})
+    for config in [program.default_config(), ss.MachineConfig(slow)]:
+        [result] = bt.simulate_batch([program], config)
+        assert result == sbsim.simulate(program, config)
+    assert bt.simulate_batch([program])[0]["total_cycles"] == 32
+
+
+def test_arrays(test_1_path):
+    program = ss.Program.from_files([test_1_path])
+    empty = ss.Program({}, [], program.functional_units_config)
+    timings, total_cycles = bt.simulate_batch_arrays([empty, program, empty])
+    assert timings.shape == (3, 9, 4)
+    assert total_cycles.tolist() == [0, 32, 0]
+    assert (timings[0] == MISSING_CYCLE).all()
+    assert timings[1].tolist() == [list(t) for t in sbsim.simulate(program)["timings"]]
+    timings, total_cycles = bt.simulate_batch_arrays([])
+    assert timings.shape == (0, 0, 4)
+    assert bt.simulate_batch([]) == []
+
+
+def test_bad_config(test_1_path):
+    program = ss.Program.from_files([test_1_path])
+    config = dict(program.functional_units_config)
+    del config["div"]
+    with pytest.raises(ValueError):
+        bt.simulate_batch([program], ss.MachineConfig(config))
+    config["div"] = {"n_units": 0, "n_cycles": 10}
+    with pytest.raises(ValueError):
+        bt.simulate_batch([program], ss.MachineConfig(config))
+    assert np.array_equal(
+        bt.simulate_batch_arrays([program])[1], np.array([32], dtype=np.int64)
+    )
@@ -0,0 +1,50 @@
+import pytest
+
+import sbsim.benchmark as bm
+import sbsim.scoreboarding as sb
+
+
+def test_generate_trace_is_parseable():
+    lines = bm.generate_trace(200, seed=3)
+    assert lines == bm.generate_trace(200, seed=3)
+    obj = sb.ScoreboardingSIM([], False)
+    config, instructions, _ = obj.parse_file(lines)
+    assert config == bm.DEFAULT_FUNCTIONAL_UNITS_CONFIG
+    assert len(instructions) == 200
+    pipelined = dict(
+        bm.DEFAULT_FUNCTIONAL_UNITS_CONFIG,
+        mult={"n_units": 1, "n_cycles": 6, "initiation_interval": 2},
+    )
+    lines = bm.generate_trace(20, functional_units_config=pipelined)
+    assert obj.parse_file(lines)[0] == pipelined
+
+
+def test_generate_trace_dependency_distance():
+    lines = bm.generate_trace(50, dependency_distance=1, opcode_mix={"fadd": 1})
+    instructions = [line.replace(",", "").split() for line in lines[4:]]
+    for before, after in zip(instructions, instructions[1:]):
+        assert after[2] == before[1]
+
+
+def test_generate_trace_opcode_mix():
+    lines = bm.generate_trace(100, opcode_mix={"fdiv": 1, "fld": 1})
+    assert {line.split()[0] for line in lines[4:]} == {"fdiv", "fld"}
+    with pytest.raises(ValueError):
+        bm.generate_trace(10, opcode_mix={"fma": 1})
+
+
+def test_run_suite_and_baseline(tmp_path):
+    results = bm.run_suite(300, "event", repeat=1, workloads=["mixed"])
+    result = results["mixed"]
+    assert result["n_instructions"] == 300
+    assert result["total_cycles"] > 0
+    assert result["instructions_per_second"] > 0
+    assert result["peak_memory"] > 0
+    path = str(tmp_path / "baseline.json")
+    bm.save_baseline(path, results)
+    baseline = bm.load_baseline(path)
+    assert bm.compare_to_baseline(results, baseline) == []
+    baseline["mixed"]["simulate"] = result["simulate"] / 10
+    baseline["mixed"]["total_cycles"] += 1
+    assert len(bm.compare_to_baseline(results, baseline)) == 2
+    assert "speedup" in bm.build_suite_table(results, baseline)
@@ -0,0 +1,105 @@
+import pytest
+
+import sbsim.benchmark as bm
+import sbsim.checkpoint as cp
+import sbsim.scoreboarding as sb
+from sbsim.streaming import StreamingScoreboardingSIM
+
+
+@pytest.fixture
+def lines():
+    return bm.generate_trace(300, dependency_distance=2, seed=3)
+
+
+def full_run(lines, engine):
+    obj = sb.ScoreboardingSIM([], False, engine)
+    obj.load_program(*obj.parse_file(lines))
+    obj.run()
+    return obj
+
+
+@pytest.mark.parametrize("engine", sb.ScoreboardingSIM.ENGINES)
+@pytest.mark.parametrize("stop_cycle", [1, 2, 57, 300])
+def test_resume_from_checkpoint(lines, engine, stop_cycle):
+    full = full_run(lines, engine)
+    obj = sb.ScoreboardingSIM([], False, engine)
+    obj.load_program(*obj.parse_file(lines))
+    obj.run(stop_cycle)
+    assert not obj.is_finished()
+    assert obj.cycle == stop_cycle
+    data = obj.checkpoint()
+
+    # Fan out, every simulator resumed from the same checkpoint ends the same
+    for _ in range(2):
+        resumed = sb.ScoreboardingSIM([], False, engine)
+        resumed.restore(data)
+        resumed.resume()
+        assert resumed.is_finished()
+        assert resumed.get_timings() == full.get_timings()
+        assert resumed.total_cycles == full.total_cycles
+
+
+def test_checkpoint_across_engines(lines):
+    full = full_run(lines, "cycle")
+    obj = sb.ScoreboardingSIM([], False, "cycle")
+    obj.load_program(*obj.parse_file(lines))
+    obj.run(100)
+    resumed = sb.ScoreboardingSIM([], False, "event")
+    resumed.restore(obj.checkpoint())
+    resumed.resume()
+    assert resumed.get_timings() == full.get_timings()
+
+
+def test_resume_in_steps(lines):
+    full = full_run(lines, "event")
+    obj = sb.ScoreboardingSIM([], False, "event")
+    obj.load_program(*obj.parse_file(lines))
+    obj.run(10)
+    for stop_cycle in range(20, 400, 10):
+        obj.resume(stop_cycle)
+    obj.resume()
+    assert obj.get_timings() == full.get_timings()
+
+
+def test_restored_state_is_shared(lines):
+    obj = sb.ScoreboardingSIM([], False)
+    obj.load_program(*obj.parse_file(lines))
+    obj.run(40)
+    resumed = sb.ScoreboardingSIM([], False)
+    resumed.restore(obj.checkpoint())
+    units = [fu for fus in resumed.functional_unit_table.values() for fu in fus]
+    for instruction in resumed.in_flight:
+        status = resumed.instruction_table[instruction.idx]
+        assert any(status.unit is fu for fu in units)
+
+
+def test_checkpoint_file(lines, tmp_path):
+    full = full_run(lines, "cycle")
+    obj = sb.ScoreboardingSIM([], False)
+    obj.load_program(*obj.parse_file(lines))
+    obj.run(123)
+    path = str(tmp_path / "warm.ckpt")
+    obj.save_checkpoint(path)
+    resumed = sb.ScoreboardingSIM([], False)
+    resumed.load_checkpoint(path)
+    resumed.resume()
+    assert resumed.get_timings() == full.get_timings()
+
+
+def test_checkpoint_version(lines):
+    obj = sb.ScoreboardingSIM([], False)
+    obj.load_program(*obj.parse_file(lines))
+    obj.run(5)
+    state = cp.load_state(obj.checkpoint())
+    cp.CHECKPOINT_VERSION += 1
+    try:
+        data = cp.dump_state(state)
+    finally:
+        cp.CHECKPOINT_VERSION -= 1
+    with pytest.raises(ValueError):
+        obj.restore(data)
+
+
+def test_streaming_checkpoint():
+    with pytest.raises(RuntimeError):
+        StreamingScoreboardingSIM([]).checkpoint()
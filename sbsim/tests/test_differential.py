@@ -0,0 +1,54 @@
+import random
+
+import sbsim.differential as diff
+import sbsim.session as ss
+
+
+def test_every_mode_matches():
+    report = diff.run_differential(n_cases=12, seed=0, max_instructions=40)
+    assert report["failures"] == []
+    assert set(report["speedups"]) == set(diff.MODES)
+    assert report["runs"]["event"] == 12
+    assert "speedup" in diff.build_differential_table(report)
+
+
+def test_generate_case():
+    rng = random.Random(1)
+    for _ in range(20):
+        case = diff.generate_case(rng, 30)
+        program = ss.Program.from_lines(case.lines())
+        assert 1 <= len(program) <= 30
+        assert program.functional_units_config == case.functional_units
+        assert 1 <= case.issue_width <= 3
+
+
+def test_shrink():
+    def broken(program, config):
+        """Wrong on every fdiv, as soon as there are two dividers"""
+        result = diff.run_engine(program, config, "event")
+        ops = [
+            instruction.op for instruction in program.instructions_to_execute.values()
+        ]
+        if "fdiv" in ops and config.functional_units["div"]["n_units"] > 1:
+            result["timings"][ops.index("fdiv")] = (1, 1, 1, 1)
+        return result
+
+    report = diff.run_differential(n_cases=10, seed=2, modes={"broken": broken})
+    assert report["failures"]
+    for failure in report["failures"]:
+        case = failure["case"]
+        assert len(case.instructions) == 1 and case.instructions[0].startswith("fdiv")
+        assert case.issue_width == 1
+        assert case.functional_units["div"] == {"n_units": 2, "n_cycles": 1}
+        assert failure["difference"].startswith("instruction 0")
+        assert "div 2 1" in diff.format_failure(failure)
+
+
+def test_errors_are_failures():
+    def crash(program, config):
+        raise RuntimeError("boom")
+
+    report = diff.run_differential(n_cases=2, seed=0, modes={"crash": crash})
+    assert len(report["failures"]) == 2
+    assert report["failures"][0]["difference"] == "RuntimeError: boom"
+    assert len(report["failures"][0]["case"].instructions) == 1
@@ -0,0 +1,57 @@
+import csv
+import os
+
+import numpy as np
+import pytest
+
+import sbsim.export as ex
+import sbsim.scoreboarding as sb
+
+
+@pytest.fixture
+def sim():
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    obj = sb.ScoreboardingSIM([os.path.join(dir_path, "data", "test_1.txt")], False)
+    obj.load_program(*obj.parse_file(obj.get_inputed_files_data()))
+    obj.run()
+    return obj
+
+
+def test_timings_array(sim):
+    array = sim.get_timings_array()
+    assert array.dtype == np.int64
+    assert array.shape == (9, 4)
+    assert array[:, 0].flags["C_CONTIGUOUS"]
+    assert [tuple(row) for row in array.tolist()] == sim.get_timings()
+    assert ex.timings_to_array([(1, None, None, None)]).tolist() == [[1, -1, -1, -1]]
+    assert ex.timings_to_array([]).shape == (0, 4)
+
+
+def test_export_npz(sim, tmp_path):
+    path = str(tmp_path / "timings.npz")
+    sim.export_timings(path)
+    data = np.load(path)
+    assert list(data["instruction"][:3]) == ["fld_1", "fmul_1", "fadd_1"]
+    assert data["write"].tolist() == [t[3] for t in sim.get_timings()]
+
+
+def test_export_npy_mmap(sim, tmp_path):
+    path = str(tmp_path / "timings.npy")
+    sim.export_timings(path)
+    array = np.load(path, mmap_mode="r")
+    assert isinstance(array, np.memmap)
+    assert (array == sim.get_timings_array()).all()
+
+
+def test_export_csv(sim, tmp_path):
+    path = str(tmp_path / "timings.csv")
+    sim.export_timings(path)
+    with open(path) as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["instruction", "issue", "read", "ex", "write"]
+    assert rows[-1] == ["fsd_1", "29", "30", "31", "32"]
+
+
+def test_export_unknown_format(sim, tmp_path):
+    with pytest.raises(ValueError):
+        sim.export_timings(str(tmp_path / "timings.json"))
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+import sbsim
+import sbsim.benchmark as bm
+import sbsim.incremental as inc
+import sbsim.session as ss
+
+
+def random_instruction(rng):
+    op = rng.choice(list(sbsim.ScoreboardingSIM.OPCODE_MAP))
+
+    def reg():
+        return rng.choice("fx") + str(rng.randint(0, 5))
+
+    if op in ["fld", "ild", "fsd", "isw"]:
+        return f"{op} {reg()}, 8({reg()})"
+    return f"{op} {reg()}, {reg()}, {reg()}"
+
+
+def edit(rng, instructions):
+    """Replace, insert or remove a random instruction"""
+    instructions = list(instructions)
+    idx = rng.randrange(len(instructions))
+    kind = rng.choice(["replace", "insert", "remove"])
+    if kind == "replace":
+        instructions[idx] = random_instruction(rng)
+    elif kind == "insert":
+        instructions.insert(idx, random_instruction(rng))
+    else:
+        del instructions[idx]
+    return instructions
+
+
+@pytest.mark.parametrize("engine", sbsim.ScoreboardingSIM.ENGINES)
+@pytest.mark.parametrize("snapshot_interval", [1, 5])
+@pytest.mark.parametrize("seed", range(3))
+def test_same_results(engine, snapshot_interval, seed):
+    rng = random.Random(seed)
+    lines = bm.generate_trace(60, dependency_distance=2, n_registers=6, seed=seed)
+    head, instructions = lines[:4], lines[4:]
+    config = ss.Program.from_lines(head).default_config(engine)
+    sim = inc.IncrementalSimulator(
+        ss.Program.from_lines(lines), config, snapshot_interval
+    )
+    for i in range(10):
+        edited = edit(rng, instructions)
+        program = ss.Program.from_lines(head + edited)
+        commit = i % 2 == 0
+        assert sim.simulate(program, commit) == sbsim.simulate(program, config)
+        if commit:
+            instructions = edited
+    assert sim.result == sbsim.simulate(ss.Program.from_lines(head + instructions))
+
+
+def test_resumes_after_prefix():
+    lines = bm.generate_trace(200, seed=1)
+    program = ss.Program.from_lines(lines)
+    sim = inc.IncrementalSimulator(program, snapshot_interval=10)
+    full = sim.result
+    edited = ss.Program.from_lines(lines[:-1] + ["fadd f1, f2, f3"])
+    result = sim.simulate(edited)
+    assert result == sbsim.simulate(edited)
+    # Resumed from the snapshot taken when instruction 190 was the issue candidate
+    assert sim.resumed_cycle == full["timings"][189][0] + 1
+    assert sim.simulate(program) is full
+    assert sim.simulate(ss.Program.from_lines(lines[:4])) == sbsim.simulate(
+        ss.Program.from_lines(lines[:4])
+    )
+    assert sim.resumed_cycle == 1
+
+
+def test_bad_interval():
+    program = ss.Program.from_lines(bm.generate_trace(5))
+    with pytest.raises(ValueError):
+        inc.IncrementalSimulator(program, snapshot_interval=0)
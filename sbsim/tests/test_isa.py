@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+import sbsim
+import sbsim.isa as isa
+import sbsim.scoreboarding as sb
+import sbsim.session as ss
+from sbsim.batch import simulate_batch
+
+WIDE_ISA = {
+    "register_files": {
+        "int": {"prefix": "x", "count": 64},
+        "float": {"prefix": "f", "count": 64},
+    },
+    "functional_units": ["alu", "fpu", "mem"],
+    "opcodes": {
+        "ld": {"fu": "mem", "operands": ["dest", "src1"]},
+        "sd": {"fu": "mem", "operands": ["src1", "src2"]},
+        "addi": {"fu": "alu", "operands": ["dest", "src1", "imm"]},
+        "add": {"fu": "alu", "operands": ["dest", "src1", "src2"]},
+        "fmul.d": {"fu": "fpu", "operands": ["dest", "src1", "src2"]},
+        "fdiv.d": {"fu": "fpu", "operands": ["dest", "src1", "src2"], "latency": 20},
+    },
+}
+
+WIDE_PROGRAM = [
+    "alu 2 1",
+    "fpu 1 4",
+    "mem 1 2",
+    "ld x40, 0(x1)",
+    "addi x41, x40, 8",
+    "fdiv.d f50, f1, f2",
+    "fmul.d f51, f50, f3",
+    "add x42, x41, x40",
+    "sd f51, 16(x42)",
+]
+
+
+def test_default_isa():
+    assert sb.ScoreboardingSIM.OPCODE_MAP["fsd"] == "int"
+    assert sb.ScoreboardingSIM.FUNCTIONAL_UNITS == ["int", "mult", "add", "div"]
+    obj = sb.ScoreboardingSIM([], False)
+    assert obj.isa is isa.DEFAULT_ISA
+    assert len(obj.register_names) == 64
+    assert obj.register_names[32] == "f0"
+    info = isa.DEFAULT_ISA.opcodes["fsd"]
+    assert (info.dest, info.src1, info.src2) == (None, 1, 2)
+
+
+def test_wide_isa(tmp_path):
+    path = tmp_path / "isa.json"
+    path.write_text(json.dumps(WIDE_ISA))
+    wide = isa.ISA.from_file(str(path))
+    program = ss.Program.from_lines(WIDE_PROGRAM, wide)
+    ld, addi, fdiv, _, _, sd = program.instructions_to_execute.values()
+    ids = wide.register_ids
+    assert (ld.fu, ld.dest, ld.src1, ld.src2) == ("mem", ids["x40"], ids["x1"], None)
+    assert (addi.dest, addi.src1, addi.src2) == (ids["x41"], ids["x40"], None)
+    assert (sd.dest, sd.src1, sd.src2) == (None, ids["f51"], ids["x42"])
+    assert fdiv.latency == 20 and ld.latency is None
+
+    result = sbsim.simulate(program)
+    issue, read, ex, write = result["timings"][2]
+    assert ex - read == 20  # The latency of the opcode, not the 4 cycles of the F.U.
+    assert simulate_batch([program]) == [result]
+    assert program.digest() != ss.Program.from_lines(WIDE_PROGRAM[:3]).digest()
+
+    obj = sb.ScoreboardingSIM([], False, "event", isa=wide)
+    obj.load_program(*obj.parse_file(WIDE_PROGRAM))
+    obj.run()
+    assert obj.get_timings() == result["timings"]
+    assert "ld x40, 0(x1)" in obj.build_table_from_array()
+    assert len(obj.register_table) == 128
+
+
+def test_bad_isa():
+    def build(**changes):
+        return isa.ISA(dict(WIDE_ISA, **changes))
+
+    with pytest.raises(ValueError):
+        build(opcodes={"add": {"fu": "vec", "operands": ["dest", "src1"]}})
+    with pytest.raises(ValueError):
+        build(opcodes={"add": {"fu": "alu", "operands": ["dest", "src3"]}})
+    with pytest.raises(ValueError):
+        build(opcodes={"add": {"fu": "alu", "operands": ["dest", "src2"]}})
+    with pytest.raises(ValueError):
+        build(opcodes={"add": {"fu": "alu", "operands": ["src1"], "latency": 0}})
+    with pytest.raises(ValueError):
+        build(register_files={"a": {"prefix": "x", "count": 0}})
+    with pytest.raises(ValueError):
+        build(
+            register_files={
+                "a": {"prefix": "x", "count": 2},
+                "b": {"prefix": "x", "count": 2},
+            }
+        )
+
+
+def test_operand_count():
+    obj = sb.ScoreboardingSIM([], False)
+    with pytest.raises(ValueError):
+        obj.parse_file(["fadd f1, f2"])
+    with pytest.raises(ValueError):
+        obj.parse_file(["fsd f1, f2, 8(x1)"])
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+import sbsim.benchmark as bm
+import sbsim.loader as loader
+import sbsim.session as ss
+from sbsim.scoreboarding import ScoreboardingSIM
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture
+def files(tmp_path):
+    lines = bm.generate_trace(400, seed=3)
+    first = tmp_path / "first.txt"
+    first.write_text(
+        "\n".join(line.upper() if i % 3 else line for i, line in enumerate(lines[:200]))
+        + "\n\n   \n"
+    )
+    empty = tmp_path / "empty.txt"
+    empty.write_text("")
+    # No newline at the end of the last file
+    last = tmp_path / "last.txt"
+    last.write_text("div 2 7\n" + "\n".join(lines[200:]))
+    return [str(first), str(empty), str(last)]
+
+
+def parse(paths):
+    sim = ScoreboardingSIM(paths, False)
+    return sim.parse_file(sim.get_inputed_files_data())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 1000, loader.DEFAULT_CHUNK_SIZE])
+def test_same_as_parse_file(files, chunk_size):
+    assert loader.load_files(files, chunk_size=chunk_size) == parse(files)
+
+
+def test_parallel(files, monkeypatch):
+    monkeypatch.setattr(loader, "PARALLEL_THRESHOLD", 0)
+    assert loader.load_files(files, n_workers=2, chunk_size=512) == parse(files)
+
+
+def test_split_file(files):
+    chunks = loader.split_file(files[0], 100)
+    assert chunks[0][1] == 0 and chunks[-1][2] == os.path.getsize(files[0])
+    for (_, _, end), (_, start, _) in zip(chunks, chunks[1:]):
+        assert end == start
+        assert loader.read_chunk(files[0], end - 1, end) == "\n"
+    assert loader.split_file(files[1]) == []
+
+
+def test_errors(tmp_path):
+    path = tmp_path / "bad.txt"
+    path.write_text("int 1 1\nfadd f1, f2\n")
+    with pytest.raises(ValueError, match="takes 3 operands"):
+        loader.load_files([str(path)])
+    path.write_text("int 1 1\nfadd f1, f2, y3\n")
+    with pytest.raises(ValueError, match="Unknown register 'y3'"):
+        loader.load_files([str(path)])
+
+
+def test_program_and_execute():
+    paths = [
+        os.path.join(DATA_DIR, "test_2_a.txt"),
+        os.path.join(DATA_DIR, "test_2_b.txt"),
+    ]
+    program = ss.Program.from_files(paths)
+    assert (program.functional_units_config, program.instructions_to_execute) == parse(
+        paths
+    )[:2]
+    run = ScoreboardingSIM(paths, False)
+    run.execute()
+    assert run.instructions_to_execute == program.instructions_to_execute
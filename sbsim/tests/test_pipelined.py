@@ -0,0 +1,101 @@
+import io
+import random
+
+import pytest
+
+import sbsim
+import sbsim.benchmark as bm
+import sbsim.scoreboarding as sb
+import sbsim.session as ss
+from sbsim.batch import simulate_batch
+from sbsim.streaming import StreamingScoreboardingSIM
+
+INDEPENDENT_MULS = [
+    "int 1 1",
+    "mult 1 4 1",
+    "add 1 2",
+    "div 1 10",
+    "fmul f1, f2, f3",
+    "fmul f4, f5, f6",
+    "fmul f7, f8, f9",
+    "fmul f10, f11, f12",
+]
+
+
+def run(lines, engine="cycle", issue_width=1, steady_state=False):
+    obj = sb.ScoreboardingSIM(
+        [], False, engine, steady_state=steady_state, issue_width=issue_width
+    )
+    obj.load_program(*obj.parse_file(lines))
+    obj.run()
+    return obj
+
+
+def test_parse_initiation_interval():
+    config, _, _ = sb.ScoreboardingSIM([], False).parse_file(INDEPENDENT_MULS)
+    assert config["mult"] == {"n_units": 1, "n_cycles": 4, "initiation_interval": 1}
+    assert config["add"] == {"n_units": 1, "n_cycles": 2}
+
+
+def test_pipelined_unit():
+    obj = run(INDEPENDENT_MULS)
+    # One unit holding up to 4 instructions, starting one of them every cycle
+    assert len(obj.functional_unit_table["mult"]) == 4
+    assert [timing[1] for timing in obj.get_timings()] == [2, 3, 4, 5]
+    assert [timing[2] for timing in obj.get_timings()] == [6, 7, 8, 9]
+    not_pipelined = run([INDEPENDENT_MULS[0], "mult 1 4"] + INDEPENDENT_MULS[2:])
+    assert obj.total_cycles < not_pipelined.total_cycles
+    slow = run([INDEPENDENT_MULS[0], "mult 1 4 2"] + INDEPENDENT_MULS[2:])
+    assert [timing[1] for timing in slow.get_timings()] == [2, 4, 9, 11]
+    assert obj.build_functional_unit_view()["mult"][0]["pipeline"] == 7
+
+
+def test_issue_width():
+    obj = run(INDEPENDENT_MULS, issue_width=2)
+    assert [timing[0] for timing in obj.get_timings()] == [1, 1, 2, 2]
+    # In order, an instruction waiting on a WAW stops the ones after it
+    obj = run(INDEPENDENT_MULS[:5] + ["fadd f1, f2, f3", "iadd x1, x2, x3"], "cycle", 4)
+    issue = [timing[0] for timing in obj.get_timings()]
+    assert issue[0] == 1 and issue[1] == issue[2] > 1
+    with pytest.raises(ValueError):
+        sb.ScoreboardingSIM([], False, issue_width=0)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_same_timings(seed):
+    rng = random.Random(seed)
+    config = {
+        fu: {"n_units": rng.randint(1, 2), "n_cycles": rng.randint(1, 8)}
+        for fu in ["int", "mult", "add", "div"]
+    }
+    for fu in rng.sample(list(config), 2):
+        config[fu]["initiation_interval"] = rng.randint(1, 3)
+    issue_width = rng.randint(1, 4)
+    lines = bm.generate_trace(
+        80, dependency_distance=2, functional_units_config=config, seed=seed
+    )
+    expected = run(lines, "cycle", issue_width)
+    for engine in sb.ScoreboardingSIM.ENGINES:
+        for steady_state in [False, True]:
+            obj = run(lines, engine, issue_width, steady_state)
+            assert obj.get_timings() == expected.get_timings()
+    output = io.StringIO()
+    stream = StreamingScoreboardingSIM([], "event", output, issue_width=issue_width)
+    stream.lines = iter(lines)
+    stream.functional_units_config = stream.read_functional_units_config()
+    stream.instructions = stream.iter_instructions()
+    stream.raw_instructions = []
+    stream.run()
+    assert stream.total_cycles == expected.total_cycles
+    program = ss.Program.from_lines(lines)
+    result = sbsim.simulate(program, program.default_config("event", issue_width))
+    assert result["timings"] == expected.get_timings()
+
+
+def test_batch_rejects():
+    program = ss.Program.from_lines(INDEPENDENT_MULS)
+    with pytest.raises(ValueError):
+        simulate_batch([program])
+    config = ss.Program.from_lines(bm.generate_trace(3)).default_config()
+    with pytest.raises(ValueError):
+        simulate_batch([program], ss.MachineConfig(config.functional_units, "event", 2))
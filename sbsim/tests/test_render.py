@@ -0,0 +1,53 @@
+import io
+import os
+import subprocess
+import sys
+
+import sbsim.render as rd
+import sbsim.scoreboarding as sb
+
+
+def test_import_is_lazy():
+    code = (
+        "import sys, sbsim, sbsim.cli_script.run; "
+        "print('pandas' in sys.modules, 'tabulate' in sys.modules)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.split() == ["False", "False"]
+
+
+def test_row_writer():
+    output = io.StringIO()
+    writer = rd.RowWriter(output)
+    writer.write_cycle(3, [("fld f1, 0(x1)", (1, 2, 3, None))])
+    lines = output.getvalue().splitlines()
+    assert lines[1] == "cycle 3"
+    assert lines[2].split() == rd.HEADERS
+    assert lines[3].split() == ["fld", "f1,", "0(x1)", "1", "2", "3", "None"]
+
+
+def test_print_each_stage_writes_changed_rows(capsys):
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    paths = [
+        os.path.join(dir_path, "data", "test_2_a.txt"),
+        os.path.join(dir_path, "data", "test_2_b.txt"),
+    ]
+    sb.ScoreboardingSIM(paths, True).execute()
+    output = capsys.readouterr().out
+    snapshots = output.split("\ncycle ")[1:]
+    assert len(snapshots) == 17
+    # fdiv only executes from cycle 7 to 16, so it is the only row of those cycles
+    assert snapshots[9].splitlines()[2].split() == [
+        "fdiv",
+        "f2,",
+        "f4,",
+        "f5",
+        "3",
+        "6",
+        "10",
+        "None",
+    ]
+    # The final table is still printed at the end
+    assert output.rstrip().splitlines()[-1].split()[-4:] == ["3", "6", "16", "17"]
@@ -0,0 +1,72 @@
+import pytest
+
+import sbsim
+import sbsim.benchmark as bm
+import sbsim.sampling as sp
+import sbsim.session as ss
+
+
+def generate_program(seed: int, n_instructions: int = 12000) -> ss.Program:
+    lines = bm.generate_trace(
+        n_instructions, dependency_distance=1 + seed % 6, seed=seed
+    )
+    return ss.Program.from_lines(lines)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_estimate(seed):
+    program = generate_program(seed)
+    full = sbsim.simulate(program)["total_cycles"]
+    estimate = sp.sample(program, interval=300, n_samples=15, warmup=50, seed=seed)
+    assert estimate["detailed_instructions"] < len(program) / 2
+    assert len(estimate["sampled_intervals"]) == 16
+    assert abs(estimate["total_cycles"] - full) / full < 0.05
+    low, high = estimate["cycles_interval"]
+    assert low < estimate["total_cycles"] < high
+    assert estimate["cpi"] == pytest.approx(estimate["total_cycles"] / len(program))
+
+
+@pytest.mark.parametrize("issue_width", [1, 2])
+def test_every_interval(issue_width):
+    # With every interval sampled the warm-up rebuilds the whole state
+    program = generate_program(7, 3000)
+    config = program.default_config(issue_width=issue_width)
+    full = sbsim.simulate(program, config)["total_cycles"]
+    estimate = sp.sample(program, config, interval=200, n_samples=100, warmup=50)
+    assert estimate["total_cycles"] == full
+    assert estimate["cycles_interval"] == (full, full)
+    assert "total cycles" in sp.build_sampling_table(estimate)
+
+
+def test_short_program():
+    program = generate_program(1, 50)
+    estimate = sp.sample(program)
+    assert estimate["n_intervals"] == 1
+    assert estimate["total_cycles"] == sbsim.simulate(program)["total_cycles"]
+    with pytest.raises(ValueError):
+        sp.sample(program, interval=0)
+
+
+def test_select_intervals():
+    assert sp.select_intervals(5, 10) == [0, 1, 2, 3, 4]
+    selected = sp.select_intervals(100, 10, seed=3)
+    assert len(selected) == 10
+    assert all(b - a == 10 for a, b in zip(selected, selected[1:]))
+
+
+def test_warmup_starts():
+    program = ss.Program.from_lines(
+        ["div 1 40", "int 1 1", "fdiv f1, f2, f3"]
+        + ["iadd x2, x3, x4"] * 20
+        + ["fadd f5, f1, f1"]
+    )
+    instructions = list(program.instructions_to_execute.values())
+    config = program.functional_units_config
+    # The sample reads the result of a division that may still be executing
+    assert sp.get_warmup_starts(config, instructions, [21], warmup=5) == [0]
+    config = dict(config, div={"n_units": 1, "n_cycles": 10})
+    assert sp.get_warmup_starts(config, instructions, [21], warmup=5) == [16]
+    sliced = sp.slice_program(program, 20, 22)
+    assert [
+        instruction.idx for instruction in sliced.instructions_to_execute.values()
+    ] == [0, 1]
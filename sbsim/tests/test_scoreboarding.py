@@ -75,3 +75,202 @@ def test_parse_file(sbobj1, test_1_parsed_data):
 def test_build_instruction_table(sbobj1, build_instruction_table_1):
     sbobj1.execute()
     assert_frame_equal(sbobj1.build_instruction_status(), build_instruction_table_1)
+
+
+@pytest.fixture
+def test_2_paths(data_path):
+    return [
+        os.path.join(data_path, "test_2_a.txt"),
+        os.path.join(data_path, "test_2_b.txt"),
+    ]
+
+
+@pytest.fixture
+def test_3_paths(data_path):
+    return [
+        os.path.join(data_path, "test_3_a.txt"),
+        os.path.join(data_path, "test_3_b.txt"),
+    ]
+
+
+@pytest.fixture
+def expected_timings() -> dict:
+    """(issue, read, ex, write) cycles each test should produce for each instruction"""
+    return {
+        "test_1": [
+            (1, 2, 3, 4),
+            (2, 3, 7, 8),
+            (9, 10, 12, 13),
+            (10, 11, 12, 13),
+            (11, 12, 22, 23),
+            (14, 24, 26, 27),
+            (15, 16, 20, 21),
+            (28, 29, 31, 32),
+            (29, 30, 31, 32),
+        ],
+        "test_2": [(1, 2, 3, 4), (2, 3, 4, 5), (3, 6, 16, 17)],
+        "test_3": [
+            (1, 2, 3, 4),
+            (2, 3, 7, 8),
+            (3, 4, 5, 6),
+            (4, 5, 21, 22),
+            (5, 9, 13, 14),
+            (9, 23, 25, 26),
+            (10, 11, 12, 13),
+            (11, 12, 13, 14),
+            (14, 15, 16, 17),
+        ],
+    }
+
+
+def get_timings(obj: sb.ScoreboardingSIM) -> list:
+    """Get the (issue, read, ex, write) cycles of every instruction"""
+    return [
+        (status.issue, status.read, status.ex, status.write)
+        for status in obj.instruction_table
+    ]
+
+
+@pytest.mark.parametrize("engine", sb.ScoreboardingSIM.ENGINES)
+def test_engine_timings(
+    engine, test_1_path, test_2_paths, test_3_paths, expected_timings
+):
+    inputs = {"test_1": [test_1_path], "test_2": test_2_paths, "test_3": test_3_paths}
+    for test, paths in inputs.items():
+        obj = sb.ScoreboardingSIM(paths, False, engine)
+        obj.execute()
+        assert get_timings(obj) == expected_timings[test]
+
+
+def test_event_engine_prints_same_table(test_3_paths):
+    cycle_obj = sb.ScoreboardingSIM(test_3_paths, False, "cycle")
+    cycle_obj.execute()
+    event_obj = sb.ScoreboardingSIM(test_3_paths, False, "event")
+    event_obj.execute()
+    assert cycle_obj.build_table_from_array() == event_obj.build_table_from_array()
+
+
+def test_unknown_engine(test_1_path):
+    with pytest.raises(ValueError):
+        sb.ScoreboardingSIM([test_1_path], False, "warp")
+
+
+def test_instruction_window(test_1_path):
+    obj = sb.ScoreboardingSIM([test_1_path], False)
+    (
+        obj.functional_units_config,
+        obj.instructions_to_execute,
+        obj.raw_instructions,
+    ) = obj.parse_file(obj.get_inputed_files_data())
+    obj.build_status()
+    obj.start_pipeline()
+    cycle = 1
+    last_issue = 0
+    while obj.check_if_pipeline_is_finished():
+        obj.process_cycle(cycle)
+        assert obj.next_issue >= last_issue
+        last_issue = obj.next_issue
+        positions = [i.idx for i in obj.in_flight]
+        assert positions == sorted(positions)
+        for instruction in obj.in_flight:
+            assert obj.instruction_table[instruction.idx].issue_state == "done"
+            assert not obj.instruction_table[instruction.idx].finished
+        assert all(
+            obj.instruction_table[i.idx].issue_state == "done"
+            for i in obj.instruction_order[: obj.next_issue]
+        )
+        cycle += 1
+    assert obj.in_flight == []
+    assert obj.next_issue == len(obj.instruction_order)
+    assert obj.n_finished == len(obj.instruction_table)
+
+
+def test_event_engine_prints_every_cycle(test_1_path, capsys):
+    sb.ScoreboardingSIM([test_1_path], True, "cycle").execute()
+    cycle_output = capsys.readouterr().out
+    sb.ScoreboardingSIM([test_1_path], True, "event").execute()
+    event_output = capsys.readouterr().out
+    assert cycle_output == event_output
+
+
+def test_parse_instructions(test_3_paths):
+    obj = sb.ScoreboardingSIM(test_3_paths, False)
+    _, instructions, raw_instructions = obj.parse_file(obj.get_inputed_files_data())
+    assert list(instructions.keys()) == [
+        "fld_1",
+        "fmul_1",
+        "iadd_1",
+        "fdiv_1",
+        "fmul_2",
+        "fadd_1",
+        "fsd_1",
+        "isub_1",
+        "isw_1",
+    ]
+    assert [i.idx for i in instructions.values()] == list(range(9))
+    reg = obj.register_ids
+    assert instructions["fld_1"] == sb.Instruction(
+        0, "fld_1", "fld", "int", reg["f1"], reg["x7"], None, raw_instructions[0]
+    )
+    assert instructions["fsd_1"][3:7] == ("int", None, reg["f1"], reg["x11"])
+    assert instructions["fmul_2"][3:7] == ("mult", reg["f4"], reg["f2"], reg["f4"])
+
+
+def test_unknown_register(test_1_path):
+    obj = sb.ScoreboardingSIM([test_1_path], False)
+    with pytest.raises(ValueError):
+        obj.parse_file(["fadd f1, f2, f64"])
+
+
+def test_reverse_indexes(test_1_path):
+    obj = sb.ScoreboardingSIM([test_1_path], False)
+    (
+        obj.functional_units_config,
+        obj.instructions_to_execute,
+        obj.raw_instructions,
+    ) = obj.parse_file(obj.get_inputed_files_data())
+    obj.build_status()
+    obj.start_pipeline()
+    cycle = 1
+    while obj.check_if_pipeline_is_finished():
+        obj.process_cycle(cycle)
+        units = [unit for units in obj.functional_unit_table.values() for unit in units]
+        for reg in range(len(obj.register_table)):
+            readers = sum(
+                (unit.fj == reg and unit.rj == 1) + (unit.fk == reg and unit.rk == 1)
+                for unit in units
+            )
+            assert obj.pending_readers.get(reg, 0) == readers
+        waiting = {}
+        for unit in units:
+            for operand, producer in [("j", unit.qj), ("k", unit.qk)]:
+                if (
+                    producer is not None
+                    and not obj.instruction_table[producer].finished
+                ):
+                    waiting.setdefault(producer, []).append((id(unit), operand))
+        assert {
+            producer: sorted((id(unit), operand) for unit, operand in slots)
+            for producer, slots in obj.waiting_operands.items()
+        } == {producer: sorted(slots) for producer, slots in waiting.items()}
+        cycle += 1
+    assert obj.waiting_operands == {}
+
+
+def test_functional_unit_reset_in_place(test_1_path):
+    obj = sb.ScoreboardingSIM([test_1_path], False)
+    (
+        obj.functional_units_config,
+        obj.instructions_to_execute,
+        obj.raw_instructions,
+    ) = obj.parse_file(obj.get_inputed_files_data())
+    obj.build_status()
+    units = [unit for units in obj.functional_unit_table.values() for unit in units]
+    obj.loop()
+    assert [
+        unit for units in obj.functional_unit_table.values() for unit in units
+    ] == units
+    for unit in units:
+        assert unit.as_dict() == sb.FunctionalUnit(unit.n_cycles).as_dict()
+    assert obj.build_functional_unit_view()["mult"][1]["n_cycles"] == 4
+    assert set(obj.build_register_view().values()) == {None}
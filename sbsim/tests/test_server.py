@@ -0,0 +1,213 @@
+import asyncio
+import http.client
+import json
+import os
+
+import pytest
+
+import sbsim.scoreboarding as sb
+import sbsim.server as sv
+
+
+@pytest.fixture
+def lines():
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    with open(os.path.join(dir_path, "data", "test_1.txt")) as f:
+        return f.read().splitlines()
+
+
+@pytest.fixture
+def expected(lines):
+    obj = sb.ScoreboardingSIM([], False)
+    obj.load_program(*obj.parse_file([line.lower() for line in lines if line]))
+    obj.run()
+    return obj
+
+
+def request(port: int, method: str, path: str, body=None) -> tuple[int, object]:
+    """Send a request with http.client, JSON lines responses are decoded line by line"""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    data = json.dumps(body) if body is not None else None
+    connection.request(method, path, data, {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    text = response.read().decode()
+    connection.close()
+    if response.getheader("Transfer-Encoding") == "chunked":
+        return response.status, [json.loads(line) for line in text.splitlines()]
+    return response.status, json.loads(text)
+
+
+def with_server(scenario, **kwargs):
+    """Run scenario(port) in a thread while a server runs on localhost"""
+
+    async def main():
+        server = sv.SimulationServer(port=0, **kwargs)
+        await server.start()
+        try:
+            return await asyncio.to_thread(scenario, server.port)
+        finally:
+            await server.stop()
+
+    return asyncio.run(main())
+
+
+def test_simulate(lines, expected):
+    def scenario(port):
+        status, health = request(port, "GET", "/health")
+        assert status == 200 and health["status"] == "ok"
+        status, result = request(port, "POST", "/simulate", {"lines": lines})
+        assert status == 200
+        assert [tuple(t) for t in result["timings"]] == expected.get_timings()
+        assert result["total_cycles"] == expected.total_cycles
+
+    with_server(scenario, n_workers=1)
+
+
+def test_hot_programs_and_jobs(lines, expected):
+    def scenario(port):
+        status, program = request(port, "POST", "/programs", {"lines": lines})
+        assert status == 200 and program["n_instructions"] == 9
+        again = request(port, "POST", "/programs", {"lines": lines})[1]
+        assert again["program"] == program["program"]
+        config = dict(program["functional_units"])
+        config["div"] = {"n_units": 1, "n_cycles": 40}
+        jobs = []
+        for functional_units in [program["functional_units"], config]:
+            body = {"program": program["program"], "functional_units": functional_units}
+            status, job = request(port, "POST", "/jobs", body)
+            assert status == 202
+            jobs.append(job["job"])
+        results = []
+        for job_id in jobs:
+            job = {"status": "queued"}
+            while job["status"] in ["queued", "running"]:
+                job = request(port, "GET", f"/jobs/{job_id}")[1]
+            assert job["status"] == "done"
+            results.append(job["result"])
+        assert results[0]["total_cycles"] == expected.total_cycles
+        assert results[1]["total_cycles"] > expected.total_cycles
+        assert request(port, "GET", "/health")[1]["programs"] == 1
+
+    with_server(scenario, n_workers=2)
+
+
+def test_snapshots(lines, expected):
+    def scenario(port):
+        body = {"lines": lines, "snapshots": True, "engine": "event"}
+        status, messages = request(port, "POST", "/simulate", body)
+        assert status == 200
+        *snapshots, result = messages
+        assert [s["cycle"] for s in snapshots] == list(
+            range(1, expected.total_cycles + 1)
+        )
+        assert snapshots[0]["rows"] == [["fld f1, 100(x7)", 1, None, None, None]]
+        assert result["total_cycles"] == expected.total_cycles
+
+    with_server(scenario, n_workers=1)
+
+
+def test_concurrent_requests(lines, expected):
+    def scenario(port):
+        async def many():
+            return await asyncio.gather(
+                *[
+                    asyncio.to_thread(
+                        request, port, "POST", "/simulate", {"lines": lines}
+                    )
+                    for _ in range(16)
+                ]
+            )
+
+        for status, result in asyncio.run(many()):
+            assert status == 200
+            assert result["total_cycles"] == expected.total_cycles
+
+    with_server(scenario, n_workers=1)
+
+
+def test_errors(lines):
+    def scenario(port):
+        assert request(port, "GET", "/nowhere")[0] == 404
+        assert request(port, "GET", "/simulate")[0] == 405
+        assert request(port, "GET", "/jobs/12345")[0] == 404
+        assert request(port, "POST", "/simulate", {"program": "nope"})[0] == 404
+        assert request(port, "POST", "/simulate", {})[0] == 400
+        status, error = request(
+            port, "POST", "/simulate", {"lines": ["fadd f1, y2, f3"]}
+        )
+        assert status == 400 and "error" in error
+        body = {"lines": lines, "functional_units": {"gpu": {"n_units": 1}}}
+        assert request(port, "POST", "/jobs", body)[0] == 400
+        assert request(port, "POST", "/jobs", {"lines": lines, "engine": "x"})[0] == 400
+        body = {"lines": lines, "functional_units": "abc"}
+        assert request(port, "POST", "/simulate", body)[0] == 400
+        body = {"lines": lines, "functional_units": {"int": {"n_units": True}}}
+        assert request(port, "POST", "/simulate", body)[0] == 400
+        assert (
+            request(port, "POST", "/simulate", {"lines": lines, "issue_width": True})[0]
+            == 400
+        )
+        for length in ["abc", "-5"]:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            connection.putrequest("POST", "/simulate")
+            connection.putheader("Content-Length", length)
+            connection.endheaders()
+            assert connection.getresponse().status == 400
+            connection.close()
+
+    with_server(scenario, n_workers=1)
+
+
+def test_internal_error(lines, monkeypatch):
+    async def broken(body, writer):
+        raise KeyError("boom")
+
+    def scenario(port):
+        status, error = request(port, "GET", "/health")
+        assert status == 500 and error["error"] == "KeyError: 'boom'"
+
+    async def main():
+        server = sv.SimulationServer(port=0, n_workers=1)
+        server.routes[("GET", "/health")] = broken
+        await server.start()
+        try:
+            return await asyncio.to_thread(scenario, server.port)
+        finally:
+            await server.stop()
+
+    asyncio.run(main())
+
+
+def test_worker_keeps_programs(lines, expected):
+    program = sv.Program.from_lines(lines)
+    config = program.default_config()
+    assert sv.simulate_in_worker("unknown", None, config) is None
+    result = sv.simulate_in_worker("test_1", program, config)
+    assert result == sv.simulate_in_worker("test_1", None, config)
+    assert result["total_cycles"] == expected.total_cycles
+
+
+def test_unix_socket(lines, tmp_path, expected):
+    path = str(tmp_path / "sbsim.sock")
+
+    async def main():
+        server = sv.SimulationServer(unix_path=path, n_workers=1)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            body = json.dumps({"lines": lines}).encode()
+            writer.write(
+                b"POST /simulate HTTP/1.1\r\nConnection: close\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            await server.stop()
+
+    response = asyncio.run(main())
+    head, _, body = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200")
+    assert json.loads(body)["total_cycles"] == expected.total_cycles
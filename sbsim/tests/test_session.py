@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+import sbsim
+import sbsim.scoreboarding as sb
+import sbsim.session as ss
+
+
+@pytest.fixture
+def test_1_path():
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    return os.path.join(dir_path, "data", "test_1.txt")
+
+
+@pytest.fixture
+def program(test_1_path):
+    return ss.Program.from_files([test_1_path])
+
+
+def test_program(program, test_1_path):
+    obj = sb.ScoreboardingSIM([test_1_path], False)
+    obj.load_program(*obj.parse_file(obj.get_inputed_files_data()))
+    obj.run()
+    assert len(program) == 9
+    assert program.labels[:2] == ["fld_1", "fmul_1"]
+    result = sbsim.simulate(program)
+    assert result["timings"] == obj.get_timings()
+    assert result["total_cycles"] == 32
+    assert ss.build_result_table(program, result) == obj.build_table_from_array()
+
+
+def test_simulate_many_configs(program):
+    base = program.functional_units_config
+    slow = dict(base, div={"n_units": 1, "n_cycles": 40})
+    fast = sbsim.simulate(program, sbsim.MachineConfig(base, "cycle"))
+    slower = sbsim.simulate(program, sbsim.MachineConfig(slow))
+    assert slower["total_cycles"] > fast["total_cycles"]
+    assert sbsim.simulate(program)["timings"] == fast["timings"]
+
+
+def test_digest(program, test_1_path):
+    same = ss.Program.from_lines(open(test_1_path).readlines())
+    assert same.digest() == program.digest()
+    other = ss.Program.from_lines(open(test_1_path).readlines()[:-1])
+    assert other.digest() != program.digest()
+    config = program.default_config()
+    assert config.digest() == program.default_config("cycle").digest()
+    assert ss.ResultCache.key(program, config) != ss.ResultCache.key(other, config)
+
+
+def test_cache_hit(program, tmp_path, monkeypatch):
+    cache = sbsim.ResultCache(str(tmp_path))
+    result = sbsim.simulate(program, cache=cache)
+    assert len(cache) == 1
+
+    def fail(self, stop_cycle=None):
+        raise AssertionError("A cached result must not be simulated again")
+
+    monkeypatch.setattr(sb.ScoreboardingSIM, "run", fail)
+    cached = sbsim.simulate(program, cache=sbsim.ResultCache(str(tmp_path)))
+    assert cached == result
+
+
+def test_cache_corrupt_entry(program, tmp_path):
+    cache = sbsim.ResultCache(str(tmp_path))
+    key = cache.key(program, program.default_config())
+    with open(cache.path(key), "w") as f:
+        f.write("{")
+    assert cache.get(key) is None
+    assert sbsim.simulate(program, cache=cache)["total_cycles"] == 32
+    assert cache.get(key)["total_cycles"] == 32
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = sbsim.ResultCache(str(tmp_path), max_entries=2)
+    result = {"config": {}, "total_cycles": 1, "timings": [(1, 2, 3, 4)]}
+    cache.put("a", result)
+    cache.put("b", result)
+    os.utime(cache.path("a"), ns=(1, 1))
+    os.utime(cache.path("b"), ns=(2, 2))
+    assert cache.get("a") == result  # a is now the most recently used
+    cache.put("c", result)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == result
+    with pytest.raises(ValueError):
+        sbsim.ResultCache(str(tmp_path), max_entries=0)
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+import sbsim.benchmark as bm
+import sbsim.scoreboarding as sb
+import sbsim.stats as st
+
+
+@pytest.fixture
+def test_1_path():
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    return os.path.join(dir_path, "data", "test_1.txt")
+
+
+def run(lines, engine="cycle", stats=True):
+    obj = sb.ScoreboardingSIM([], False, engine, stats)
+    obj.load_program(*obj.parse_file(lines))
+    obj.run()
+    return obj
+
+
+def test_stats_disabled(test_1_path):
+    obj = sb.ScoreboardingSIM([test_1_path], False)
+    obj.load_program(*obj.parse_file(obj.get_inputed_files_data()))
+    obj.run()
+    assert obj.stats is None
+    assert "issue_stage" not in vars(obj)
+
+
+def test_stall_causes(test_1_path):
+    obj = sb.ScoreboardingSIM([test_1_path], False, stats=True)
+    obj.load_program(*obj.parse_file(obj.get_inputed_files_data()))
+    obj.run()
+    stats = obj.stats
+    # fadd_1 waits for f2 written by fmul_1, fsub_1 for f3 written by fdiv_1
+    assert stats.stalls_by_instruction["fadd_1"]["waw"] == 6
+    assert stats.stalls_by_instruction["fsub_1"]["raw"] == 9
+    assert stats.stalls["structural"] == 14
+    assert stats.stalls_by_fu["structural"] == {"add": 14}
+    for cause in st.STALL_CAUSES:
+        assert stats.stalls[cause] == sum(stats.stalls_by_fu[cause].values())
+        assert stats.stalls[cause] == sum(
+            length * count for length, count in stats.stall_histogram[cause].items()
+        )
+    assert stats.stage_calls["update_source_registers"] == obj.total_cycles
+    assert not stats.active_runs
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_event_engine_same_stalls(seed):
+    lines = bm.generate_trace(150, dependency_distance=2, seed=seed)
+    cycle_stats = run(lines, "cycle").stats
+    event_stats = run(lines, "event").stats
+    assert cycle_stats.stalls == event_stats.stalls
+    assert cycle_stats.stalls_by_fu == event_stats.stalls_by_fu
+    assert cycle_stats.stalls_by_instruction == event_stats.stalls_by_instruction
+    assert cycle_stats.stall_histogram == event_stats.stall_histogram
+
+
+def test_stats_do_not_change_timings():
+    lines = bm.generate_trace(200, dependency_distance=3, seed=1)
+    assert run(lines, stats=True).get_timings() == run(lines, stats=False).get_timings()
+
+
+def test_build_report(test_1_path):
+    obj = sb.ScoreboardingSIM([test_1_path], False, stats=True)
+    obj.load_program(*obj.parse_file(obj.get_inputed_files_data()))
+    obj.run()
+    report = obj.stats.build_report()
+    assert "issue_stage" in report
+    assert "structural" in report
+    assert "fsub_1" in report
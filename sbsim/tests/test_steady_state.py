@@ -0,0 +1,77 @@
+import pytest
+
+import sbsim.benchmark as bm
+import sbsim.scoreboarding as sb
+import sbsim.steady_state as ss
+
+
+def loop_trace(n_iterations, seed=0):
+    """Prologue, n_iterations copies of a loop body and epilogue"""
+    body = bm.generate_trace(8, dependency_distance=2, n_registers=6, seed=seed)
+    prologue = bm.generate_trace(3, n_registers=6, seed=seed + 1)[4:]
+    epilogue = bm.generate_trace(5, n_registers=6, seed=seed + 2)[4:]
+    return body[:4] + prologue + body[4:] * n_iterations + epilogue
+
+
+def run(lines, engine="cycle", steady_state=False, stop_cycle=None):
+    obj = sb.ScoreboardingSIM([], False, engine, steady_state=steady_state)
+    obj.load_program(*obj.parse_file(lines))
+    obj.run(stop_cycle)
+    return obj
+
+
+def test_find_period():
+    assert ss.find_period(list("xyabcabcabcabcabcabz")) == 3
+    assert ss.find_period(list("abcdefgh")) is None
+    assert ss.find_period([]) is None
+
+
+def test_find_periodic_region():
+    signatures = list("xyabcabcabcabcz")
+    assert ss.find_periodic_region(signatures, 3) == (2, 14)
+
+
+@pytest.mark.parametrize("engine", sb.ScoreboardingSIM.ENGINES)
+@pytest.mark.parametrize("seed", range(4))
+def test_same_timings(engine, seed):
+    lines = loop_trace(50, seed)
+    full = run(lines, engine)
+    fast = run(lines, engine, steady_state=True)
+    assert fast.steady_state.n_jumps == 1
+    assert fast.steady_state.skipped_instructions > 0
+    assert fast.get_timings() == full.get_timings()
+    assert fast.total_cycles == full.total_cycles
+    assert fast.build_table_from_array() == full.build_table_from_array()
+
+
+def test_not_periodic():
+    lines = bm.generate_trace(200, seed=4)
+    full = run(lines)
+    fast = run(lines, steady_state=True)
+    assert fast.steady_state.n_jumps == 0
+    assert fast.get_timings() == full.get_timings()
+
+
+def test_no_stats():
+    with pytest.raises(ValueError, match="stats"):
+        sb.ScoreboardingSIM([], False, stats=True, steady_state=True)
+
+
+def test_block_size():
+    lines = loop_trace(40)
+    obj = sb.ScoreboardingSIM([], False)
+    obj.steady_state = ss.SteadyStateDetector(block_size=16)
+    obj.load_program(*obj.parse_file(lines))
+    obj.run()
+    assert obj.steady_state.period == 16
+    assert obj.steady_state.n_jumps == 1
+    assert obj.get_timings() == run(lines).get_timings()
+
+
+def test_stop_cycle():
+    lines = loop_trace(60)
+    full = run(lines)
+    obj = run(lines, steady_state=True, stop_cycle=150)
+    assert obj.cycle == 150
+    obj.resume()
+    assert obj.get_timings() == full.get_timings()
@@ -0,0 +1,81 @@
+import io
+import os
+
+import pytest
+
+import sbsim.scoreboarding as sb
+import sbsim.streaming as st
+
+
+@pytest.fixture
+def data_path():
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    return os.path.join(dir_path, "data")
+
+
+@pytest.fixture
+def test_3_paths(data_path):
+    return [
+        os.path.join(data_path, "test_3_a.txt"),
+        os.path.join(data_path, "test_3_b.txt"),
+    ]
+
+
+def parse_rows(output: str) -> list:
+    """Get the (issue, read, ex, write) cycles of every row written"""
+    return [
+        tuple(int(i) for i in line.split()[-4:]) for line in output.splitlines()[1:]
+    ]
+
+
+@pytest.mark.parametrize("engine", sb.ScoreboardingSIM.ENGINES)
+def test_streaming_matches_full_run(test_3_paths, engine):
+    output = io.StringIO()
+    obj = st.StreamingScoreboardingSIM(test_3_paths, engine, output)
+    obj.execute()
+    full = sb.ScoreboardingSIM(test_3_paths, False, engine)
+    full.load_program(*full.parse_file(full.get_inputed_files_data()))
+    full.run()
+    assert parse_rows(output.getvalue()) == full.get_timings()
+    assert obj.total_cycles == full.total_cycles
+    assert output.getvalue().splitlines()[1].startswith("fld f1, 100(x7)")
+
+
+@pytest.mark.parametrize("engine", sb.ScoreboardingSIM.ENGINES)
+def test_streaming_memory_is_bounded(tmp_path, engine):
+    class TrackedSIM(st.StreamingScoreboardingSIM):
+        max_table_size = 0
+        max_events = 0
+
+        def process_cycle(self, cycle):
+            super().process_cycle(cycle)
+            self.max_table_size = max(
+                self.max_table_size, len(self.instruction_table.statuses)
+            )
+            self.max_events = max(self.max_events, len(self.pending_events))
+
+    trace = tmp_path / "trace.txt"
+    body = ["fld f1, 0(x1)", "fmul f2, f1, f3", "fadd f4, f2, f5", "fsd f4, 8(x1)"]
+    trace.write_text("\n".join(["int 1 1", "mult 1 4", "add 1 2"] + body * 500))
+    output = io.StringIO()
+    obj = TrackedSIM([str(trace)], engine, output)
+    obj.execute()
+    assert len(output.getvalue().splitlines()) == 1 + 2000
+    assert len(obj.instruction_table) == 2000
+    assert obj.max_table_size <= 8
+    assert obj.max_events <= 8
+
+
+def test_streaming_from_stdin(test_3_paths, monkeypatch):
+    data = "".join(open(path).read() + "\n" for path in test_3_paths)
+    monkeypatch.setattr("sys.stdin", io.StringIO(data))
+    output = io.StringIO()
+    st.StreamingScoreboardingSIM([], output=output).execute()
+    assert len(parse_rows(output.getvalue())) == 9
+
+
+def test_streaming_config_after_instructions(tmp_path):
+    trace = tmp_path / "trace.txt"
+    trace.write_text("int 1 1\nfld f1, 0(x1)\nadd 1 2\n")
+    with pytest.raises(ValueError):
+        st.StreamingScoreboardingSIM([str(trace)], output=io.StringIO()).execute()
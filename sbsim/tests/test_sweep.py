@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+import sbsim
+import sbsim.scoreboarding as sb
+import sbsim.session as ss
+import sbsim.sweep as sw
+
+
+@pytest.fixture
+def test_1_path():
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    return os.path.join(dir_path, "data", "test_1.txt")
+
+
+@pytest.fixture
+def base_config():
+    return {
+        "int": {"n_units": 1, "n_cycles": 1},
+        "mult": {"n_units": 2, "n_cycles": 4},
+        "add": {"n_units": 1, "n_cycles": 2},
+        "div": {"n_units": 1, "n_cycles": 10},
+    }
+
+
+def test_build_config_grid(base_config):
+    grid = sw.build_config_grid(base_config, {"int": [1, 2]}, {"div": [10, 20, 30]})
+    assert len(grid) == 6
+    assert grid[0] == base_config
+    assert grid[-1]["int"] == {"n_units": 2, "n_cycles": 1}
+    assert grid[-1]["div"] == {"n_units": 1, "n_cycles": 30}
+    assert grid[-1]["mult"] == base_config["mult"]
+    with pytest.raises(ValueError):
+        sw.build_config_grid(base_config, {"fma": [1]})
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_sweep_matches_single_runs(test_1_path, base_config, n_workers):
+    units = {"mult": [1, 2]}
+    cycles = {"div": [10, 20]}
+    results = sw.sweep([test_1_path], units=units, cycles=cycles, n_workers=n_workers)
+    grid = sw.build_config_grid(base_config, units, cycles)
+    assert [result["config"] for result in results] == grid
+    for result in results:
+        obj = sb.ScoreboardingSIM([test_1_path], False)
+        _, instructions, raw_instructions = obj.parse_file(obj.get_inputed_files_data())
+        obj.load_program(result["config"], instructions, raw_instructions)
+        obj.run()
+        assert result["timings"] == obj.get_timings()
+        assert result["total_cycles"] == obj.total_cycles
+    assert results[0]["total_cycles"] == 32
+
+
+def test_build_sweep_table(test_1_path):
+    results = sw.sweep([test_1_path], cycles={"div": [10, 20]}, n_workers=1)
+    assert len(sw.build_sweep_table(results).splitlines()) == 4
+    assert len(sw.build_sweep_table(results, True).splitlines()) == 2 + 2 * 9
+
+
+def test_pipelined_and_wide(tmp_path):
+    path = tmp_path / "pipelined.txt"
+    path.write_text(
+        "\n".join(["int 1 1", "mult 1 6 1"] + [f"fmul f{i}, f8, f9" for i in range(4)])
+    )
+    program = ss.Program.from_files([str(path)])
+    grid = sw.build_config_grid(program.functional_units_config, {"mult": [1, 2]})
+    assert grid[0]["mult"] == {"n_units": 1, "n_cycles": 6, "initiation_interval": 1}
+    assert grid[1]["mult"] == {"n_units": 2, "n_cycles": 6, "initiation_interval": 1}
+    for issue_width in [1, 2]:
+        results = sw.sweep(
+            [str(path)], {"mult": [1, 2]}, n_workers=1, issue_width=issue_width
+        )
+        for result in results:
+            config = ss.MachineConfig(result["config"], issue_width=issue_width)
+            assert result == sbsim.simulate(program, config)
+        if issue_width == 1:
+            # 36 cycles when the F.U. is not pipelined
+            assert results[0]["total_cycles"] == 12
+    analyses = sw.bound_sweep([str(path)], {"mult": [1]})
+    assert analyses[0]["config"]["mult"]["initiation_interval"] == 1
+    assert analyses[0]["lower_bound"] <= sbsim.simulate(program)["total_cycles"]
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+import sbsim
+import sbsim.benchmark as bm
+import sbsim.scoreboarding as sb
+import sbsim.session as ss
+import sbsim.trace as trace
+
+
+class StateSIM(sb.ScoreboardingSIM):
+    """Keep the whole scoreboard of every cycle, to compare against the replayed one"""
+
+    def print_cycle(self, cycle, instructions):
+        units = [
+            trace.unit_row(unit)
+            for units in self.functional_unit_table.values()
+            for unit in units
+        ]
+        self.states.append(
+            (cycle, units, list(self.register_table), self.get_timings())
+        )
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_replay_every_cycle(tmp_path, seed):
+    rng = random.Random(seed)
+    config = {
+        fu: {"n_units": rng.randint(1, 2), "n_cycles": rng.randint(1, 8)}
+        for fu in ["int", "mult", "add", "div"]
+    }
+    for fu in rng.sample(list(config), seed % 3):
+        config[fu]["initiation_interval"] = rng.randint(1, 3)
+    lines = bm.generate_trace(
+        60, dependency_distance=2, functional_units_config=config, seed=seed
+    )
+    program = ss.Program.from_lines(lines)
+    engine = sb.ScoreboardingSIM.ENGINES[seed % 2]
+    config = program.default_config(engine, 1 + seed % 3)
+    path = tmp_path / "run.sbt"
+    result = trace.record_trace(program, config, path, block_cycles=7)
+    assert result == sbsim.simulate(program, config)
+
+    obj = StateSIM([], True, engine, issue_width=config.issue_width)
+    obj.states = []
+    obj.load_program(
+        config.functional_units,
+        program.instructions_to_execute,
+        program.raw_instructions,
+    )
+    obj.run()
+    with trace.TraceReader(path) as reader:
+        assert reader.total_cycles == result["total_cycles"] == len(obj.states)
+        assert len(reader.block_starts) == -(-reader.total_cycles // 7)
+        for cycle, units, registers, timings in obj.states:
+            state = reader.state_at(cycle)
+            assert state.units == units
+            assert state.registers == registers
+            assert reader.get_timings(state) == timings
+
+
+def test_view(tmp_path):
+    program = ss.Program.from_lines(bm.generate_trace(20, seed=3))
+    path = tmp_path / "run.sbt"
+    trace.record_trace(program, program.default_config(), path)
+    with trace.TraceReader(path) as reader:
+        tables = reader.build_tables(5)
+        assert tables.startswith(f"cycle 5 of {reader.total_cycles}")
+        everything = reader.build_tables(reader.total_cycles, all_instructions=True)
+        assert everything.count("\n") > tables.count("\n")
+        for fields in program.raw_instructions:
+            assert sb.ScoreboardingSIM.join_raw_instructions(fields) in everything
+        assert "instructions: 20" in reader.build_summary()
+        with pytest.raises(ValueError):
+            reader.state_at(reader.total_cycles + 1)
+        with pytest.raises(ValueError):
+            reader.state_at(0)
+
+
+def test_bad_file(tmp_path):
+    path = tmp_path / "run.sbt"
+    path.write_bytes(b"not a trace at all, just some bytes" * 4)
+    with pytest.raises(ValueError):
+        trace.TraceReader(path)
+    with pytest.raises(ValueError):
+        trace.TraceWriter(tmp_path / "other.sbt", block_cycles=0)
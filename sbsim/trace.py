@@ -0,0 +1,458 @@
+import bisect
+import json
+import os
+import struct
+import zlib
+from array import array
+from operator import attrgetter
+
+from .isa import ISA
+from .render import HEADERS, build_table
+from .scoreboarding import FunctionalUnit, ScoreboardingSIM
+from .session import MachineConfig, Program
+
+TRACE_MAGIC = b"SBTRACE\0"
+
+# Bumped whenever the layout of the file changes, older traces can't be read then
+TRACE_VERSION = 1
+
+HEADER = struct.Struct("<8sI")
+
+# Offset and length of the trailer (the metadata and cycle index) and of the
+# final timings, at the very end of the file
+FOOTER = struct.Struct("<4Q")
+
+# Cycles stored in each compressed block, a replay decompresses a single block
+DEFAULT_BLOCK_CYCLES = 1024
+
+# Columns of a F.U. row in a trace, pipeline is the next_start of its Pipeline
+UNIT_COLUMNS = [
+    "busy",
+    "op",
+    "fi",
+    "fj",
+    "fk",
+    "qj",
+    "qk",
+    "rj",
+    "rk",
+    "reserved_by",
+    "latency",
+    "done_cycles",
+    "finished",
+    "pipeline",
+]
+
+OP_COLUMN = UNIT_COLUMNS.index("op")
+
+# Flags that are either True or None
+BOOL_COLUMNS = [UNIT_COLUMNS.index("busy"), UNIT_COLUMNS.index("finished")]
+
+NO_TIMINGS = (None, None, None, None)
+
+get_unit_columns = attrgetter(*UNIT_COLUMNS[:-1])
+
+
+def unit_row(unit: FunctionalUnit) -> tuple:
+    """Get the columns of a F.U. as they are stored in a trace"""
+    pipeline = None if unit.pipeline is None else unit.pipeline.next_start
+    return get_unit_columns(unit) + (pipeline,)
+
+
+class TraceWriter:
+    """Write the scoreboard of every cycle to a file as the deltas from the cycle before.
+
+    A cycle stores the F.U. rows and registers that changed and the stage
+    cycles of the instructions that moved. The cycles are grouped in blocks of
+    block_cycles that are compressed on their own, each one starting with the
+    whole state of its first cycle, so any cycle can be rebuilt from a single
+    block. Every value is stored as an int, None is 0 and the rest are shifted
+    by one.
+    """
+
+    def __init__(self, path: os.path, block_cycles: int = DEFAULT_BLOCK_CYCLES) -> None:
+        if block_cycles < 1:
+            raise ValueError(f"A block must hold at least 1 cycle, got {block_cycles}")
+        self.block_cycles = block_cycles
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION))
+        self.index = []
+        self.units = None
+        self.block = None
+
+    def start_block(self, sim: ScoreboardingSIM, cycle: int) -> None:
+        """Forget the previous state, so the first cycle of the block stores all of it"""
+        if self.units is None:
+            self.units = [
+                unit for units in sim.functional_unit_table.values() for unit in units
+            ]
+            # The rows a change of a unit can show up in, the rows of a pipelined
+            # F.U. share the next_start of their pipeline
+            self.unit_positions = {}
+            for position, unit in enumerate(self.units):
+                self.unit_positions[id(unit)] = [
+                    other
+                    for other, other_unit in enumerate(self.units)
+                    if other_unit is unit
+                    or (
+                        unit.pipeline is not None
+                        and other_unit.pipeline is unit.pipeline
+                    )
+                ]
+            self.op_codes = {op: code for code, op in enumerate(sim.isa.opcodes)}
+        self.block = []
+        self.block_start = cycle
+        self.last_units = [None] * len(self.units)
+        self.last_registers = [None] * len(sim.register_table)
+        self.last_timings = {}
+
+    def encode_unit(self, row: tuple) -> list:
+        """Get the ints stored for a F.U. row"""
+        values = list(row)
+        if values[OP_COLUMN] is not None:
+            values[OP_COLUMN] = self.op_codes[values[OP_COLUMN]]
+        return [0 if value is None else value + 1 for value in values]
+
+    def record_cycle(
+        self, sim: ScoreboardingSIM, cycle: int, instructions: list
+    ) -> None:
+        """Store what changed in cycle, instructions are the ones that could do something in it.
+
+        Only those instructions can change the scoreboard, so only their
+        stage cycles, F.U.s and destination registers are compared, except in
+        the first cycle of a block that stores everything.
+        """
+        new_block = self.block is None
+        if new_block:
+            self.start_block(sim, cycle)
+        timing_record = []
+        positions = set()
+        registers = set()
+        for instruction in instructions:
+            idx = instruction.idx
+            status = sim.instruction_table[idx]
+            timings = status.issue, status.read, status.ex, status.write
+            if timings != self.last_timings.get(idx, NO_TIMINGS):
+                timing_record.append(idx)
+                timing_record += [
+                    0 if value is None else value + 1 for value in timings
+                ]
+                self.last_timings[idx] = timings
+            if timings[3] is not None:
+                # Written, it won't change anymore
+                self.last_timings.pop(idx, None)
+            if status.unit is not None:
+                positions.update(self.unit_positions[id(status.unit)])
+            if instruction.dest is not None:
+                registers.add(instruction.dest)
+        if new_block:
+            positions = range(len(self.units))
+            registers = range(len(sim.register_table))
+
+        record = [cycle, 0]
+        for position in sorted(positions):
+            row = unit_row(self.units[position])
+            if row != self.last_units[position]:
+                self.last_units[position] = row
+                record.append(position)
+                record += self.encode_unit(row)
+                record[1] += 1
+        count = len(record)
+        record.append(0)
+        for reg in sorted(registers):
+            producer = sim.register_table[reg]
+            if producer != self.last_registers[reg]:
+                self.last_registers[reg] = producer
+                record += [reg, 0 if producer is None else producer + 1]
+                record[count] += 1
+        record.append(len(timing_record) // 5)
+        record += timing_record
+        self.block += record
+        if cycle - self.block_start + 1 >= self.block_cycles:
+            self.flush()
+
+    def flush(self) -> None:
+        """Compress the current block and add it to the cycle index"""
+        if self.block is None:
+            return
+        data = zlib.compress(array("q", self.block).tobytes())
+        self.index.append([self.block_start, self.file.tell(), len(data)])
+        self.file.write(data)
+        self.block = None
+
+    def close(self, sim: ScoreboardingSIM) -> None:
+        """Write the last block, the metadata with the cycle index and the final timings"""
+        self.flush()
+        metadata = {
+            "functional_units": sim.functional_units_config,
+            "issue_width": sim.issue_width,
+            "units": [
+                [fu, unit.n_cycles]
+                for fu, units in sim.functional_unit_table.items()
+                for unit in units
+            ],
+            "ops": list(sim.isa.opcodes),
+            "register_names": sim.register_names,
+            "instructions": [
+                sim.join_raw_instructions(fields) for fields in sim.raw_instructions
+            ],
+            "labels": [instruction.label for instruction in sim.instruction_order],
+            "total_cycles": sim.total_cycles,
+            "block_cycles": self.block_cycles,
+            "index": self.index,
+        }
+        trailer_offset = self.file.tell()
+        trailer = zlib.compress(json.dumps(metadata).encode())
+        self.file.write(trailer)
+        timings = array("q")
+        for timing in sim.get_timings():
+            timings += array(
+                "q", [0 if value is None else value + 1 for value in timing]
+            )
+        timings_offset = self.file.tell()
+        timings = zlib.compress(timings.tobytes())
+        self.file.write(timings)
+        self.file.write(
+            FOOTER.pack(trailer_offset, len(trailer), timings_offset, len(timings))
+        )
+        self.file.close()
+
+
+class TracingSIM(ScoreboardingSIM):
+    """Simulator that records the scoreboard of every cycle to a trace file instead of printing it"""
+
+    def __init__(
+        self,
+        file_paths: list[os.path],
+        trace_path: os.path,
+        engine: str = "cycle",
+        stats: bool = False,
+        isa: ISA = None,
+        issue_width: int = 1,
+        block_cycles: int = DEFAULT_BLOCK_CYCLES,
+    ) -> None:
+        # Every cycle must be seen, so the event engine still visits the skipped ones
+        super().__init__(
+            file_paths, True, engine, stats, isa=isa, issue_width=issue_width
+        )
+        self.trace_path = trace_path
+        self.block_cycles = block_cycles
+
+    def run(self, stop_cycle: int = None) -> None:
+        """Same as ScoreboardingSIM.run, writing the trace as the cycles are simulated"""
+        self.writer = TraceWriter(self.trace_path, self.block_cycles)
+        super().run(stop_cycle)
+
+    def print_cycle(self, cycle: int, instructions: list) -> None:
+        """Record what changed in this cycle"""
+        self.writer.record_cycle(self, cycle, instructions)
+
+    def end_simulation(self) -> None:
+        """Close the trace once every instruction is done"""
+        super().end_simulation()
+        if not self.check_if_pipeline_is_finished():
+            self.writer.close(self)
+
+
+def record_trace(
+    program: Program,
+    config: MachineConfig,
+    path: os.path,
+    block_cycles: int = DEFAULT_BLOCK_CYCLES,
+) -> dict:
+    """Same as session.simulate, writing the trace of the run to path"""
+    obj = TracingSIM(
+        [],
+        path,
+        config.engine,
+        isa=program.isa,
+        issue_width=config.issue_width,
+        block_cycles=block_cycles,
+    )
+    obj.load_program(
+        config.functional_units,
+        program.instructions_to_execute,
+        program.raw_instructions,
+    )
+    obj.run()
+    return obj.get_result()
+
+
+class TraceState:
+    """The scoreboard at the end of a cycle, rebuilt from a trace"""
+
+    def __init__(self, cycle: int, units: list, registers: list, timings: dict) -> None:
+        self.cycle = cycle
+        self.units = units  # One tuple of UNIT_COLUMNS per F.U. row
+        self.registers = registers  # Producer of each register, None when free
+        self.timings = (
+            timings  # Stage cycles of the instructions that moved in the block
+        )
+
+
+class TraceReader:
+    """Random access to the cycles of a trace written by TraceWriter"""
+
+    def __init__(self, path: os.path) -> None:
+        self.file = open(path, "rb")
+        magic, version = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != TRACE_MAGIC:
+            raise ValueError(f"'{path}' is not a scoreboard trace")
+        if version != TRACE_VERSION:
+            raise ValueError(
+                f"Trace version {version} can't be read, expected {TRACE_VERSION}"
+            )
+        self.file.seek(-FOOTER.size, os.SEEK_END)
+        trailer_offset, trailer_length, timings_offset, timings_length = FOOTER.unpack(
+            self.file.read(FOOTER.size)
+        )
+        self.metadata = json.loads(
+            zlib.decompress(self.read(trailer_offset, trailer_length))
+        )
+        self.total_cycles = self.metadata["total_cycles"]
+        self.block_starts = [start for start, _, _ in self.metadata["index"]]
+        self.final_timings = array("q")
+        self.final_timings.frombytes(
+            zlib.decompress(self.read(timings_offset, timings_length))
+        )
+
+    def __enter__(self) -> "TraceReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the trace file"""
+        self.file.close()
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Read length bytes of the file starting at offset"""
+        self.file.seek(offset)
+        return self.file.read(length)
+
+    def decode_unit(self, values: array) -> tuple:
+        """Get back a F.U. row from the ints stored for it"""
+        row = [None if value == 0 else value - 1 for value in values]
+        if row[OP_COLUMN] is not None:
+            row[OP_COLUMN] = self.metadata["ops"][row[OP_COLUMN]]
+        for column in BOOL_COLUMNS:
+            if row[column] is not None:
+                row[column] = bool(row[column])
+        return tuple(row)
+
+    def state_at(self, cycle: int) -> TraceState:
+        """Rebuild the scoreboard at the end of cycle, from the deltas of the block holding it"""
+        if not 1 <= cycle <= self.total_cycles:
+            raise ValueError(
+                f"Cycle {cycle} is not in the trace, it has cycles 1 to {self.total_cycles}"
+            )
+        _, offset, length = self.metadata["index"][
+            bisect.bisect_right(self.block_starts, cycle) - 1
+        ]
+        block = array("q")
+        block.frombytes(zlib.decompress(self.read(offset, length)))
+        n_columns = len(UNIT_COLUMNS)
+        units = [None] * len(self.metadata["units"])
+        registers = [None] * len(self.metadata["register_names"])
+        timings = {}
+        position = 0
+        while position < len(block) and block[position] <= cycle:
+            n_units = block[position + 1]
+            position += 2
+            for _ in range(n_units):
+                units[block[position]] = block[position + 1 : position + 1 + n_columns]
+                position += 1 + n_columns
+            n_registers = block[position]
+            position += 1
+            for _ in range(n_registers):
+                producer = block[position + 1]
+                registers[block[position]] = None if producer == 0 else producer - 1
+                position += 2
+            n_timings = block[position]
+            position += 1
+            for _ in range(n_timings):
+                timings[block[position]] = tuple(
+                    None if value == 0 else value - 1
+                    for value in block[position + 1 : position + 5]
+                )
+                position += 5
+        # Rows are only decoded once the last change before cycle is known
+        units = [self.decode_unit(values) for values in units]
+        return TraceState(cycle, units, registers, timings)
+
+    def get_instruction_timings(self, state: TraceState, idx: int) -> tuple:
+        """Get the (issue, read, ex, write) cycles of an instruction at the end of the cycle of state"""
+        if idx in state.timings:
+            return state.timings[idx]
+        final = tuple(
+            None if value == 0 else value - 1
+            for value in self.final_timings[4 * idx : 4 * idx + 4]
+        )
+        # Not changed in the block, so either written before it or not issued yet
+        if final[0] is not None and final[0] <= state.cycle:
+            return final
+        return NO_TIMINGS
+
+    def get_timings(self, state: TraceState) -> list:
+        """Get the (issue, read, ex, write) cycles of every instruction at the end of the cycle of state"""
+        return [
+            self.get_instruction_timings(state, idx)
+            for idx in range(len(self.metadata["labels"]))
+        ]
+
+    def get_label(self, idx: int) -> str:
+        """Get the label of an instruction id, None stays None"""
+        return None if idx is None else self.metadata["labels"][idx]
+
+    def build_tables(self, cycle: int, all_instructions: bool = False) -> str:
+        """Build the instruction, F.U. and register tables at the end of cycle.
+
+        Only the instructions in flight, or written in that cycle, are shown
+        unless all_instructions is set.
+        """
+        state = self.state_at(cycle)
+        register_names = self.metadata["register_names"]
+        rows = []
+        for idx, instruction in enumerate(self.metadata["instructions"]):
+            timings = self.get_instruction_timings(state, idx)
+            if all_instructions or (
+                timings[0] is not None and timings[3] in [None, cycle]
+            ):
+                rows.append([instruction] + [str(value) for value in timings])
+        unit_rows = []
+        for (fu, _), row in zip(self.metadata["units"], state.units):
+            row = list(row)
+            for column in ["fi", "fj", "fk"]:
+                position = UNIT_COLUMNS.index(column)
+                if row[position] is not None:
+                    row[position] = register_names[row[position]]
+            for column in ["qj", "qk", "reserved_by"]:
+                position = UNIT_COLUMNS.index(column)
+                row[position] = self.get_label(row[position])
+            unit_rows.append([fu] + row)
+        register_rows = [
+            [register_names[reg], self.get_label(producer)]
+            for reg, producer in enumerate(state.registers)
+            if producer is not None
+        ]
+        return "\n\n".join(
+            [
+                f"cycle {cycle} of {self.total_cycles}",
+                build_table(rows, HEADERS),
+                build_table(unit_rows, ["fu"] + UNIT_COLUMNS),
+                build_table(register_rows, ["register", "reserved by"]),
+            ]
+        )
+
+    def build_summary(self) -> str:
+        """Describe the traced run and how it is stored"""
+        return "\n".join(
+            [
+                f"instructions: {len(self.metadata['labels'])}",
+                f"cycles: {self.total_cycles}",
+                f"issue width: {self.metadata['issue_width']}",
+                f"blocks: {len(self.block_starts)} of {self.metadata['block_cycles']} cycles",
+                f"size: {os.fstat(self.file.fileno()).st_size} bytes",
+            ]
+        )